@@ -2,12 +2,23 @@
 信息安全技术系统 - 主应用程序
 Flask Web应用入口
 """
-from flask import Flask, render_template, request, jsonify, session, send_from_directory
+from flask import Flask, render_template, request, jsonify, session, send_file, Response, stream_with_context
 from functools import wraps
+import io
+import math
 import os
 from config import *
 from auth.auth_routes import auth_bp
 from database.init_db import init_database
+from database import share_catalog
+from storage.backends import get_storage
+from storage.layout import new_job_id, job_key, job_prefix, validate_key, AREA_UPLOADS, AREA_OUTPUTS
+from storage.usage import UsageLedger
+from storage.janitor import Janitor
+from image_share.capacity import CostModel, read_image_header
+from crypto_classic.crack_jobs import CrackJobManager
+from crypto_classic import ngrams
+from crypto_modern.rsa_pool import RSAKeyPool
 
 
 # 初始化Flask应用
@@ -18,9 +29,35 @@ app.secret_key = SECRET_KEY
 # 注册蓝图
 app.register_blueprint(auth_bp)
 
-# 初始化数据库
-if not os.path.exists('database/users.db'):
-    init_database()
+# 初始化数据库（建表语句可重复执行，旧库会自动补齐分片目录表）
+init_database()
+
+# 存储用量账本与后台清理线程
+usage_ledger = UsageLedger()
+janitor = Janitor(
+    get_storage(), usage_ledger,
+    ttls={AREA_UPLOADS: UPLOAD_TTL, AREA_OUTPUTS: OUTPUT_TTL},
+    global_quota=STORAGE_QUOTA_BYTES,
+    user_quota=USER_QUOTA_BYTES,
+    interval=JANITOR_INTERVAL
+)
+if JANITOR_ENABLED:
+    janitor.start()
+
+# 图像分存开销模型（系数来自 image_share/cost_model.json 的基准标定）
+cost_model = CostModel()
+
+# 后台破解任务（Playfair 模拟退火等耗时较长的分析）
+crack_jobs = CrackJobManager(max_running=CRACK_MAX_JOBS)
+
+# RSA密钥对预生成池
+rsa_pool = RSAKeyPool(RSA_POOL_WATERMARKS, low_watermark=RSA_POOL_LOW_WATERMARK,
+                      workers=RSA_POOL_WORKERS)
+if RSA_POOL_ENABLED:
+    rsa_pool.start()
+
+# 启动时内存映射 n-gram 概率表，破解使用的工作进程直接共享
+ngrams.preload()
 
 
 def login_required(f):
@@ -82,17 +119,51 @@ def help_page():
 
 # ===================== 文件下载路由 =====================
 
-@app.route('/outputs/<filename>')
+def _output_url(key: str) -> str:
+    """将 outputs 区域的存储键转换为下载地址"""
+    return '/' + key
+
+
+def _store_file(key: str, local_path: str, user_id: int) -> int:
+    """将本地文件移入存储，并记入用量账本"""
+    size = get_storage().put_file(key, local_path, move=True)
+    usage_ledger.record(key, size, user_id)
+    return size
+
+
+def _admit_job(operation: str, header: dict, threshold: int, shares: int) -> tuple:
+    """按开销模型预测任务开销并做准入判断，返回 (预测结果, 拒绝原因或None)"""
+    estimate = cost_model.estimate(operation, header['width'], header['height'], header['mode'],
+                                   threshold, shares)
+    _, reason = cost_model.admit(
+        estimate,
+        max_output_bytes=MAX_JOB_OUTPUT_BYTES,
+        max_peak_memory=MAX_JOB_PEAK_MEMORY,
+        max_seconds=MAX_JOB_SECONDS
+    )
+    return estimate, reason
+
+
+def _touch_key(key: str):
+    """记录一次访问，刷新所属任务的LRU时间（旧的扁平路径不参与）"""
+    parts = key.split('/')
+    if len(parts) >= 5:
+        usage_ledger.touch_job(parts[3])
+
+
+@app.route('/outputs/<path:filename>')
 @login_required
 def download_output_file(filename):
     """下载输出文件（恢复的图像等）"""
     try:
-        # 验证文件名格式，防止目录遍历攻击
-        if '..' in filename or '/' in filename or not filename:
+        # 验证存储键格式，防止目录遍历攻击
+        try:
+            key = validate_key(f'{AREA_OUTPUTS}/{filename}')
+        except ValueError:
             return jsonify({'success': False, 'message': '无效的文件名'}), 400
         
-        file_path = os.path.join(OUTPUT_FOLDER, filename)
-        if not os.path.exists(file_path) or not os.path.isfile(file_path):
+        storage = get_storage()
+        if not storage.exists(key):
             return jsonify({'success': False, 'message': '文件不存在'}), 404
         
         # 根据文件扩展名设置 MIME 类型
@@ -108,13 +179,30 @@ def download_output_file(filename):
         file_ext = os.path.splitext(filename)[1].lower()
         mimetype = mime_types.get(file_ext, 'application/octet-stream')
         
-        return send_from_directory(OUTPUT_FOLDER, filename, mimetype=mimetype)
+        _touch_key(key)
+        return send_file(storage.open(key), mimetype=mimetype,
+                         download_name=os.path.basename(filename))
     except Exception as e:
         return jsonify({'success': False, 'message': f'下载失败: {str(e)}'}), 500
 
 
 # ===================== 经典密码算法API =====================
 
+def _detach_upload(upload):
+    """
+    返回独立于请求生命周期的上传文件句柄
+
+    请求处理函数返回后上传文件就会被关闭，而流式响应还要继续读取，
+    因此复制一个文件描述符（小文件会先落盘），由响应生成器负责关闭
+    """
+    try:
+        handle = os.fdopen(os.dup(upload.stream.fileno()), 'rb')
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return io.BytesIO(upload.read())
+    handle.seek(0)
+    return handle
+
+
 @app.route('/api/classic/caesar', methods=['POST'])
 @login_required
 def caesar_api():
@@ -145,6 +233,39 @@ def caesar_api():
         return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
 
 
+@app.route('/api/classic/caesar/crack', methods=['POST'])
+@login_required
+def caesar_crack_api():
+    """凯撒密码频率分析破解，返回按可能性排序的位移量"""
+    try:
+        from crypto_classic.caesar import crack
+
+        data = request.get_json()
+        text = data.get('text', '')
+        top = int(data.get('top', 1))
+        method = data.get('method', 'chi_squared')
+
+        if not text:
+            return jsonify({'success': False, 'message': '文本不能为空'}), 400
+        if not 1 <= top <= 26:
+            return jsonify({'success': False, 'message': 'top 必须在 1-26 之间'}), 400
+
+        candidates = crack(text, top=top, method=method)
+
+        return jsonify({
+            'success': True,
+            'shift': candidates[0]['shift'],
+            'result': candidates[0]['plaintext'],
+            'method': method,
+            'candidates': candidates
+        }), 200
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
 @app.route('/api/classic/substitution', methods=['POST'])
 @login_required
 def substitution_api():
@@ -179,6 +300,53 @@ def substitution_api():
         return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
 
 
+@app.route('/api/classic/substitution/crack', methods=['POST'])
+@login_required
+def substitution_crack_api():
+    """提交单表置换密码破解任务（爬山算法 + quadgram 打分），立即返回任务ID"""
+    try:
+        from crypto_classic.ngrams import text_to_codes
+        from crypto_classic.substitution_cracker import crack
+
+        data = request.get_json()
+        text = data.get('text', '')
+        time_budget = min(float(data.get('time_budget', 10)), CRACK_MAX_SECONDS)
+        restarts = min(int(data.get('restarts', 200)), CRACK_MAX_RESTARTS)
+
+        if not text:
+            return jsonify({'success': False, 'message': '文本不能为空'}), 400
+        if len(text_to_codes(text)) < 4:
+            return jsonify({'success': False, 'message': '密文字母太少，无法进行频率分析'}), 400
+        if not math.isfinite(time_budget) or time_budget <= 0 or restarts <= 0:
+            return jsonify({'success': False, 'message': 'time_budget 和 restarts 必须为正数'}), 400
+
+        # 与 Playfair 共用后台任务表，同时运行的破解（及其进程池）不超过 CRACK_MAX_JOBS
+        try:
+            job_id = crack_jobs.submit(session['user_id'], crack, ciphertext=text,
+                                       time_budget=time_budget, restarts=restarts,
+                                       workers=CRACK_WORKERS)
+        except RuntimeError as e:
+            return jsonify({'success': False, 'message': str(e)}), 429
+
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': f'/api/classic/substitution/crack/{job_id}'
+        }), 202
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/classic/substitution/crack/<job_id>', methods=['GET'])
+@login_required
+def substitution_crack_status_api(job_id):
+    """查询单表置换密码破解任务的状态、进度和结果"""
+    return _crack_job_status(job_id)
+
+
 @app.route('/api/classic/playfair', methods=['POST'])
 @login_required
 def playfair_api():
@@ -208,6 +376,219 @@ def playfair_api():
         return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
 
 
+@app.route('/api/classic/playfair/crack', methods=['POST'])
+@login_required
+def playfair_crack_api():
+    """提交 Playfair 破解任务（模拟退火），立即返回任务ID"""
+    try:
+        from crypto_classic.playfair_cracker import crack
+
+        data = request.get_json()
+        text = data.get('text', '')
+        time_budget = min(float(data.get('time_budget', 60)), PLAYFAIR_CRACK_MAX_SECONDS)
+        chains = int(data.get('chains', 4))
+
+        if not text:
+            return jsonify({'success': False, 'message': '文本不能为空'}), 400
+        if not math.isfinite(time_budget) or time_budget <= 0 or not 1 <= chains <= 16:
+            return jsonify({'success': False, 'message': 'time_budget 必须为正数，chains 必须在 1-16 之间'}), 400
+
+        try:
+            job_id = crack_jobs.submit(session['user_id'], crack, ciphertext=text,
+                                       time_budget=time_budget, chains=chains,
+                                       workers=CRACK_WORKERS)
+        except RuntimeError as e:
+            return jsonify({'success': False, 'message': str(e)}), 429
+
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': f'/api/classic/playfair/crack/{job_id}'
+        }), 202
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/classic/playfair/crack/<job_id>', methods=['GET'])
+@login_required
+def playfair_crack_status_api(job_id):
+    """查询 Playfair 破解任务的状态、进度和结果"""
+    return _crack_job_status(job_id)
+
+
+def _crack_job_status(job_id: str):
+    """后台破解任务的状态响应（只能查询自己提交的任务）"""
+    try:
+        job = crack_jobs.get(job_id, session['user_id'])
+        if job is None:
+            return jsonify({'success': False, 'message': '任务不存在'}), 404
+
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status': job['status'],
+            'progress': job['progress'],
+            'result': job['result'],
+            'error': job['error']
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/classic/vigenere', methods=['POST'])
+@login_required
+def vigenere_api():
+    """维吉尼亚密码加密/解密"""
+    try:
+        from crypto_classic.vigenere import encrypt, decrypt
+
+        data = request.get_json()
+        text = data.get('text', '')
+        key = data.get('key', '')
+        operation = data.get('operation', 'encrypt')
+
+        if not text or not key:
+            return jsonify({'success': False, 'message': '文本和密钥都不能为空'}), 400
+
+        if operation == 'encrypt':
+            result = encrypt(text, key)
+        else:
+            result = decrypt(text, key)
+
+        return jsonify({
+            'success': True,
+            'result': result
+        }), 200
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/classic/vigenere/crack', methods=['POST'])
+@login_required
+def vigenere_crack_api():
+    """维吉尼亚密码破解（重合指数估计密钥长度 + 分列卡方统计）"""
+    try:
+        from crypto_classic.vigenere import crack, MAX_PERIOD
+
+        data = request.get_json()
+        text = data.get('text', '')
+        max_period = int(data.get('max_period', MAX_PERIOD))
+
+        if not text:
+            return jsonify({'success': False, 'message': '文本不能为空'}), 400
+        if not 1 <= max_period <= 100:
+            return jsonify({'success': False, 'message': 'max_period 必须在 1-100 之间'}), 400
+
+        result = crack(text, max_period=max_period)
+
+        return jsonify({
+            'success': True,
+            'result': result['plaintext'],
+            'key': result['key'],
+            'period': result['period'],
+            'ioc': result['ioc'],
+            'column_scores': result['column_scores']
+        }), 200
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/classic/<algorithm>/file', methods=['POST'])
+@login_required
+def classic_file_api(algorithm):
+    """
+    经典密码文件模式：上传文件（multipart 的 file 字段或原始请求体），
+    分块流式加解密并以下载形式流式返回，参数放在表单或查询字符串中
+    """
+    try:
+        from werkzeug.utils import secure_filename
+        from crypto_classic.streaming import ALGORITHMS, cipher_stream, iter_chunks
+        from crypto_classic.substitution import generate_key
+
+        if algorithm not in ALGORITHMS:
+            return jsonify({'success': False, 'message': f'不支持的算法: {algorithm}'}), 404
+
+        if request.mimetype == 'multipart/form-data':
+            params = request.form if request.form else request.args
+            upload = request.files.get('file')
+            if upload is None:
+                return jsonify({'success': False, 'message': '缺少 file 字段'}), 400
+            source, filename, owned = _detach_upload(upload), upload.filename, True
+        else:
+            # 原始请求体：参数只从查询字符串读取（访问 request.form 会消耗表单类型的请求体）
+            params = request.args
+            source, filename, owned = request.stream, params.get('filename', 'input.txt'), False
+        operation = params.get('operation', 'encrypt')
+
+        headers = {}
+        if algorithm == 'caesar':
+            key = int(params.get('shift', 3))
+        else:
+            key = params.get('key')
+            if algorithm == 'substitution' and not key:
+                key = generate_key()
+                headers['X-Substitution-Key'] = key
+
+        output = cipher_stream(algorithm, iter_chunks(source), key, decrypt=(operation == 'decrypt'))
+        # 先处理第一块，参数或内容错误时还能返回JSON错误
+        try:
+            first = next(output)
+        except StopIteration:
+            first = b''
+
+        def generate():
+            try:
+                yield first
+                yield from output
+            finally:
+                if owned:
+                    source.close()
+
+        base = os.path.splitext(secure_filename(filename) or 'input')[0]
+        headers['Content-Disposition'] = f'attachment; filename={base}_{algorithm}_{operation}.txt'
+        return Response(stream_with_context(generate()), mimetype='text/plain; charset=utf-8',
+                        headers=headers)
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/classic/analyze', methods=['POST'])
+@login_required
+def classic_analyze_api():
+    """文本频率分析：字母直方图、重合指数、n-gram 概况（支持JSON文本或上传文件）"""
+    try:
+        if 'file' in request.files:
+            text = request.files['file'].read()
+            top = int(request.form.get('top', 10))
+        else:
+            data = request.get_json()
+            text = data.get('text', '')
+            top = int(data.get('top', 10))
+
+        if not text:
+            return jsonify({'success': False, 'message': '文本不能为空'}), 400
+        if not 1 <= top <= 100:
+            return jsonify({'success': False, 'message': 'top 必须在 1-100 之间'}), 400
+
+        result = ngrams.analyze(text, top=top)
+
+        return jsonify({'success': True, **result}), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
 # ===================== 现代密码算法API =====================
 
 @app.route('/api/modern/md5', methods=['POST'])
@@ -235,6 +616,41 @@ def md5_api():
         return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
 
 
+@app.route('/api/modern/hash/file', methods=['POST'])
+@login_required
+def hash_file_api():
+    """
+    文件摘要：上传文件（multipart 的 file 字段或原始请求体）只读一遍，
+    同时计算 MD5、SHA-256、SHA3-256、BLAKE2b，并报告吞吐量
+    """
+    try:
+        from crypto_modern.multi_hash import ALGORITHMS, CHUNK_SIZE, hash_stream
+        
+        if request.mimetype == 'multipart/form-data':
+            params = request.form if request.form else request.args
+            upload = request.files.get('file')
+            if upload is None:
+                return jsonify({'success': False, 'message': '缺少 file 字段'}), 400
+            source, filename = upload.stream, upload.filename
+        else:
+            # 原始请求体：参数只从查询字符串读取，访问 request.form 会把
+            # application/x-www-form-urlencoded 的请求体当作表单解析掉
+            params = request.args
+            source, filename = request.stream, params.get('filename', 'input.bin')
+        algorithms = [name.strip() for name in params.get('algorithms', ','.join(ALGORITHMS)).split(',')
+                      if name.strip()]
+        chunk_size = int(params.get('chunk_size', CHUNK_SIZE))
+        
+        result = hash_stream(source, algorithms, chunk_size)
+        
+        return jsonify(dict(result, success=True, filename=filename)), 200
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
 @app.route('/api/modern/des', methods=['POST'])
 @login_required
 def des_api():
@@ -246,12 +662,15 @@ def des_api():
         text = data.get('text', '')
         key = data.get('key', '')
         operation = data.get('operation', 'encrypt')
+        kdf = data.get('kdf', 'pbkdf2')
+        kdf = None if kdf == 'none' else kdf
+        cost = data.get('kdf_cost')
         
         if not text or not key:
             return jsonify({'success': False, 'message': '文本和密钥都不能为空'}), 400
         
         if operation == 'encrypt':
-            result = encrypt(text, key)
+            result = encrypt(text, key, kdf, int(cost) if cost else None)
         else:
             result = decrypt(text, key)
         
@@ -261,6 +680,8 @@ def des_api():
             'algorithm': 'DES'
         }), 200
     
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
 
@@ -277,12 +698,15 @@ def aes_api():
         key = data.get('key', '')
         operation = data.get('operation', 'encrypt')
         key_size = int(data.get('key_size', 32))
+        kdf = data.get('kdf', 'pbkdf2')
+        kdf = None if kdf == 'none' else kdf
+        cost = data.get('kdf_cost')
         
         if not text or not key:
             return jsonify({'success': False, 'message': '文本和密钥都不能为空'}), 400
         
         if operation == 'encrypt':
-            result = encrypt(text, key, key_size)
+            result = encrypt(text, key, key_size, kdf, int(cost) if cost else None)
         else:
             result = decrypt(text, key, key_size)
         
@@ -293,6 +717,139 @@ def aes_api():
             'key_size': key_size
         }), 200
     
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/modern/aes/file', methods=['POST'])
+@login_required
+def aes_file_api():
+    """
+    AES文件模式：上传文件（multipart 的 file 字段或原始请求体），
+    密钥放在 multipart 的 key 字段或 X-Cipher-Key 请求头中（不接受URL中的密钥），
+    口令经 kdf 派生为密钥后按块用 AES-GCM 流式加密/逐块验证解密，并以下载形式流式返回
+    """
+    try:
+        from werkzeug.utils import secure_filename
+        from crypto_modern.aes_stream import CHUNK_SIZE, encrypt_stream, decrypt_stream
+
+        if 'key' in request.args:
+            return jsonify({'success': False,
+                            'message': '密钥不能放在URL中，请使用 X-Cipher-Key 请求头或 multipart 表单'}), 400
+        if request.mimetype == 'multipart/form-data':
+            params = request.form if request.form else request.args
+            upload = request.files.get('file')
+            key = request.form.get('key', '')
+        else:
+            # 原始请求体：参数只从查询字符串读取（访问 request.form 会消耗表单类型的请求体），
+            # 密钥从请求头读取，避免出现在URL和访问日志中
+            params, upload = request.args, None
+            key = request.headers.get('X-Cipher-Key', '')
+        operation = params.get('operation', 'encrypt')
+        if not key:
+            return jsonify({'success': False, 'message': '密钥不能为空'}), 400
+        if upload is not None:
+            source, filename, owned = _detach_upload(upload), upload.filename, True
+        elif request.mimetype == 'multipart/form-data':
+            return jsonify({'success': False, 'message': '缺少 file 字段'}), 400
+        else:
+            source, filename, owned = request.stream, params.get('filename', 'input.bin'), False
+
+        name = secure_filename(filename) or 'input.bin'
+        if operation == 'encrypt':
+            cost = params.get('kdf_cost')
+            output = encrypt_stream(source, key, int(params.get('key_size', 32)),
+                                    int(params.get('chunk_size', CHUNK_SIZE)), workers=AES_FILE_WORKERS,
+                                    kdf=params.get('kdf', 'pbkdf2'), cost=int(cost) if cost else None)
+            download = f'{name}.enc'
+        else:
+            key_size = params.get('key_size')
+            output = decrypt_stream(source, key, int(key_size) if key_size else None,
+                                    workers=AES_FILE_WORKERS)
+            download = name[:-4] if name.endswith('.enc') and len(name) > 4 else f'{name}.dec'
+
+        # 先处理第一块，参数、密钥或格式错误时还能返回JSON错误
+        try:
+            first = next(output)
+        except StopIteration:
+            first = b''
+        except Exception:
+            if owned:
+                source.close()
+            raise
+
+        def generate():
+            # aes_stream 并行时输出 bytearray，WSGI 要求 bytes（bytes 对象不会被复制）
+            try:
+                yield bytes(first)
+                for chunk in output:
+                    yield bytes(chunk)
+            finally:
+                if owned:
+                    source.close()
+
+        return Response(stream_with_context(generate()), mimetype='application/octet-stream',
+                        headers={'Content-Disposition': f'attachment; filename={download}'})
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/modern/<algorithm>/batch', methods=['POST'])
+@login_required
+def cipher_batch_api(algorithm):
+    """AES/DES批量加密/解密：同一口令处理多条消息，密钥只派生和扩展一次"""
+    try:
+        import time
+        from crypto_modern import aes_cipher, des_cipher
+
+        if algorithm not in ('aes', 'des'):
+            return jsonify({'success': False, 'message': f'不支持的算法: {algorithm}'}), 404
+
+        data = request.get_json()
+        texts = data.get('texts')
+        key = data.get('key', '')
+        operation = data.get('operation', 'encrypt')
+        kdf = data.get('kdf', 'pbkdf2')
+        kdf = None if kdf == 'none' else kdf
+        cost = int(data['kdf_cost']) if data.get('kdf_cost') else None
+
+        if not isinstance(texts, list) or not texts or not key:
+            return jsonify({'success': False, 'message': 'texts 必须是非空数组，密钥不能为空'}), 400
+        if len(texts) > CIPHER_BATCH_MAX_ITEMS:
+            return jsonify({'success': False, 'message': f'单次最多处理 {CIPHER_BATCH_MAX_ITEMS} 条消息'}), 400
+        if not all(isinstance(text, str) for text in texts):
+            return jsonify({'success': False, 'message': 'texts 中的每一项都必须是字符串'}), 400
+
+        started = time.perf_counter()
+        if algorithm == 'aes':
+            key_size = int(data.get('key_size', 32))
+            if operation == 'encrypt':
+                results = aes_cipher.encrypt_batch(texts, key, key_size, kdf, cost)
+            else:
+                results = aes_cipher.decrypt_batch(texts, key, key_size)
+        else:
+            if operation == 'encrypt':
+                results = des_cipher.encrypt_batch(texts, key, kdf, cost)
+            else:
+                results = des_cipher.decrypt_batch(texts, key)
+        elapsed = time.perf_counter() - started
+
+        return jsonify({
+            'success': True,
+            'results': results,
+            'count': len(results),
+            'algorithm': algorithm.upper(),
+            'elapsed': round(elapsed, 4),
+            'messages_per_second': round(len(results) / elapsed, 1) if elapsed > 0 else None
+        }), 200
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
 
@@ -307,19 +864,37 @@ def rsa_generate_api():
         data = request.get_json()
         key_size = int(data.get('key_size', 2048))
         
-        keypair = RSAKeyPair(key_size)
+        # 优先从预生成池取出，池中没有时同步生成
+        key, pooled = rsa_pool.acquire(key_size)
+        keypair = RSAKeyPair(key_size, key=key)
         
         return jsonify({
             'success': True,
             'public_key': keypair.get_public_key_pem(),
             'private_key': keypair.get_private_key_pem(),
-            'key_size': key_size
+            'key_size': key_size,
+            'pooled': pooled
         }), 200
     
     except Exception as e:
         return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
 
 
+@app.route('/api/modern/rsa/pool', methods=['GET'])
+@login_required
+def rsa_pool_metrics_api():
+    """RSA密钥对预生成池的库存与指标"""
+    try:
+        return jsonify({
+            'success': True,
+            'running': rsa_pool.is_alive(),
+            'pool': {str(size): stats for size, stats in rsa_pool.get_metrics().items()}
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'查询失败: {str(e)}'}), 500
+
+
 @app.route('/api/modern/rsa/encrypt', methods=['POST'])
 @login_required
 def rsa_encrypt_api():
@@ -370,52 +945,437 @@ def rsa_decrypt_api():
         return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
 
 
-# ===================== 图像分存API =====================
-
-@app.route('/api/image/split', methods=['POST'])
+@app.route('/api/modern/rsa/sign', methods=['POST'])
 @login_required
-def image_split_api():
-    """分割图像为多个分片（支持PNG、JPG、BMP等多种格式）"""
+def rsa_sign_api():
+    """RSA签名（PKCS#1 v1.5 + SHA-256）"""
     try:
-        from image_share.shamir_share import ShamirShare
-        import time
-        
-        if 'image' not in request.files:
-            return jsonify({'success': False, 'message': '未上传图像'}), 400
-        
-        file = request.files['image']
-        threshold = int(request.form.get('threshold', SHAMIR_THRESHOLD))
-        shares = int(request.form.get('shares', SHAMIR_SHARES))
-        
-        if not file or file.filename == '':
-            return jsonify({'success': False, 'message': '文件名为空'}), 400
+        from crypto_modern.rsa_cipher import sign
         
-        if threshold > shares or threshold < 2:
-            return jsonify({'success': False, 'message': '无效的阈值参数（k必须≤n且≥2）'}), 400
-        
-        # 保存上传的图像
-        timestamp = int(time.time())
-        filename = f"{timestamp}_{file.filename}"
-        image_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(image_path)
+        data = request.get_json()
+        text = data.get('text', '')
+        private_key = data.get('private_key', '')
         
-        # 创建Shamir分片对象并分割图像
-        shamir = ShamirShare(threshold=threshold, shares=shares)
-        shares_dir = os.path.join(OUTPUT_FOLDER, f"shares_{timestamp}")
-        os.makedirs(shares_dir, exist_ok=True)
+        if not text or not private_key:
+            return jsonify({'success': False, 'message': '消息和私钥都不能为空'}), 400
         
-        # split_image会自动保存metadata.json
-        metadata = shamir.split_image(image_path, shares_dir)
+        signature = sign(text, private_key)
+        
+        return jsonify({
+            'success': True,
+            'signature': signature,
+            'algorithm': 'RSA-SHA256'
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/modern/rsa/verify', methods=['POST'])
+@login_required
+def rsa_verify_api():
+    """验证RSA签名"""
+    try:
+        from crypto_modern.rsa_cipher import verify
+        
+        data = request.get_json()
+        text = data.get('text', '')
+        signature = data.get('signature', '')
+        public_key = data.get('public_key', '')
+        
+        if not text or not signature or not public_key:
+            return jsonify({'success': False, 'message': '消息、签名和公钥都不能为空'}), 400
+        
+        valid = verify(text, signature, public_key)
+        
+        return jsonify({
+            'success': True,
+            'valid': valid
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/modern/rsa/verify/batch', methods=['POST'])
+@login_required
+def rsa_verify_batch_api():
+    """
+    批量验签：items 为 [{message, signature, public_key}]，
+    条目缺少 public_key 时使用请求级的 public_key；返回逐条结果和吞吐量
+    """
+    try:
+        from crypto_modern.rsa_cipher import verify_batch
+        
+        data = request.get_json()
+        items = data.get('items')
+        default_key = data.get('public_key')
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({'success': False, 'message': 'items 必须是非空数组'}), 400
+        if len(items) > RSA_VERIFY_MAX_ITEMS:
+            return jsonify({'success': False, 'message': f'单次最多验证 {RSA_VERIFY_MAX_ITEMS} 个签名'}), 400
+        if not all(isinstance(item, dict) for item in items):
+            return jsonify({'success': False, 'message': 'items 中的每一项都必须是JSON对象'}), 400
+        if default_key:
+            items = [item if item.get('public_key') else dict(item, public_key=default_key)
+                     for item in items]
+        
+        result = verify_batch(items, workers=RSA_VERIFY_WORKERS)
+        
+        return jsonify({'success': True, **result}), 200
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/modern/rsa/envelope/encrypt', methods=['POST'])
+@login_required
+def rsa_envelope_encrypt_api():
+    """数字信封加密：随机AES-256-GCM密钥加密正文，每个接收者公钥各包装一次密钥"""
+    try:
+        from crypto_modern.envelope import encrypt
+        
+        data = request.get_json()
+        text = data.get('text', '')
+        public_keys = data.get('public_keys') or ([data['public_key']] if data.get('public_key') else [])
+        
+        if not text or not public_keys:
+            return jsonify({'success': False, 'message': '文本和接收者公钥都不能为空'}), 400
+        
+        result = encrypt(text, public_keys)
+        
+        return jsonify({
+            'success': True,
+            'result': result,
+            'recipients': len(public_keys)
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/modern/rsa/envelope/decrypt', methods=['POST'])
+@login_required
+def rsa_envelope_decrypt_api():
+    """数字信封解密"""
+    try:
+        from crypto_modern.envelope import decrypt
+        
+        data = request.get_json()
+        text = data.get('text', '')
+        private_key = data.get('private_key', '')
+        
+        if not text or not private_key:
+            return jsonify({'success': False, 'message': '信封和私钥都不能为空'}), 400
+        
+        result = decrypt(text, private_key)
+        
+        return jsonify({
+            'success': True,
+            'result': result
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/modern/rsa/envelope/file', methods=['POST'])
+@login_required
+def rsa_envelope_file_api():
+    """
+    数字信封文件模式：上传文件（multipart 的 file 字段），
+    加密时表单可包含多个 public_key 字段，解密时提供 private_key，结果流式返回
+    """
+    try:
+        from werkzeug.utils import secure_filename
+        from crypto_modern.envelope import seal_stream, open_stream
+        
+        operation = request.form.get('operation', 'encrypt')
+        if 'file' not in request.files:
+            return jsonify({'success': False, 'message': '请上传文件'}), 400
+        upload = request.files['file']
+        name = secure_filename(upload.filename) or 'input.bin'
+        
+        if operation == 'encrypt':
+            public_keys = request.form.getlist('public_key')
+            if not public_keys:
+                return jsonify({'success': False, 'message': '接收者公钥不能为空'}), 400
+            source = _detach_upload(upload)
+            output = seal_stream(source, public_keys, workers=AES_FILE_WORKERS)
+            download = f'{name}.env'
+        else:
+            private_key = request.form.get('private_key', '')
+            if not private_key:
+                return jsonify({'success': False, 'message': '私钥不能为空'}), 400
+            source = _detach_upload(upload)
+            output = open_stream(source, private_key, workers=AES_FILE_WORKERS)
+            download = name[:-4] if name.endswith('.env') and len(name) > 4 else f'{name}.dec'
+        
+        # 先处理第一块，密钥或格式错误时还能返回JSON错误
+        try:
+            first = next(output)
+        except StopIteration:
+            first = b''
+        except Exception:
+            source.close()
+            raise
+        
+        def generate():
+            # aes_stream 并行时输出 bytearray，WSGI 要求 bytes
+            try:
+                yield bytes(first)
+                for chunk in output:
+                    yield bytes(chunk)
+            finally:
+                source.close()
+        
+        return Response(stream_with_context(generate()), mimetype='application/octet-stream',
+                        headers={'Content-Disposition': f'attachment; filename={download}'})
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/modern/ecc/generate', methods=['POST'])
+@login_required
+def ecc_generate_api():
+    """生成椭圆曲线密钥对（ed25519 或 p256）"""
+    try:
+        from crypto_modern.ecc_cipher import ECCKeyPair
+        
+        data = request.get_json(silent=True) or {}
+        curve = data.get('curve', 'ed25519')
+        
+        keypair = ECCKeyPair(curve)
+        
+        return jsonify({
+            'success': True,
+            'public_key': keypair.get_public_key_pem(),
+            'private_key': keypair.get_private_key_pem(),
+            'curve': curve
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/modern/ecc/sign', methods=['POST'])
+@login_required
+def ecc_sign_api():
+    """ECC签名（Ed25519 / ECDSA P-256）"""
+    try:
+        from crypto_modern.ecc_cipher import sign
+        
+        data = request.get_json()
+        text = data.get('text', '')
+        private_key = data.get('private_key', '')
+        
+        if not text or not private_key:
+            return jsonify({'success': False, 'message': '消息和私钥都不能为空'}), 400
+        
+        return jsonify({
+            'success': True,
+            'signature': sign(text, private_key)
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/modern/ecc/verify', methods=['POST'])
+@login_required
+def ecc_verify_api():
+    """验证ECC签名"""
+    try:
+        from crypto_modern.ecc_cipher import verify
+        
+        data = request.get_json()
+        text = data.get('text', '')
+        signature = data.get('signature', '')
+        public_key = data.get('public_key', '')
+        
+        if not text or not signature or not public_key:
+            return jsonify({'success': False, 'message': '消息、签名和公钥都不能为空'}), 400
+        
+        return jsonify({
+            'success': True,
+            'valid': verify(text, signature, public_key)
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/modern/ecc/encrypt', methods=['POST'])
+@login_required
+def ecc_encrypt_api():
+    """ECIES加密（P-256 公钥）"""
+    try:
+        from crypto_modern.ecc_cipher import encrypt
+        
+        data = request.get_json()
+        text = data.get('text', '')
+        public_key = data.get('public_key', '')
+        
+        if not text or not public_key:
+            return jsonify({'success': False, 'message': '文本和公钥都不能为空'}), 400
+        
+        return jsonify({
+            'success': True,
+            'result': encrypt(text, public_key)
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+@app.route('/api/modern/ecc/decrypt', methods=['POST'])
+@login_required
+def ecc_decrypt_api():
+    """ECIES解密（P-256 私钥）"""
+    try:
+        from crypto_modern.ecc_cipher import decrypt
+        
+        data = request.get_json()
+        text = data.get('text', '')
+        private_key = data.get('private_key', '')
+        
+        if not text or not private_key:
+            return jsonify({'success': False, 'message': '密文和私钥都不能为空'}), 400
+        
+        return jsonify({
+            'success': True,
+            'result': decrypt(text, private_key)
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+# ===================== 批量处理API =====================
+
+@app.route('/api/batch', methods=['POST'])
+@login_required
+def batch_api():
+    """在一个请求中执行多个加解密/哈希操作，逐条返回结果或错误"""
+    try:
+        from batch.dispatcher import run_batch
+
+        data = request.get_json(silent=True) or {}
+        items = data.get('items')
+        if not isinstance(items, list) or not items:
+            return jsonify({'success': False, 'message': 'items 必须是非空数组'}), 400
+        if len(items) > BATCH_MAX_ITEMS:
+            return jsonify({'success': False, 'message': f'单次最多处理 {BATCH_MAX_ITEMS} 个条目'}), 400
+
+        batch = run_batch(items, parallel=bool(data.get('parallel', False)), workers=BATCH_WORKERS)
+
+        return jsonify({'success': True, **batch}), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'处理失败: {str(e)}'}), 500
+
+
+# ===================== 图像分存API =====================
+
+@app.route('/api/image/split', methods=['POST'])
+@login_required
+def image_split_api():
+    """分割图像为多个分片（支持PNG、JPG、BMP等多种格式）"""
+    try:
+        from image_share.shamir_share import ShamirShare
+        from werkzeug.utils import secure_filename
+        import time
+        import shutil
+        
+        if 'image' not in request.files:
+            return jsonify({'success': False, 'message': '未上传图像'}), 400
+        
+        file = request.files['image']
+        threshold = int(request.form.get('threshold', SHAMIR_THRESHOLD))
+        shares = int(request.form.get('shares', SHAMIR_SHARES))
+        
+        if not file or file.filename == '':
+            return jsonify({'success': False, 'message': '文件名为空'}), 400
+        
+        if threshold > shares or threshold < 2:
+            return jsonify({'success': False, 'message': '无效的阈值参数（k必须≤n且≥2）'}), 400
+        
+        # 每个任务使用唯一ID，先在私有暂存目录中生成全部文件，再提交到存储
+        timestamp = int(time.time())
+        job_id = new_job_id()
+        storage = get_storage()
+        staging_dir = storage.make_staging_dir()
+        
+        try:
+            upload_name = secure_filename(file.filename) or 'image'
+            image_path = os.path.join(staging_dir, upload_name)
+            file.save(image_path)
+            original_size = os.path.getsize(image_path)
+            
+            # 只读图像头部预测开销，超出上限的任务在解码前拒绝
+            estimate, reason = _admit_job('split', read_image_header(image_path), threshold, shares)
+            if reason:
+                return jsonify({'success': False, 'message': f'任务过大：{reason}',
+                                'estimate': estimate}), 413
+            
+            # 创建Shamir分片对象并分割图像
+            shamir = ShamirShare(threshold=threshold, shares=shares)
+            shares_dir = os.path.join(staging_dir, 'shares')
+            
+            # split_image会自动保存metadata.json
+            metadata = shamir.split_image(image_path, shares_dir)
+            
+            user_id = session['user_id']
+            locations = {}
+            for sf in metadata['share_files']:
+                key = job_key(AREA_OUTPUTS, job_id, sf['filename'])
+                _store_file(key, os.path.join(shares_dir, sf['filename']), user_id)
+                locations[sf['index']] = key
+            _store_file(job_key(AREA_OUTPUTS, job_id, 'metadata.json'),
+                        os.path.join(shares_dir, 'metadata.json'), user_id)
+            _store_file(job_key(AREA_UPLOADS, job_id, upload_name), image_path, user_id)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        
+        # 登记到分片目录表，之后的查询无需扫描outputs目录
+        share_catalog.register_job(
+            job_id, session['user_id'], metadata, job_prefix(AREA_OUTPUTS, job_id),
+            original_filename=file.filename,
+            original_size=original_size,
+            locations=locations
+        )
         
         # 生成分片文件列表
-        share_files = sorted([
-            f for f in os.listdir(shares_dir) 
-            if f.startswith('share_') and f.endswith('.bin')
-        ], key=lambda x: int(x.split('_')[1].split('.')[0]))
+        share_files = [sf['filename'] for sf in metadata['share_files']]
         
         return jsonify({
             'success': True,
             'message': f'✅ 成功生成{shares}个分片，其中任意{threshold}个可恢复原图！系统已自动保存metadata.json',
+            'job_id': job_id,
             'timestamp': timestamp,
             'threshold': threshold,
             'total_shares': shares,
@@ -476,10 +1436,17 @@ def image_recover_api():
                     'message': '❌ 缺失metadata.json文件！恢复需要此文件以获取图像参数。请确保上传了metadata.json文件。'
                 }), 400
             
+            # 按元数据中的尺寸预测开销，超出上限时拒绝
+            with open(metadata_file, 'r') as mf:
+                meta = json.load(mf)
+            header = {'mode': meta['mode'], 'width': meta['size'][0], 'height': meta['size'][1]}
+            estimate, reason = _admit_job('recover', header, meta['threshold'], len(share_files))
+            if reason:
+                return jsonify({'success': False, 'message': f'任务过大：{reason}',
+                                'estimate': estimate}), 413
+            
             # 恢复图像（recover_image_from_shares会自动从metadata.json读取参数）
-            timestamp = int(time.time())
-            output_filename = f"recovered_{timestamp}.png"
-            output_path = os.path.join(OUTPUT_FOLDER, output_filename)
+            output_path = os.path.join(temp_dir, 'recovered.png')
             
             # 调用恢复函数 - 自动加载metadata.json
             recovered_file = recover_image_from_shares(temp_dir, output_path)
@@ -497,11 +1464,14 @@ def image_recover_api():
                 with open(metadata_file, 'r') as mf:
                     metadata_info = json.load(mf)
             
+            output_key = job_key(AREA_OUTPUTS, new_job_id(), 'recovered.png')
+            _store_file(output_key, recovered_file, session['user_id'])
+            
             return jsonify({
                 'success': True,
                 'message': '✅ 图像恢复成功！',
-                'output_file': output_filename,
-                'download_url': f'/outputs/{output_filename}',
+                'output_file': output_key,
+                'download_url': _output_url(output_key),
                 'share_count': len(share_files),
                 'metadata': metadata_info,
                 'note': '系统已从上传的分片自动恢复出原始图像'
@@ -520,6 +1490,183 @@ def image_recover_api():
         return jsonify({'success': False, 'message': f'❌ 恢复失败: {str(e)}'}), 500
 
 
+@app.route('/api/image/estimate', methods=['POST'])
+@login_required
+def image_estimate_api():
+    """
+    预测分割/恢复任务的输出字节数、峰值内存和耗时
+    
+    可上传图像（只读取头部，不解码），或直接提供 width、height、mode
+    """
+    try:
+        params = request.form if request.files or request.form else (request.get_json(silent=True) or {})
+        operation = params.get('operation', 'split')
+        threshold = int(params.get('threshold', SHAMIR_THRESHOLD))
+        shares = int(params.get('shares', SHAMIR_SHARES))
+        
+        if operation not in ('split', 'recover'):
+            return jsonify({'success': False, 'message': '操作类型必须是 split 或 recover'}), 400
+        if threshold > shares or threshold < 2:
+            return jsonify({'success': False, 'message': '无效的阈值参数（k必须≤n且≥2）'}), 400
+        
+        if 'image' in request.files:
+            header = read_image_header(request.files['image'].stream)
+        elif params.get('width') and params.get('height'):
+            header = {'mode': params.get('mode', 'RGB'),
+                      'width': int(params['width']), 'height': int(params['height'])}
+        else:
+            return jsonify({'success': False, 'message': '请上传图像或提供 width 和 height'}), 400
+        
+        estimate, reason = _admit_job(operation, header, threshold, shares)
+        
+        return jsonify({
+            'success': True,
+            'image': header,
+            'threshold': threshold,
+            'shares': shares,
+            'estimate': estimate,
+            'admitted': reason is None,
+            'reject_reason': reason
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'❌ 参数错误：{str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'预测失败: {str(e)}'}), 500
+
+
+@app.route('/api/image/jobs', methods=['GET'])
+@login_required
+def image_jobs_api():
+    """列出当前用户的分割任务（查询分片目录表）"""
+    try:
+        limit = min(int(request.args.get('limit', 50)), 500)
+        offset = int(request.args.get('offset', 0))
+        
+        jobs = share_catalog.list_jobs(session['user_id'], limit, offset)
+        
+        return jsonify({
+            'success': True,
+            'jobs': jobs,
+            'count': len(jobs)
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'查询失败: {str(e)}'}), 500
+
+
+@app.route('/api/image/jobs/<job_id>', methods=['GET'])
+@login_required
+def image_job_detail_api(job_id):
+    """获取单个分割任务的详细信息（含分片位置、大小和摘要）"""
+    try:
+        job = share_catalog.get_job(job_id, session['user_id'])
+        if job is None:
+            return jsonify({'success': False, 'message': '任务不存在'}), 404
+        
+        return jsonify({'success': True, 'job': job}), 200
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'查询失败: {str(e)}'}), 500
+
+
+@app.route('/api/image/jobs/<job_id>/shares/<int:share_index>', methods=['GET'])
+@login_required
+def image_job_share_download(job_id, share_index):
+    """按目录表记录的位置下载单个分片"""
+    try:
+        job = share_catalog.get_job(job_id, session['user_id'])
+        if job is None:
+            return jsonify({'success': False, 'message': '任务不存在'}), 404
+        
+        storage = get_storage()
+        for sf in job['share_files']:
+            if sf['share_index'] == share_index:
+                if not storage.exists(sf['location']):
+                    return jsonify({'success': False, 'message': '分片文件已不存在'}), 404
+                _touch_key(sf['location'])
+                return send_file(storage.open(sf['location']), mimetype='application/octet-stream',
+                                 as_attachment=True, download_name=sf['filename'])
+        
+        return jsonify({'success': False, 'message': '分片不存在'}), 404
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'下载失败: {str(e)}'}), 500
+
+
+@app.route('/api/image/jobs/<job_id>/recover', methods=['POST'])
+@login_required
+def image_job_recover_api(job_id):
+    """直接使用服务器上已登记的分片恢复图像"""
+    try:
+        from image_share.recover import recover_image_from_shares
+        import tempfile
+        import shutil
+        
+        job = share_catalog.get_job(job_id, session['user_id'])
+        if job is None:
+            return jsonify({'success': False, 'message': '任务不存在'}), 404
+        
+        header = {'mode': job['image_mode'], 'width': job['image_size'][0], 'height': job['image_size'][1]}
+        estimate, reason = _admit_job('recover', header, job['threshold'], job['threshold'])
+        if reason:
+            return jsonify({'success': False, 'message': f'任务过大：{reason}',
+                            'estimate': estimate}), 413
+        
+        storage = get_storage()
+        available = [sf for sf in job['share_files'] if storage.exists(sf['location'])]
+        
+        scratch_dir = tempfile.mkdtemp()
+        try:
+            # 本地后端直接返回真实路径；对象存储后端只下载恢复所需的k个分片
+            metadata_path = storage.as_local_file(f"{job['share_dir']}/metadata.json", scratch_dir)
+            share_paths = {
+                sf['share_index']: storage.as_local_file(sf['location'], scratch_dir)
+                for sf in available[:job['threshold']]
+            }
+            
+            output_path = os.path.join(scratch_dir, 'recovered.png')
+            recover_image_from_shares(os.path.dirname(metadata_path), output_path, share_paths)
+            
+            output_key = job_key(AREA_OUTPUTS, new_job_id(), 'recovered.png')
+            _store_file(output_key, output_path, session['user_id'])
+            usage_ledger.touch_job(job_id)
+        finally:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+        
+        return jsonify({
+            'success': True,
+            'message': '✅ 图像恢复成功！',
+            'output_file': output_key,
+            'download_url': _output_url(output_key),
+            'share_count': len(share_paths)
+        }), 200
+    
+    except FileNotFoundError as e:
+        return jsonify({'success': False, 'message': f'❌ 文件错误：{str(e)}'}), 400
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'❌ 参数错误：{str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'❌ 恢复失败: {str(e)}'}), 500
+
+
+# ===================== 存储管理API =====================
+
+@app.route('/api/storage/metrics', methods=['GET'])
+@login_required
+def storage_metrics_api():
+    """存储用量与清理指标（全局用量、当前用户用量、已回收字节等）"""
+    try:
+        metrics = janitor.get_metrics()
+        metrics['user_usage'] = usage_ledger.usage(session['user_id'])
+        metrics['janitor_running'] = janitor.is_alive()
+        
+        return jsonify({'success': True, 'metrics': metrics}), 200
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'查询失败: {str(e)}'}), 500
+
+
 # ===================== 错误处理 =====================
 
 @app.errorhandler(404)
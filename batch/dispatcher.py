@@ -0,0 +1,244 @@
+"""
+批量调度
+按算法名分派批量请求中的各个条目，每个条目单独返回结果或错误。
+- 口令相同的 AES/DES 条目合并后调用 encrypt_batch/decrypt_batch，共用一次密钥派生；
+- RSA 通过 rsa_cipher 的进程级密钥缓存，同一 PEM 只解析一次；
+- 开启并行时开销较大的条目在线程池中执行
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from crypto_classic import caesar, substitution, playfair, vigenere
+from crypto_modern import aes_cipher, des_cipher, md5_hash, rsa_cipher
+
+# 文本超过该长度（字符数）的条目视为开销较大
+LARGE_TEXT = 64 * 1024
+
+# 开销较大的操作（开启并行时进入线程池）
+EXPENSIVE_ALGORITHMS = {'rsa'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _require(params: dict, name: str):
+    value = params.get(name)
+    if not value:
+        raise ValueError(f"缺少参数: {name}")
+    return value
+
+
+def _caesar(operation, text, params):
+    shift = int(params.get('shift', 3))
+    func = caesar.encrypt if operation == 'encrypt' else caesar.decrypt
+    return {'result': func(text, shift), 'shift': shift}
+
+
+def _substitution(operation, text, params):
+    key = params.get('key') or substitution.generate_key()
+    func = substitution.encrypt if operation == 'encrypt' else substitution.decrypt
+    return {'result': func(text, key), 'key': key}
+
+
+def _playfair(operation, text, params):
+    key = _require(params, 'key')
+    func = playfair.encrypt if operation == 'encrypt' else playfair.decrypt
+    return {'result': func(text, key)}
+
+
+def _vigenere(operation, text, params):
+    key = _require(params, 'key')
+    func = vigenere.encrypt if operation == 'encrypt' else vigenere.decrypt
+    return {'result': func(text, key)}
+
+
+def _md5(operation, text, params):
+    return {'hash': md5_hash.hash_text(text)}
+
+
+def _des(operation, text, params):
+    key = _require(params, 'key')
+    func = des_cipher.encrypt if operation == 'encrypt' else des_cipher.decrypt
+    return {'result': func(text, key)}
+
+
+def _aes(operation, text, params):
+    key = _require(params, 'key')
+    key_size = int(params.get('key_size', 32))
+    func = aes_cipher.encrypt if operation == 'encrypt' else aes_cipher.decrypt
+    return {'result': func(text, key, key_size), 'key_size': key_size}
+
+
+def _rsa(operation, text, params):
+    if operation == 'encrypt':
+        return {'result': rsa_cipher.encrypt(text, _require(params, 'public_key'))}
+    return {'result': rsa_cipher.decrypt(text, _require(params, 'private_key'))}
+
+
+# 算法名 -> (处理函数, 支持的操作)
+HANDLERS = {
+    'caesar': (_caesar, ('encrypt', 'decrypt')),
+    'substitution': (_substitution, ('encrypt', 'decrypt')),
+    'playfair': (_playfair, ('encrypt', 'decrypt')),
+    'vigenere': (_vigenere, ('encrypt', 'decrypt')),
+    'md5': (_md5, ('hash',)),
+    'des': (_des, ('encrypt', 'decrypt')),
+    'aes': (_aes, ('encrypt', 'decrypt')),
+    'rsa': (_rsa, ('encrypt', 'decrypt')),
+}
+
+# 可以按口令合并批量处理的算法
+GROUPED_ALGORITHMS = {'aes': aes_cipher, 'des': des_cipher}
+
+
+def _parse_item(item) -> tuple:
+    """
+    校验条目
+
+    Returns:
+        (algorithm, operation, text, params)
+
+    Raises:
+        ValueError: 条目格式不正确
+    """
+    if not isinstance(item, dict):
+        raise ValueError("条目必须是JSON对象")
+    algorithm = item.get('algorithm')
+    if algorithm not in HANDLERS:
+        raise ValueError(f"不支持的算法: {algorithm}")
+    operations = HANDLERS[algorithm][1]
+    operation = item.get('operation', operations[0])
+    if operation not in operations:
+        raise ValueError(f"{algorithm} 不支持的操作: {operation}")
+    text = item.get('text', '')
+    if not text:
+        raise ValueError("文本不能为空")
+    return algorithm, operation, text, item.get('params') or {}
+
+
+def _failure(error: Exception) -> dict:
+    return {'success': False, 'message': f'处理失败: {str(error)}'}
+
+
+def run_item(item: dict) -> dict:
+    """
+    执行单个条目
+
+    Returns:
+        {'success': True, ...结果字段} 或 {'success': False, 'message': 错误信息}
+    """
+    try:
+        algorithm, operation, text, params = _parse_item(item)
+        return {'success': True, **HANDLERS[algorithm][0](operation, text, params)}
+    except Exception as e:
+        return _failure(e)
+
+
+def group_key(item) -> tuple:
+    """
+    可以合并处理的 AES/DES 条目返回分组键 (algorithm, operation, 口令[, key_size])，
+    其他条目（包括参数不完整、需要逐条报错的条目）返回None
+    """
+    try:
+        algorithm, operation, text, params = _parse_item(item)
+    except ValueError:
+        return None
+    key = params.get('key')
+    if algorithm not in GROUPED_ALGORITHMS or not isinstance(text, str):
+        return None
+    if not key or not isinstance(key, str):
+        return None
+    if algorithm == 'des':
+        return algorithm, operation, key
+    try:
+        return algorithm, operation, key, int(params.get('key_size', 32))
+    except (TypeError, ValueError):
+        return None
+
+
+def run_group(key: tuple, texts: list) -> list:
+    """
+    用 encrypt_batch/decrypt_batch 一次处理分组键相同的条目
+
+    Args:
+        key: group_key 返回的分组键
+        texts: 各条目的文本
+
+    Returns:
+        与 texts 一一对应的结果（格式同 run_item）
+    """
+    algorithm, operation, password, *key_size = key
+    module = GROUPED_ALGORITHMS[algorithm]
+    if operation == 'encrypt':
+        outputs = module.encrypt_batch(texts, password, *key_size)
+    else:
+        outputs = module.decrypt_batch(texts, password, *key_size, return_exceptions=True)
+    extra = {'key_size': key_size[0]} if key_size else {}
+    return [_failure(output) if isinstance(output, Exception)
+            else {'success': True, 'result': output, **extra} for output in outputs]
+
+
+def is_expensive(item: dict) -> bool:
+    """条目是否值得放入线程池执行"""
+    if not isinstance(item, dict):
+        return False
+    return (item.get('algorithm') in EXPENSIVE_ALGORITHMS
+            or len(str(item.get('text', ''))) > LARGE_TEXT)
+
+
+def _get_executor(workers: int) -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch')
+        return _executor
+
+
+def run_batch(items: list, parallel: bool = False, workers: int = 4) -> dict:
+    """
+    执行一批操作
+
+    Args:
+        items: 条目列表，每项包含 algorithm、operation、text、params
+        parallel: 是否把开销较大的条目放入线程池并行执行
+        workers: 线程池大小（进程内共享，首次创建时生效）
+
+    Returns:
+        {'results': 与 items 一一对应的结果列表, 'succeeded': 成功数, 'failed': 失败数,
+         'elapsed': 耗时}
+    """
+    started = time.perf_counter()
+    results = [None] * len(items)
+    futures = {}
+    groups = {}
+
+    for index, item in enumerate(items):
+        key = group_key(item)
+        if key is not None:
+            groups.setdefault(key, []).append(index)
+        elif parallel and is_expensive(item):
+            futures[index] = _get_executor(workers).submit(run_item, item)
+        else:
+            results[index] = run_item(item)
+
+    for key, indices in groups.items():
+        try:
+            outputs = run_group(key, [items[index]['text'] for index in indices])
+        except Exception:
+            # 整组失败（如 key_size 不合法）时逐条执行，让每个条目得到自己的错误信息
+            outputs = [run_item(items[index]) for index in indices]
+        for index, output in zip(indices, outputs):
+            results[index] = output
+    for index, future in futures.items():
+        results[index] = future.result()
+
+    for index, result in enumerate(results):
+        result['index'] = index
+    succeeded = sum(1 for result in results if result['success'])
+    return {
+        'results': results,
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'elapsed': round(time.perf_counter() - started, 4)
+    }
@@ -18,14 +18,61 @@ UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
 OUTPUT_FOLDER = os.path.join(os.path.dirname(__file__), 'outputs')
 MAX_CONTENT_LENGTH = 200 * 1024 * 1024  # 200MB
 
+# 存储配置
+# 'local'：本地文件系统（键直接映射到 STORAGE_ROOT 下的 uploads/、outputs/）
+# 'object'：本地对象存储模拟（多实例可共享同一个 OBJECT_STORE_ROOT）
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+STORAGE_ROOT = os.path.dirname(os.path.abspath(__file__))
+OBJECT_STORE_ROOT = os.environ.get('OBJECT_STORE_ROOT', os.path.join(STORAGE_ROOT, 'object_store'))
+
+# 存储清理配置（TTL从最后一次访问开始计算，配额单位为字节，None表示不限制）
+JANITOR_ENABLED = True
+JANITOR_INTERVAL = 300           # 清理间隔（秒）
+UPLOAD_TTL = 24 * 3600           # 上传原图保留1天
+OUTPUT_TTL = 7 * 24 * 3600       # 分片及恢复结果保留7天
+STORAGE_QUOTA_BYTES = 20 * 1024 ** 3   # 全局配额 20GB
+USER_QUOTA_BYTES = 2 * 1024 ** 3       # 单用户配额 2GB
+
 # 图像分存配置
 SHAMIR_THRESHOLD = 3  # Shamir方案的阈值
 SHAMIR_SHARES = 5     # 生成的分片数量
 
+# 图像分存准入上限（由 image_share/capacity.py 的开销模型预测，None表示不限制）
+MAX_JOB_OUTPUT_BYTES = 2 * 1024 ** 3     # 单次任务预计输出 2GB
+MAX_JOB_PEAK_MEMORY = 1024 ** 3          # 单次任务预计峰值内存 1GB
+MAX_JOB_SECONDS = 60                     # 单次任务预计耗时 60秒
+
+# 经典密码破解配置
+CRACK_MAX_SECONDS = 30   # 单次破解请求的时间预算上限（秒）
+CRACK_MAX_RESTARTS = 2000   # 单次破解请求的随机重启次数上限
+CRACK_WORKERS = None     # 破解使用的进程数，None表示CPU核数
+PLAYFAIR_CRACK_MAX_SECONDS = 300   # Playfair 后台破解任务的时间预算上限（秒）
+CRACK_MAX_JOBS = 2                 # 同时运行的后台破解任务上限
+
+# 批量处理配置
+BATCH_MAX_ITEMS = 1000   # 单次批量请求的条目上限
+BATCH_WORKERS = 4        # 并行执行开销较大条目的线程数
+
+# 对称加密批量接口配置
+CIPHER_BATCH_MAX_ITEMS = 100000   # /api/modern/aes/batch、/des/batch 单次最多处理的消息数
+
+# AES文件加密配置
+AES_FILE_WORKERS = None   # 文件加解密的并行线程数，None表示CPU核数，1表示单线程
+
 # 密钥配置
 RSA_KEY_SIZE = 2048
 AES_KEY_SIZE = 32  # 256-bit
 
+# RSA密钥对预生成池（后台进程补充到目标库存，库存为空时同步生成）
+RSA_POOL_ENABLED = True
+RSA_POOL_WATERMARKS = {1024: 4, 2048: 8, 4096: 2}   # 各密钥长度的目标库存
+RSA_POOL_LOW_WATERMARK = 0.25                        # 低水位（目标库存的比例）
+RSA_POOL_WORKERS = 1                                 # 生成密钥使用的进程数
+
+# RSA批量验签配置
+RSA_VERIFY_MAX_ITEMS = 50000   # 单次批量验签的条目上限
+RSA_VERIFY_WORKERS = None      # 验签线程数，None表示CPU核数
+
 # 创建必要的文件夹
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
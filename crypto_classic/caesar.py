@@ -1,7 +1,38 @@
 """
 凯撒密码 (Caesar Cipher)
 一种简单的置换密码
+
+加解密基于预编译的 str.maketrans 转换表（ASCII 数据可用 bytes.translate），
+每个位移量的表按 LRU 缓存，暴力破解直接复用全部 26 张表；
+crack 只统计一次字母直方图并对 26 个位移量向量化评分，仅解密排名靠前的候选
 """
+from functools import lru_cache
+import string
+
+from crypto_classic.frequency import letter_histogram, rank_shifts
+
+
+@lru_cache(maxsize=64)
+def _shift_table(shift: int) -> dict:
+    """构建（并缓存）位移量为 shift 的 str.translate 转换表，只替换ASCII字母"""
+    shift = shift % 26
+    lower, upper = string.ascii_lowercase, string.ascii_uppercase
+    return str.maketrans(
+        lower + upper,
+        lower[shift:] + lower[:shift] + upper[shift:] + upper[:shift]
+    )
+
+
+@lru_cache(maxsize=64)
+def _shift_bytes_table(shift: int) -> bytes:
+    """构建（并缓存）位移量为 shift 的 bytes.translate 转换表"""
+    shift = shift % 26
+    lower, upper = string.ascii_lowercase.encode(), string.ascii_uppercase.encode()
+    return bytes.maketrans(
+        lower + upper,
+        lower[shift:] + lower[:shift] + upper[shift:] + upper[:shift]
+    )
+
 
 def encrypt(plaintext: str, shift: int = 3) -> str:
     """
@@ -12,26 +43,9 @@ def encrypt(plaintext: str, shift: int = 3) -> str:
         shift: 位移量（默认3）
     
     Returns:
-        密文
+        密文（非字母字符保持不变）
     """
-    ciphertext = []
-    shift = shift % 26
-    
-    for char in plaintext:
-        if char.isalpha():
-            # 确定字符的范围（大写或小写）
-            if char.isupper():
-                # 大写字母
-                shifted = chr((ord(char) - ord('A') + shift) % 26 + ord('A'))
-            else:
-                # 小写字母
-                shifted = chr((ord(char) - ord('a') + shift) % 26 + ord('a'))
-            ciphertext.append(shifted)
-        else:
-            # 非字母字符保持不变
-            ciphertext.append(char)
-    
-    return ''.join(ciphertext)
+    return plaintext.translate(_shift_table(shift % 26))
 
 
 def decrypt(ciphertext: str, shift: int = 3) -> str:
@@ -49,6 +63,25 @@ def decrypt(ciphertext: str, shift: int = 3) -> str:
     return encrypt(ciphertext, -shift)
 
 
+def encrypt_bytes(data: bytes, shift: int = 3) -> bytes:
+    """
+    对ASCII字节数据进行凯撒加密（非字母字节保持不变）
+    
+    Args:
+        data: ASCII 明文字节
+        shift: 位移量（默认3）
+    
+    Returns:
+        密文字节
+    """
+    return data.translate(_shift_bytes_table(shift % 26))
+
+
+def decrypt_bytes(data: bytes, shift: int = 3) -> bytes:
+    """对ASCII字节数据进行凯撒解密"""
+    return encrypt_bytes(data, -shift)
+
+
 def brute_force_crack(ciphertext: str) -> dict:
     """
     暴力破解凯撒密码（尝试所有可能的位移）
@@ -59,7 +92,30 @@ def brute_force_crack(ciphertext: str) -> dict:
     Returns:
         包含所有可能的明文的字典 {shift: plaintext}
     """
-    results = {}
-    for shift in range(26):
-        results[shift] = decrypt(ciphertext, shift)
-    return results
+    return {shift: ciphertext.translate(_shift_table(-shift % 26)) for shift in range(26)}
+
+
+def crack(ciphertext: str, top: int = 1, method: str = 'chi_squared') -> list:
+    """
+    基于英文字母频率破解凯撒密码
+
+    只统计一次密文直方图，对全部位移量评分后排序，
+    开销为 O(len + 26*26)，且只解密前 top 个候选
+
+    Args:
+        ciphertext: 密文
+        top: 需要给出明文的候选数量
+        method: 评分方法，'chi_squared' 或 'log_likelihood'
+
+    Returns:
+        按可能性排序的全部 26 个候选 [{'shift', 'score', 'plaintext'?}, ...]，
+        只有前 top 个候选带 plaintext
+    """
+    ranked = rank_shifts(letter_histogram(ciphertext), method)
+    candidates = []
+    for rank, (shift, score) in enumerate(ranked):
+        candidate = {'shift': shift, 'score': round(score, 4)}
+        if rank < top:
+            candidate['plaintext'] = decrypt(ciphertext, shift)
+        candidates.append(candidate)
+    return candidates
@@ -0,0 +1,92 @@
+"""
+破解任务管理
+耗时较长的破解（如 Playfair 模拟退火）在后台线程中运行，
+接口立即返回任务ID，客户端轮询任务状态、进度和结果
+"""
+import threading
+import time
+import uuid
+
+
+class CrackJobManager:
+    """内存中的后台破解任务表"""
+
+    def __init__(self, max_running: int = 2, ttl: float = 3600):
+        """
+        Args:
+            max_running: 同时运行的任务上限
+            ttl: 已结束任务的保留时间（秒）
+        """
+        self.max_running = max_running
+        self.ttl = ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, user_id: int, func, **kwargs) -> str:
+        """
+        提交任务，func 需接受 progress 回调参数
+
+        Args:
+            user_id: 提交任务的用户
+            func: 破解函数，如 playfair_cracker.crack
+            **kwargs: 传给 func 的参数
+
+        Returns:
+            任务ID
+
+        Raises:
+            RuntimeError: 运行中的任务已达上限
+        """
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            running = sum(1 for job in self._jobs.values() if job['status'] == 'running')
+            if running >= self.max_running:
+                raise RuntimeError("破解任务繁忙，请稍后再试")
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'user_id': user_id,
+                'status': 'running',
+                'created_at': now,
+                'finished_at': None,
+                'progress': None,
+                'result': None,
+                'error': None
+            }
+
+        def progress(state: dict):
+            with self._lock:
+                self._jobs[job_id]['progress'] = state
+
+        def run():
+            try:
+                result = func(progress=progress, **kwargs)
+                update = {'status': 'done', 'result': result}
+            except Exception as e:
+                update = {'status': 'failed', 'error': str(e)}
+            with self._lock:
+                self._jobs[job_id].update(update, finished_at=time.time())
+
+        threading.Thread(target=run, name=f'crack-{job_id[:8]}', daemon=True).start()
+        return job_id
+
+    def get(self, job_id: str, user_id: int = None) -> dict:
+        """
+        查询任务（指定 user_id 时只返回该用户的任务）
+
+        Returns:
+            任务状态字典，不存在时返回 None
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or (user_id is not None and job['user_id'] != user_id):
+                return None
+            return dict(job)
+
+    def _expire(self, now: float):
+        """删除结束超过 ttl 的任务（调用方持有锁）"""
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished_at'] is not None and now - job['finished_at'] > self.ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
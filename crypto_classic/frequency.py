@@ -0,0 +1,74 @@
+"""
+字母频率分析
+提供英文字母频率表、字母直方图统计，以及对全部 26 个位移量的向量化评分
+（卡方统计量 / 对数似然），供凯撒、维吉尼亚等位移类密码的破解使用
+"""
+import numpy as np
+
+# 英文文本中 A-Z 的出现频率（%）
+ENGLISH_FREQUENCIES = np.array([
+    8.167, 1.492, 2.782, 4.253, 12.702, 2.228, 2.015, 6.094, 6.966, 0.153,
+    0.772, 4.025, 2.406, 6.749, 7.507, 1.929, 0.095, 5.987, 6.327, 9.056,
+    2.758, 0.978, 2.360, 0.150, 1.974, 0.074
+]) / 100.0
+
+_LOG_FREQUENCIES = np.log(ENGLISH_FREQUENCIES)
+
+# _SHIFT_INDEX[s, i]：位移量为 s 时，明文字母 i 对应的密文字母
+_SHIFT_INDEX = (np.arange(26)[None, :] + np.arange(26)[:, None]) % 26
+
+SCORING_METHODS = ('chi_squared', 'log_likelihood')
+
+
+def letter_histogram(text) -> np.ndarray:
+    """
+    统计 A-Z 的出现次数（不区分大小写，忽略其他字符）
+
+    Args:
+        text: 字符串或ASCII字节
+
+    Returns:
+        长度为 26 的计数数组
+    """
+    if isinstance(text, str):
+        text = text.encode('ascii', 'ignore')
+    counts = np.bincount(np.frombuffer(text, dtype=np.uint8), minlength=256)
+    return (counts[65:91] + counts[97:123]).astype(np.int64)
+
+
+def shift_scores(histogram: np.ndarray, method: str = 'chi_squared') -> np.ndarray:
+    """
+    对全部 26 个位移量评分（只依赖直方图，与文本长度无关）
+
+    Args:
+        histogram: 密文字母直方图
+        method: 'chi_squared'（越小越好）或 'log_likelihood'（越大越好）
+
+    Returns:
+        长度为 26 的评分数组，下标为位移量
+    """
+    histogram = np.asarray(histogram, dtype=float)
+    # observed[s, i]：按位移量 s 解密后，明文字母 i 的出现次数
+    observed = histogram[_SHIFT_INDEX]
+    if method == 'chi_squared':
+        expected = histogram.sum() * ENGLISH_FREQUENCIES
+        if not expected.any():
+            return np.zeros(26)
+        return ((observed - expected) ** 2 / expected).sum(axis=1)
+    if method == 'log_likelihood':
+        return observed @ _LOG_FREQUENCIES
+    raise ValueError(f"未知的评分方法: {method}")
+
+
+def rank_shifts(histogram: np.ndarray, method: str = 'chi_squared') -> list:
+    """
+    按评分从好到差排列全部位移量
+
+    Returns:
+        [(位移量, 评分), ...]
+    """
+    scores = shift_scores(histogram, method)
+    order = np.argsort(scores, kind='stable')
+    if method == 'log_likelihood':
+        order = order[::-1]
+    return [(int(shift), float(scores[shift])) for shift in order]
@@ -0,0 +1,240 @@
+"""
+英文 n-gram 统计
+从语料文件（data/english_corpus.txt.gz，公有领域英文文本）向量化统计 1-4 字母组合的频率，
+生成 26^n 项的 log10 概率表，供替换密码、Playfair 等破解算法给候选明文打分。
+
+概率表以 .npy 格式保存在 data/ngrams/ 下（首次使用或语料更新时自动构建），
+加载时使用内存映射（mmap_mode='r'），多个工作进程共享同一份页缓存。
+手动重建：python -m crypto_classic.ngrams --build [语料路径]
+"""
+import gzip
+import os
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+
+from crypto_classic.frequency import ENGLISH_FREQUENCIES
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'english_corpus.txt.gz')
+TABLE_DIR = os.path.join(os.path.dirname(__file__), 'data', 'ngrams')
+
+# 构建的 n-gram 长度：1=字母，2=bigram，3=trigram，4=quadgram
+ORDERS = (1, 2, 3, 4)
+
+# 未出现的 n-gram 按 0.01 次计算，避免 log(0)
+FLOOR_COUNT = 0.01
+
+# 英文文本与均匀随机文本的重合指数参考值
+ENGLISH_IOC = 0.0667
+RANDOM_IOC = 1 / 26
+
+
+def text_to_codes(text) -> np.ndarray:
+    """
+    把文本转换为 0-25 的字母编码数组（不区分大小写，丢弃非字母字符）
+
+    Args:
+        text: 字符串或ASCII字节
+
+    Returns:
+        uint8 数组
+    """
+    if isinstance(text, str):
+        text = text.encode('ascii', 'ignore')
+    raw = np.frombuffer(text, dtype=np.uint8)
+    upper = raw & 0xDF  # ASCII 字母转大写
+    letters = upper[(upper >= 65) & (upper <= 90)]
+    return letters - 65
+
+
+def ngram_indices(codes: np.ndarray, n: int) -> np.ndarray:
+    """
+    计算每个位置起始的 n-gram 在 26^n 表中的下标
+
+    Args:
+        codes: 字母编码数组
+        n: n-gram 长度
+
+    Returns:
+        长度为 len(codes)-n+1 的下标数组
+    """
+    codes = codes.astype(np.int64)
+    count = len(codes) - n + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.int64)
+    index = codes[:count].copy()
+    for offset in range(1, n):
+        index *= 26
+        index += codes[offset:offset + count]
+    return index
+
+
+def ngram_counts(codes: np.ndarray, n: int) -> np.ndarray:
+    """向量化统计 n-gram 次数，返回长度为 26^n 的计数数组"""
+    return np.bincount(ngram_indices(codes, n), minlength=26 ** n)
+
+
+def log_probability_table(codes: np.ndarray, n: int) -> np.ndarray:
+    """
+    向量化统计 n-gram 次数并转换为 log10 概率表
+
+    Returns:
+        长度为 26^n 的 float32 数组
+    """
+    counts = ngram_counts(codes, n).astype(np.float64)
+    total = counts.sum()
+    counts[counts == 0] = FLOOR_COUNT
+    return np.log10(counts / total).astype(np.float32)
+
+
+def load_corpus(path: str = CORPUS_PATH) -> np.ndarray:
+    """读取语料文件（支持 .gz）并转换为字母编码"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        return text_to_codes(f.read())
+
+
+def table_path(n: int, table_dir: str = TABLE_DIR) -> str:
+    return os.path.join(table_dir, f'english_{n}.npy')
+
+
+def build_tables(corpus_path: str = CORPUS_PATH, table_dir: str = TABLE_DIR) -> dict:
+    """
+    从语料构建全部 n-gram 概率表并保存为 .npy（先写临时文件再原子替换）
+
+    Returns:
+        {n: 表文件路径}
+    """
+    codes = load_corpus(corpus_path)
+    os.makedirs(table_dir, exist_ok=True)
+    paths = {}
+    for n in ORDERS:
+        fd, tmp_path = tempfile.mkstemp(dir=table_dir, suffix='.npy.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, log_probability_table(codes, n))
+            os.replace(tmp_path, table_path(n, table_dir))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        paths[n] = table_path(n, table_dir)
+    return paths
+
+
+def _tables_stale(corpus_path: str, table_dir: str) -> bool:
+    """表文件缺失或比语料旧时需要重建"""
+    corpus_mtime = os.path.getmtime(corpus_path)
+    for n in ORDERS:
+        path = table_path(n, table_dir)
+        if not os.path.exists(path) or os.path.getmtime(path) < corpus_mtime:
+            return True
+    return False
+
+
+@lru_cache(maxsize=None)
+def load_table(n: int) -> np.ndarray:
+    """
+    以内存映射方式加载 n-gram log10 概率表（进程内只打开一次，必要时先构建）
+
+    Args:
+        n: n-gram 长度（1-4）
+
+    Returns:
+        只读的 float32 数组
+    """
+    if n not in ORDERS:
+        raise ValueError(f"不支持的 n-gram 长度: {n}")
+    if _tables_stale(CORPUS_PATH, TABLE_DIR):
+        build_tables()
+    # 转为普通 ndarray 视图（仍共享映射内存），避免 memmap 子类在热循环中的额外开销
+    return np.asarray(np.load(table_path(n), mmap_mode='r'))
+
+
+def quadgram_table() -> np.ndarray:
+    """英文 quadgram log10 概率表"""
+    return load_table(4)
+
+
+def preload():
+    """启动时加载全部概率表（在创建工作进程之前调用，子进程共享内存映射）"""
+    for n in ORDERS:
+        load_table(n)
+
+
+def _top_ngrams(counts: np.ndarray, n: int, top: int) -> list:
+    """出现次数最多的 top 个 n-gram"""
+    total = counts.sum()
+    if not total:
+        return []
+    top = min(top, int(np.count_nonzero(counts)))
+    candidates = np.argpartition(counts, -top)[-top:]
+    candidates = candidates[np.argsort(-counts[candidates], kind='stable')]
+    profile = []
+    for index in candidates:
+        letters, value = [], int(index)
+        for _ in range(n):
+            value, code = divmod(value, 26)
+            letters.append(chr(65 + code))
+        profile.append({
+            'ngram': ''.join(reversed(letters)),
+            'count': int(counts[index]),
+            'frequency': round(float(counts[index]) / float(total), 6)
+        })
+    return profile
+
+
+def analyze(text, top: int = 10) -> dict:
+    """
+    统计文本的字母直方图、重合指数和 n-gram 概况
+
+    文本只转换一次为字母编码，之后的统计都是对同一数组的向量化运算，
+    适合多MB的输入
+
+    Args:
+        text: 字符串或ASCII字节
+        top: 每种 n-gram 列出的数量
+
+    Returns:
+        {'letters', 'histogram', 'index_of_coincidence', 'chi_squared', 'bigrams', 'trigrams',
+         'quadgrams', 'quadgram_fitness'}
+    """
+    codes = text_to_codes(text)
+    total = len(codes)
+    histogram = np.bincount(codes, minlength=26).astype(np.int64)
+
+    ioc = float((histogram * (histogram - 1)).sum() / (total * (total - 1))) if total > 1 else 0.0
+    expected = total * ENGLISH_FREQUENCIES
+    chi_squared = float(((histogram - expected) ** 2 / expected).sum()) if total else 0.0
+
+    profile = {}
+    for n, name in ((2, 'bigrams'), (3, 'trigrams'), (4, 'quadgrams')):
+        index = ngram_indices(codes, n)
+        profile[name] = _top_ngrams(np.bincount(index, minlength=26 ** n), n, top)
+
+    # 复用 quadgram 下标计算与英文的拟合度（平均 log10 概率）
+    quad_index = index
+    fitness = float(quadgram_table()[quad_index].mean(dtype=np.float64)) if len(quad_index) else None
+
+    return {
+        'letters': total,
+        'histogram': {chr(65 + i): int(count) for i, count in enumerate(histogram)},
+        'index_of_coincidence': round(ioc, 6),
+        'english_ioc': ENGLISH_IOC,
+        'random_ioc': round(RANDOM_IOC, 6),
+        'chi_squared': round(chi_squared, 4),
+        'quadgram_fitness': None if fitness is None else round(fitness, 4),
+        **profile
+    }
+
+
+if __name__ == '__main__':
+    import sys
+    if '--build' in sys.argv:
+        args = [arg for arg in sys.argv[1:] if arg != '--build']
+        for n, path in build_tables(*args[:1]).items():
+            print(f"  {n}-gram -> {path}")
+        print("n-gram 概率表构建完成")
+    else:
+        print("用法: python -m crypto_classic.ngrams --build [语料路径]")
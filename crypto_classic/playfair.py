@@ -1,39 +1,51 @@
 """
 Playfair密码
 使用5x5矩阵的经典密码算法
+
+每个密钥预先计算 字母->(行,列) 索引和 625 项的双字母加/解密表，
+按 LRU 缓存，加解密时每对字母只需一次查表；长文本走 NumPy 向量化路径
 """
+from functools import lru_cache
+import numpy as np
+
+ALPHABET = "ABCDEFGHIKLMNOPQRSTUVWXYZ"  # 没有J
+
+# 超过该长度（预处理后的字母数）时使用向量化路径
+VECTORIZE_THRESHOLD = 4096
+
+
+# 删除全部非字母ASCII字符的转换表（ASCII文本的快速预处理路径）
+_ASCII_NON_ALPHA = str.maketrans('', '', ''.join(chr(c) for c in range(128) if not chr(c).isalpha()))
+
 
 def _prepare_text(text: str) -> str:
     """
     预处理文本：移除空格和标点，转换为大写，用J替换I
     """
     text = text.upper().replace('J', 'I')
+    if text.isascii():
+        return text.translate(_ASCII_NON_ALPHA)
     text = ''.join(char for char in text if char.isalpha())
     return text
 
 
 def _find_position(matrix: list, char: str) -> tuple:
     """在5x5矩阵中查找字符位置"""
-    for i in range(5):
-        for j in range(5):
-            if matrix[i][j] == char:
-                return (i, j)
-    return None
+    return _matrix_index(matrix).get(char)
 
 
 def _create_matrix(key: str) -> list:
     """
     创建Playfair矩阵
-    
+
     Args:
         key: 密钥
-    
+
     Returns:
         5x5字符矩阵
     """
     key = _prepare_text(key)
-    alphabet = "ABCDEFGHIKLMNOPQRSTUVWXYZ"  # 没有J
-    
+
     # 去除密钥中的重复字母
     seen = set()
     matrix_chars = []
@@ -41,104 +53,227 @@ def _create_matrix(key: str) -> list:
         if char not in seen:
             matrix_chars.append(char)
             seen.add(char)
-    
+
     # 添加字母表中的其他字母
-    for char in alphabet:
+    for char in ALPHABET:
         if char not in seen:
             matrix_chars.append(char)
-    
+
     # 构建5x5矩阵
     matrix = []
     for i in range(5):
         matrix.append(matrix_chars[i*5:(i+1)*5])
-    
+
     return matrix
 
 
 def _encrypt_pair(matrix: list, char1: str, char2: str) -> str:
     """加密一对字母"""
-    row1, col1 = _find_position(matrix, char1)
-    row2, col2 = _find_position(matrix, char2)
-    
-    if row1 == row2:
-        # 同行：向右循环移动
-        return matrix[row1][(col1 + 1) % 5] + matrix[row2][(col2 + 1) % 5]
-    elif col1 == col2:
-        # 同列：向下循环移动
-        return matrix[(row1 + 1) % 5][col1] + matrix[(row2 + 1) % 5][col2]
-    else:
-        # 矩形：交换列
-        return matrix[row1][col2] + matrix[row2][col1]
+    return _pair_rule(matrix, _matrix_index(matrix), char1, char2, 1)
 
 
 def _decrypt_pair(matrix: list, char1: str, char2: str) -> str:
     """解密一对字母"""
-    row1, col1 = _find_position(matrix, char1)
-    row2, col2 = _find_position(matrix, char2)
-    
+    return _pair_rule(matrix, _matrix_index(matrix), char1, char2, -1)
+
+
+def _pair_rule(matrix: list, index: dict, char1: str, char2: str, step: int) -> str:
+    """按Playfair规则变换一对字母（step=1 加密，step=-1 解密）"""
+    row1, col1 = index[char1]
+    row2, col2 = index[char2]
+
     if row1 == row2:
-        # 同行：向左循环移动
-        return matrix[row1][(col1 - 1) % 5] + matrix[row2][(col2 - 1) % 5]
+        # 同行：加密向右、解密向左循环移动
+        return matrix[row1][(col1 + step) % 5] + matrix[row2][(col2 + step) % 5]
     elif col1 == col2:
-        # 同列：向上循环移动
-        return matrix[(row1 - 1) % 5][col1] + matrix[(row2 - 1) % 5][col2]
+        # 同列：加密向下、解密向上循环移动
+        return matrix[(row1 + step) % 5][col1] + matrix[(row2 + step) % 5][col2]
     else:
         # 矩形：交换列
         return matrix[row1][col2] + matrix[row2][col1]
 
 
-def encrypt(plaintext: str, key: str) -> str:
+def _matrix_index(matrix: list) -> dict:
+    """矩阵的 字母->(行,列) 索引"""
+    index = {}
+    for i in range(5):
+        for j in range(5):
+            index[matrix[i][j]] = (i, j)
+    return index
+
+
+@lru_cache(maxsize=256)
+def _key_tables(prepared_key: str) -> dict:
     """
-    Playfair加密
-    
+    构建（并缓存）一个密钥的全部查找表
+
     Args:
-        plaintext: 明文
-        key: 密钥
-    
+        prepared_key: 已预处理（_prepare_text）的密钥
+
     Returns:
-        密文
+        {'matrix': 5x5矩阵, 'index': 字母->(行,列),
+         'encrypt': 双字母加密表, 'decrypt': 双字母解密表,
+         'letters': 矩阵字母, 'encrypt_array'/'decrypt_array': 625x2 的向量化查找表}
     """
-    matrix = _create_matrix(key)
-    plaintext = _prepare_text(plaintext)
-    
-    # 如果长度为奇数，添加X
-    if len(plaintext) % 2 != 0:
-        plaintext += 'X'
-    
+    matrix = _create_matrix(prepared_key)
+    index = _matrix_index(matrix)
+    letters = ''.join(''.join(row) for row in matrix)
+
+    encrypt_table, decrypt_table = {}, {}
+    for a in letters:
+        for b in letters:
+            encrypt_table[a + b] = _pair_rule(matrix, index, a, b, 1)
+            decrypt_table[a + b] = _pair_rule(matrix, index, a, b, -1)
+
+    tables = {'matrix': matrix, 'index': index, 'letters': letters,
+              'encrypt': encrypt_table, 'decrypt': decrypt_table}
+
+    if letters.isascii():
+        # 向量化查找表：字母码 -> 0..24，以及 (a*25+b) -> 变换后的两个字母
+        codes = np.full(256, 255, dtype=np.uint8)
+        codes[np.frombuffer(letters.encode(), dtype=np.uint8)] = np.arange(25, dtype=np.uint8)
+        tables['codes'] = codes
+        for name in ('encrypt', 'decrypt'):
+            table = tables[name]
+            pairs = ''.join(table[a + b] for a in letters for b in letters)
+            tables[name + '_array'] = np.frombuffer(pairs.encode(), dtype=np.uint8).reshape(625, 2)
+    return tables
+
+
+def _tables_for(key: str) -> dict:
+    return _key_tables(_prepare_text(key))
+
+
+def _check_letters(tables: dict, text: str):
+    """确认文本中的字母都在矩阵中（非ASCII字母无法加密）"""
+    index = tables['index']
+    for char in set(text):
+        if char not in index:
+            raise ValueError(f"无法处理的字符: {char!r}（Playfair 只支持英文字母）")
+
+
+def _encrypt_pairs(tables: dict, plaintext: str) -> str:
+    """逐对查表加密已预处理且长度为偶数的明文"""
+    table = tables['encrypt']
     ciphertext = []
     for i in range(0, len(plaintext), 2):
         char1 = plaintext[i]
         char2 = plaintext[i + 1]
-        
+
         # 如果两个字母相同，插入X
         if char1 == char2:
-            char2 = 'X'
-            ciphertext.append(_encrypt_pair(matrix, char1, char2))
-            ciphertext.append(plaintext[i + 1])
+            ciphertext.append(table[char1 + 'X'])
+            ciphertext.append(char2)
         else:
-            ciphertext.append(_encrypt_pair(matrix, char1, char2))
-    
+            ciphertext.append(table[char1 + char2])
     return ''.join(ciphertext)
 
 
+def _encrypt_pairs_vectorized(tables: dict, plaintext: str) -> str:
+    """向量化加密：与 _encrypt_pairs 结果一致"""
+    raw = np.frombuffer(plaintext.encode('ascii'), dtype=np.uint8)
+    codes = tables['codes'][raw].astype(np.int32)
+    first, second = codes[0::2], codes[1::2]
+    same = first == second
+    # 相同字母对按 (字母, X) 加密，并在其后保留原字母
+    second = np.where(same, int(tables['codes'][ord('X')]), second)
+    pairs = tables['encrypt_array'][first * 25 + second]
+
+    lengths = 2 + same.astype(np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    out[offsets] = pairs[:, 0]
+    out[offsets + 1] = pairs[:, 1]
+    out[offsets[same] + 2] = raw[1::2][same]
+    return out.tobytes().decode('ascii')
+
+
+def _decrypt_pairs_vectorized(tables: dict, ciphertext: str) -> str:
+    """向量化解密"""
+    raw = np.frombuffer(ciphertext.encode('ascii'), dtype=np.uint8)
+    codes = tables['codes'][raw].astype(np.int32)
+    pairs = tables['decrypt_array'][codes[0::2] * 25 + codes[1::2]]
+    return pairs.tobytes().decode('ascii')
+
+
+def encrypt(plaintext: str, key: str) -> str:
+    """
+    Playfair加密
+
+    Args:
+        plaintext: 明文
+        key: 密钥
+
+    Returns:
+        密文
+    """
+    stream = PlayfairStream(key)
+    # 长度为奇数时在末尾添加X
+    return stream.update(plaintext) + stream.finalize()
+
+
 def decrypt(ciphertext: str, key: str) -> str:
     """
     Playfair解密
-    
+
     Args:
         ciphertext: 密文
         key: 密钥
-    
+
     Returns:
         明文
     """
-    matrix = _create_matrix(key)
-    ciphertext = _prepare_text(ciphertext)
-    
-    plaintext = []
-    for i in range(0, len(ciphertext), 2):
-        char1 = ciphertext[i]
-        char2 = ciphertext[i + 1]
-        plaintext.append(_decrypt_pair(matrix, char1, char2))
-    
-    return ''.join(plaintext)
+    stream = PlayfairStream(key, decrypt=True)
+    return stream.update(ciphertext) + stream.finalize()
+
+
+class PlayfairStream:
+    """
+    分块加解密：按块输入文本，跨块保留未配对的字母，
+    输出与对整段文本调用 encrypt/decrypt 的结果一致
+    """
+
+    def __init__(self, key: str, decrypt: bool = False):
+        """
+        Args:
+            key: 密钥
+            decrypt: True 为解密，False 为加密
+        """
+        self.tables = _tables_for(key)
+        self.decrypt = decrypt
+        self._pending = ''
+
+    def update(self, text: str) -> str:
+        """
+        处理一块文本
+
+        Returns:
+            本块可以输出的结果（最后一个未配对的字母留到下一块）
+        """
+        letters = _prepare_text(text)
+        _check_letters(self.tables, letters)
+        letters = self._pending + letters
+        cut = len(letters) // 2 * 2
+        letters, self._pending = letters[:cut], letters[cut:]
+        return self._transform(letters)
+
+    def finalize(self) -> str:
+        """处理剩余的字母（加密时补X，解密时字母数为奇数则报错）"""
+        pending, self._pending = self._pending, ''
+        if not pending:
+            return ''
+        if self.decrypt:
+            raise ValueError("密文字母数必须为偶数")
+        return self._transform(pending + 'X')
+
+    def _transform(self, letters: str) -> str:
+        tables = self.tables
+        vectorize = len(letters) >= VECTORIZE_THRESHOLD and 'codes' in tables and letters.isascii()
+        if self.decrypt:
+            if vectorize:
+                return _decrypt_pairs_vectorized(tables, letters)
+            table = tables['decrypt']
+            return ''.join(table[letters[i:i + 2]] for i in range(0, len(letters), 2))
+        if vectorize:
+            return _encrypt_pairs_vectorized(tables, letters)
+        return _encrypt_pairs(tables, letters)
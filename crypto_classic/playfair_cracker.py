@@ -0,0 +1,253 @@
+"""
+Playfair密码破解
+在 5x5 密钥方阵空间上做模拟退火，用 quadgram log10 概率给候选明文打分。
+
+密文按双字母组去重后只解密一次各不相同的组：每个候选方阵先求出字母位置，
+再对全部不同的双字母组向量化套用 Playfair 规则，最后按下标展开成整段明文，
+每个候选的解密和打分都是若干次 NumPy 运算。
+多条独立的退火链分轮在进程池中推进，两条链收敛到同一明文或达到时间预算时提前结束
+"""
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from crypto_classic.ngrams import quadgram_table
+from crypto_classic.playfair import ALPHABET, _prepare_text
+
+# 方阵字母（0-24，不含J）在 A-Z 编码中的位置
+_LETTER_CODES = np.array([ord(char) - 65 for char in ALPHABET], dtype=np.int64)
+_ALPHABET_INDEX = {char: i for i, char in enumerate(ALPHABET)}
+
+# 退火参数：每个温度的迭代次数与每次降温的幅度
+ITERATIONS_PER_TEMPERATURE = 2000
+TEMPERATURE_STEP = 0.2
+
+# 每轮推进的温度档数（每轮结束后检查各链是否收敛）
+STEPS_PER_ROUND = 5
+
+
+def _rule_table() -> np.ndarray:
+    """
+    与密钥无关的解密规则表：(位置a*25+位置b) -> 解密后的两个位置
+
+    Playfair 规则只取决于两个字母在方阵中的位置，因此对任意方阵，
+    先查位置、再查该表、最后按位置取字母即可完成解密
+    """
+    rule = np.empty((625, 2), dtype=np.int64)
+    for pa in range(25):
+        for pb in range(25):
+            ra, ca = divmod(pa, 5)
+            rb, cb = divmod(pb, 5)
+            if ra == rb:
+                # 同行：向左循环移动
+                out = (ra * 5 + (ca - 1) % 5, rb * 5 + (cb - 1) % 5)
+            elif ca == cb:
+                # 同列：向上循环移动
+                out = (((ra - 1) % 5) * 5 + ca, ((rb - 1) % 5) * 5 + cb)
+            else:
+                # 矩形：交换列
+                out = (ra * 5 + cb, rb * 5 + ca)
+            rule[pa * 25 + pb] = out
+    return rule
+
+
+_DECRYPT_RULE = _rule_table()
+_SQUARE_POSITIONS = np.arange(25)
+_WEIGHTS = np.array([26 ** 3, 26 ** 2, 26, 1], dtype=np.int64)
+
+
+class _Scorer:
+    """对固定的密文给候选方阵解密并打分"""
+
+    def __init__(self, codes: np.ndarray, table: np.ndarray):
+        """
+        Args:
+            codes: 密文在方阵字母表中的编码（0-24），长度为偶数
+            table: quadgram log10 概率表
+        """
+        digraphs = codes[0::2].astype(np.int64) * 25 + codes[1::2]
+        unique, self.inverse = np.unique(digraphs, return_inverse=True)
+        self.first, self.second = unique // 25, unique % 25
+        self.windows = len(codes) - 3
+        self.table = table
+
+    def _plain_positions(self, square: np.ndarray) -> np.ndarray:
+        """解密后每个明文字母在方阵中的位置"""
+        position = np.empty(25, dtype=np.int64)
+        position[square] = _SQUARE_POSITIONS
+        # 只对不同的双字母组套用规则，再按下标展开为整段明文
+        return _DECRYPT_RULE[position[self.first] * 25 + position[self.second]][self.inverse].ravel()
+
+    def decrypt(self, square: np.ndarray) -> np.ndarray:
+        """用方阵（位置 -> 字母）解密，返回明文编码（0-24）"""
+        return square[self._plain_positions(square)]
+
+    def score(self, square: np.ndarray) -> float:
+        plain = _LETTER_CODES[square][self._plain_positions(square)]
+        index = plain[:-3] * _WEIGHTS[0]
+        for offset in range(1, 4):
+            index += plain[offset:offset + self.windows] * _WEIGHTS[offset]
+        return float(self.table[index].sum(dtype=np.float64))
+
+
+def _mutate(square: np.ndarray, roll: float, a: int, b: int) -> np.ndarray:
+    """
+    随机变换方阵：大多数情况交换两个字母，少数情况交换行/列或翻转
+
+    Args:
+        square: 当前方阵
+        roll: [0, 1) 随机数，决定变换类型
+        a, b: 两个不同的 0-24 随机数（交换行/列时取其模5）
+    """
+    square = square.copy()
+    grid = square.reshape(5, 5)
+    if roll < 0.90:
+        square[a], square[b] = square[b], square[a]
+    elif roll < 0.92:
+        a, b = a % 5, (a % 5 + 1 + b % 4) % 5
+        grid[[a, b]] = grid[[b, a]]
+    elif roll < 0.94:
+        a, b = a % 5, (a % 5 + 1 + b % 4) % 5
+        grid[:, [a, b]] = grid[:, [b, a]]
+    elif roll < 0.96:
+        grid[:] = grid[::-1].copy()
+    elif roll < 0.98:
+        grid[:] = grid[:, ::-1].copy()
+    else:
+        square = square[::-1].copy()
+    return square
+
+
+def start_temperature(letters: int) -> float:
+    """按密文长度选择初始温度（得分是所有窗口之和，文本越长得分差越大）"""
+    return 10 + 0.087 * max(letters - 84, 0)
+
+
+def _anneal_round(codes: np.ndarray, state: dict, deadline: float) -> dict:
+    """
+    推进一条退火链 STEPS_PER_ROUND 个温度档（可在子进程中运行）
+
+    Args:
+        codes: 密文编码
+        state: 链状态 {'seed', 'round', 'square', 'score', 'temperature', 'best_square', 'best_score'}
+        deadline: 截止时间
+
+    Returns:
+        更新后的链状态
+    """
+    scorer = _Scorer(codes, quadgram_table())
+    rng = np.random.default_rng([state['seed'], state['round']])
+    square = state['square']
+    if square is None:
+        square = rng.permutation(25)
+        state['best_square'], state['best_score'] = square, scorer.score(square)
+    score = scorer.score(square)
+    temperature = state['temperature']
+
+    for _ in range(STEPS_PER_ROUND):
+        if temperature <= 0 or time.time() > deadline:
+            break
+        rolls = rng.random(ITERATIONS_PER_TEMPERATURE).tolist()
+        accepts = rng.random(ITERATIONS_PER_TEMPERATURE).tolist()
+        firsts = rng.integers(0, 25, ITERATIONS_PER_TEMPERATURE)
+        seconds = ((firsts + rng.integers(1, 25, ITERATIONS_PER_TEMPERATURE)) % 25).tolist()
+        for roll, accept, a, b in zip(rolls, accepts, firsts.tolist(), seconds):
+            candidate = _mutate(square, roll, a, b)
+            candidate_score = scorer.score(candidate)
+            delta = candidate_score - score
+            if delta >= 0 or accept < math.exp(delta / temperature):
+                square, score = candidate, candidate_score
+                if score > state['best_score']:
+                    state['best_square'], state['best_score'] = square, score
+        temperature -= TEMPERATURE_STEP
+
+    state.update(square=square, score=score, temperature=temperature, round=state['round'] + 1)
+    return state
+
+
+def square_to_key(square) -> str:
+    """把方阵转换为可直接用作 playfair 模块密钥的25字母字符串"""
+    return ''.join(ALPHABET[i] for i in square)
+
+
+def crack(ciphertext: str, time_budget: float = 60.0, chains: int = 4, workers: int = None,
+          progress=None, seed: int = None) -> dict:
+    """
+    用模拟退火破解 Playfair 密码
+
+    Args:
+        ciphertext: 密文（按双字母组解密，字母数为奇数时忽略最后一个字母）
+        time_budget: 总时间预算（秒）
+        chains: 独立退火链数量
+        workers: 并行进程数（默认CPU核数，1表示在当前进程执行）
+        progress: 进度回调，每轮结束调用一次，参数为当前状态字典
+        seed: 随机种子（用于复现）
+
+    Returns:
+        {'key': 方阵密钥, 'plaintext': 明文, 'score': 平均每个quadgram的log10概率,
+         'rounds': 完成的轮数, 'converged': 是否因多条链收敛而提前结束, 'elapsed': 耗时}
+    """
+    text = _prepare_text(ciphertext)
+    codes = np.array([_ALPHABET_INDEX[char] for char in text if char in _ALPHABET_INDEX],
+                     dtype=np.int64)
+    codes = codes[:len(codes) // 2 * 2]
+    if len(codes) < 8:
+        raise ValueError("密文字母太少，无法进行频率分析")
+
+    started = time.time()
+    deadline = started + time_budget
+    temperature = start_temperature(len(codes))
+    seeds = np.random.SeedSequence(seed).generate_state(chains)
+    states = [{'seed': int(s), 'round': 0, 'square': None, 'score': None, 'temperature': temperature,
+               'best_square': None, 'best_score': float('-inf')} for s in seeds]
+    workers = workers or os.cpu_count() or 1
+    scorer = _Scorer(codes, quadgram_table())  # 在 fork 之前加载概率表，子进程直接共享
+    windows = len(codes) - 3
+    converged = False
+    rounds = 0
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while True:
+            if executor is None:
+                states = [_anneal_round(codes, state, deadline) for state in states]
+            else:
+                states = list(executor.map(_anneal_round, [codes] * chains, states,
+                                           [deadline] * chains))
+            rounds += 1
+
+            best = max(states, key=lambda state: state['best_score'])
+            # 方阵的行列循环移位得到等价密钥，因此用解密结果判断是否收敛
+            plaintexts = [scorer.decrypt(state['best_square']).tobytes() for state in states]
+            converged = chains > 1 and any(plaintexts.count(p) > 1 for p in plaintexts)
+            if progress is not None:
+                progress({
+                    'rounds': rounds,
+                    'temperature': max(state['temperature'] for state in states),
+                    'best_score': best['best_score'] / windows,
+                    'best_key': square_to_key(best['best_square']),
+                    'elapsed': time.time() - started
+                })
+            if (converged or time.time() > deadline
+                    or all(state['temperature'] <= 0 for state in states)):
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if converged:
+        # 取被多条链共同找到的解
+        best = max((s for s, p in zip(states, plaintexts) if plaintexts.count(p) > 1),
+                   key=lambda state: state['best_score'])
+    plaintext = ''.join(ALPHABET[i] for i in scorer.decrypt(best['best_square']))
+    return {
+        'key': square_to_key(best['best_square']),
+        'plaintext': plaintext,
+        'score': round(best['best_score'] / windows, 4),
+        'rounds': rounds,
+        'converged': converged,
+        'elapsed': round(time.time() - started, 3)
+    }
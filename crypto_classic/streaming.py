@@ -0,0 +1,111 @@
+"""
+经典密码的流式文件处理
+按固定大小分块读取输入，逐块加解密后立即输出，内存占用与文件大小无关。
+
+凯撒和单表置换只替换ASCII字母，而UTF-8多字节字符的每个字节都不小于0x80，
+因此可以直接对原始字节块做 bytes.translate，无需解码；
+Playfair 需要按字母配对，使用增量UTF-8解码器和 PlayfairStream 跨块保留未配对的字母
+"""
+import codecs
+
+from crypto_classic import caesar, substitution
+from crypto_classic.playfair import PlayfairStream
+
+# 每次读取的字节数
+CHUNK_SIZE = 256 * 1024
+
+ALGORITHMS = ('caesar', 'substitution', 'playfair')
+
+
+def iter_chunks(fileobj, chunk_size: int = CHUNK_SIZE):
+    """按块读取文件对象，直到结束"""
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def caesar_stream(chunks, shift: int, decrypt: bool = False):
+    """
+    凯撒密码流式加解密
+
+    Args:
+        chunks: 输入字节块的可迭代对象
+        shift: 位移量
+        decrypt: 是否解密
+
+    Yields:
+        输出字节块
+    """
+    table = caesar._shift_bytes_table((-shift if decrypt else shift) % 26)
+    for chunk in chunks:
+        yield chunk.translate(table)
+
+
+def substitution_stream(chunks, key: str = None, decrypt: bool = False):
+    """
+    单表置换流式加解密（替换表必须由ASCII字母组成）
+
+    Args:
+        chunks: 输入字节块的可迭代对象
+        key: 替换表
+        decrypt: 是否解密
+
+    Yields:
+        输出字节块
+    """
+    key = substitution._validate_key(key)
+    if not key.isascii() or len(set(key.lower())) != 26:
+        raise ValueError("文件模式的替换表必须是26个不同的英文字母")
+    table = substitution._bytes_table(key, decrypt)
+    for chunk in chunks:
+        yield chunk.translate(table)
+
+
+def playfair_stream(chunks, key: str, decrypt: bool = False, encoding: str = 'utf-8'):
+    """
+    Playfair 流式加解密，输出与对整段文本处理的结果一致
+
+    Args:
+        chunks: 输入字节块的可迭代对象
+        key: 密钥
+        decrypt: 是否解密
+        encoding: 输入文本编码
+
+    Yields:
+        输出字节块（ASCII大写字母）
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    stream = PlayfairStream(key, decrypt=decrypt)
+    for chunk in chunks:
+        output = stream.update(decoder.decode(chunk))
+        if output:
+            yield output.encode('ascii')
+    output = stream.update(decoder.decode(b'', final=True)) + stream.finalize()
+    if output:
+        yield output.encode('ascii')
+
+
+def cipher_stream(algorithm: str, chunks, key=None, decrypt: bool = False):
+    """
+    按算法名选择流式处理函数
+
+    Args:
+        algorithm: 'caesar'、'substitution' 或 'playfair'
+        chunks: 输入字节块的可迭代对象
+        key: 凯撒为位移量，其他算法为密钥
+        decrypt: 是否解密
+
+    Returns:
+        输出字节块的生成器
+    """
+    if algorithm == 'caesar':
+        return caesar_stream(chunks, int(key), decrypt)
+    if algorithm == 'substitution':
+        return substitution_stream(chunks, key, decrypt)
+    if algorithm == 'playfair':
+        if not key:
+            raise ValueError("密钥不能为空")
+        return playfair_stream(chunks, key, decrypt)
+    raise ValueError(f"不支持的算法: {algorithm}")
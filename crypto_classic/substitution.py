@@ -1,7 +1,59 @@
 """
 单表置换密码 (Simple Substitution Cipher)
 使用替换表进行加密
+
+加解密基于预编译的 str.maketrans 转换表（ASCII 数据可用 bytes.translate），
+每个替换表对应的转换表按 LRU 缓存
 """
+from functools import lru_cache
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+DEFAULT_KEY = "qwertyuiopasdfghjklzxcvbnm"
+
+
+def _validate_key(key: str) -> str:
+    """校验替换表，返回实际使用的替换表"""
+    if key is None:
+        # 默认替换表（可以自定义）
+        key = DEFAULT_KEY
+    
+    if len(key) != 26:
+        raise ValueError("替换表必须包含26个不同的字母")
+    
+    return key
+
+
+@lru_cache(maxsize=128)
+def _encrypt_table(key: str) -> dict:
+    """构建（并缓存）加密转换表：明文字母 -> 替换表中对应位置的字母（保持大小写）"""
+    table = {}
+    for index, plain in enumerate(ALPHABET):
+        table[ord(plain)] = key[index]
+        table[ord(plain.upper())] = key[index].upper()
+    return table
+
+
+@lru_cache(maxsize=128)
+def _decrypt_table(key: str) -> dict:
+    """构建（并缓存）解密转换表：密文字母 -> 明文字母（保持大小写）"""
+    table = {}
+    for index, char in enumerate(key.lower()):
+        table[ord(char)] = ALPHABET[index]
+        if char.upper() != char:
+            table[ord(char.upper())] = ALPHABET[index].upper()
+    return table
+
+
+@lru_cache(maxsize=128)
+def _bytes_table(key: str, decrypt: bool) -> bytes:
+    """构建（并缓存）ASCII 数据使用的 bytes.translate 转换表"""
+    table = bytearray(range(256))
+    mapping = _decrypt_table(key) if decrypt else _encrypt_table(key)
+    for src, dst in mapping.items():
+        if src < 128:
+            table[src] = ord(dst)
+    return bytes(table)
+
 
 def encrypt(plaintext: str, key: str = None) -> str:
     """
@@ -14,35 +66,14 @@ def encrypt(plaintext: str, key: str = None) -> str:
     Returns:
         密文
     """
-    if key is None:
-        # 默认替换表（可以自定义）
-        key = "qwertyuiopasdfghjklzxcvbnm"
-    
-    if len(key) != 26:
-        raise ValueError("替换表必须包含26个不同的字母")
+    key = _validate_key(key)
     
     # 验证替换表中没有重复字母
     if len(set(key.lower())) != 26:
         raise ValueError("替换表中不能有重复的字母")
     
-    ciphertext = []
-    alphabet = "abcdefghijklmnopqrstuvwxyz"
-    
-    for char in plaintext:
-        if char.lower() in alphabet:
-            # 找到字母在标准字母表中的位置
-            index = alphabet.index(char.lower())
-            # 使用替换表中对应位置的字母
-            substituted = key[index]
-            # 保持大小写
-            if char.isupper():
-                substituted = substituted.upper()
-            ciphertext.append(substituted)
-        else:
-            # 非字母字符保持不变
-            ciphertext.append(char)
-    
-    return ''.join(ciphertext)
+    # 非字母字符保持不变
+    return plaintext.translate(_encrypt_table(key))
 
 
 def decrypt(ciphertext: str, key: str = None) -> str:
@@ -56,30 +87,35 @@ def decrypt(ciphertext: str, key: str = None) -> str:
     Returns:
         明文
     """
-    if key is None:
-        key = "qwertyuiopasdfghjklzxcvbnm"
-    
-    if len(key) != 26:
-        raise ValueError("替换表必须包含26个不同的字母")
-    
-    # 创建逆向映射：密文字母 -> 明文字母
-    alphabet = "abcdefghijklmnopqrstuvwxyz"
-    reverse_key = {}
-    for i, char in enumerate(key.lower()):
-        reverse_key[char] = alphabet[i]
-    
-    plaintext = []
+    key = _validate_key(key)
+    return ciphertext.translate(_decrypt_table(key))
+
+
+def encrypt_bytes(data: bytes, key: str = None) -> bytes:
+    """
+    对ASCII字节数据进行单表置换加密（非字母字节保持不变）
     
-    for char in ciphertext:
-        if char.lower() in reverse_key:
-            decrypted = reverse_key[char.lower()]
-            if char.isupper():
-                decrypted = decrypted.upper()
-            plaintext.append(decrypted)
-        else:
-            plaintext.append(char)
+    Args:
+        data: ASCII 明文字节
+        key: 26字母的替换表（须为ASCII字符）
     
-    return ''.join(plaintext)
+    Returns:
+        密文字节
+    """
+    key = _validate_key(key)
+    if len(set(key.lower())) != 26:
+        raise ValueError("替换表中不能有重复的字母")
+    if not key.isascii():
+        raise ValueError("字节模式的替换表只能包含ASCII字符")
+    return data.translate(_bytes_table(key, False))
+
+
+def decrypt_bytes(data: bytes, key: str = None) -> bytes:
+    """对ASCII字节数据进行单表置换解密"""
+    key = _validate_key(key)
+    if not key.isascii():
+        raise ValueError("字节模式的替换表只能包含ASCII字符")
+    return data.translate(_bytes_table(key, True))
 
 
 def generate_key() -> str:
@@ -90,6 +126,6 @@ def generate_key() -> str:
         随机生成的26字母替换表
     """
     import random
-    alphabet = list("abcdefghijklmnopqrstuvwxyz")
+    alphabet = list(ALPHABET)
     random.shuffle(alphabet)
     return ''.join(alphabet)
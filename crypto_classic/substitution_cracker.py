@@ -0,0 +1,183 @@
+"""
+单表置换密码破解
+爬山算法 + 随机重启，用 quadgram log10 概率给候选明文打分。
+
+交换两个密文字母的解密映射时，只有包含这两个字母的 quadgram 窗口得分会变化，
+因此每次交换只重算受影响窗口的增量，而不是重新解密整段文本。
+各次重启相互独立，在多个进程中并行执行，受总时间预算限制
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from crypto_classic.ngrams import quadgram_table, text_to_codes
+from crypto_classic.substitution import ALPHABET, decrypt
+
+# 连续多少次交换没有改进即认为到达局部最优
+MAX_STALE_SWAPS = 1500
+
+# 参与打分的最大字母数（更长的密文对统计结果几乎没有帮助）
+MAX_SCORED_LETTERS = 5000
+
+_WEIGHTS = np.array([26 ** 3, 26 ** 2, 26, 1], dtype=np.int64)
+
+# 全部 325 种可交换的字母对
+_PAIRS = [(a, b) for a in range(26) for b in range(a + 1, 26)]
+
+
+class _Climber:
+    """在一段密文上执行爬山搜索，缓存每个字母/字母对影响的窗口"""
+
+    def __init__(self, codes: np.ndarray, table: np.ndarray):
+        self.codes = codes.astype(np.int64)
+        self.table = table
+        self.windows = len(codes) - 3
+        self.positions = [np.flatnonzero(self.codes == letter) for letter in range(26)]
+        self._affected = {}
+
+    def affected(self, a: int, b: int) -> np.ndarray:
+        """交换 a、b（a < b）时得分可能变化的窗口起点"""
+        starts = self._affected.get((a, b))
+        if starts is None:
+            pos = np.concatenate((self.positions[a], self.positions[b]))
+            starts = np.unique((pos[:, None] - np.arange(4)).ravel())
+            starts = starts[(starts >= 0) & (starts < self.windows)]
+            self._affected[(a, b)] = starts
+        return starts
+
+    def _window_score(self, plain: np.ndarray, starts: np.ndarray) -> float:
+        index = plain[starts] * _WEIGHTS[0]
+        for offset in range(1, 4):
+            index += plain[starts + offset] * _WEIGHTS[offset]
+        return float(self.table[index].sum(dtype=np.float64))
+
+    def score(self, plain: np.ndarray) -> float:
+        return self._window_score(plain, np.arange(self.windows))
+
+    def climb(self, rng: np.random.Generator, deadline: float) -> tuple:
+        """
+        从随机密钥出发爬山，直到连续 MAX_STALE_SWAPS 次交换无改进或超时
+
+        Returns:
+            (解密映射 密文字母->明文字母, 得分)
+        """
+        mapping = rng.permutation(26)
+        plain = mapping[self.codes]
+        score = self.score(plain)
+        stale = 0
+        draws = iter(())
+        while stale < MAX_STALE_SWAPS:
+            choice = next(draws, None)
+            if choice is None:
+                # 批量抽取随机字母对，顺便检查是否超时
+                if time.time() > deadline:
+                    break
+                draws = iter(rng.integers(0, len(_PAIRS), 512).tolist())
+                continue
+            a, b = _PAIRS[choice]
+            starts = self.affected(a, b)
+            if not len(starts):
+                stale += 1
+                continue
+            before = self._window_score(plain, starts)
+            plain[self.positions[a]] = mapping[b]
+            plain[self.positions[b]] = mapping[a]
+            delta = self._window_score(plain, starts) - before
+            if delta > 0:
+                mapping[a], mapping[b] = mapping[b], mapping[a]
+                score += delta
+                stale = 0
+            else:
+                plain[self.positions[a]] = mapping[a]
+                plain[self.positions[b]] = mapping[b]
+                stale += 1
+        return mapping, score
+
+
+def _run_restart(codes: np.ndarray, seed: int, deadline: float) -> tuple:
+    """执行一次随机重启（可在子进程中运行）"""
+    climber = _Climber(codes, quadgram_table())
+    return climber.climb(np.random.default_rng(seed), deadline)
+
+
+def mapping_to_key(mapping) -> str:
+    """把 密文字母->明文字母 的解密映射转换为 substitution 模块使用的替换表"""
+    key = [''] * 26
+    for cipher, plain in enumerate(mapping):
+        key[int(plain)] = ALPHABET[cipher]
+    return ''.join(key)
+
+
+def crack(ciphertext: str, time_budget: float = 10.0, restarts: int = 200,
+          workers: int = None, progress=None, seed: int = None) -> dict:
+    """
+    破解单表置换密码
+
+    Args:
+        ciphertext: 密文
+        time_budget: 总时间预算（秒）
+        restarts: 最多随机重启次数
+        workers: 并行进程数（默认CPU核数，1表示在当前进程执行）
+        progress: 进度回调，每完成一次重启调用一次，参数为当前状态字典
+        seed: 随机种子（用于复现）
+
+    Returns:
+        {'key': 替换表, 'plaintext': 明文, 'score': 平均每个quadgram的log10概率,
+         'restarts': 完成的重启次数, 'elapsed': 耗时}
+    """
+    codes = text_to_codes(ciphertext)[:MAX_SCORED_LETTERS]
+    if len(codes) < 4:
+        raise ValueError("密文字母太少，无法进行频率分析")
+
+    started = time.time()
+    deadline = started + time_budget
+    seeds = np.random.SeedSequence(seed).generate_state(restarts)
+    workers = workers or os.cpu_count() or 1
+    best_mapping, best_score = None, float('-inf')
+    completed = 0
+
+    def collect(mapping, score):
+        nonlocal best_mapping, best_score, completed
+        completed += 1
+        if score > best_score:
+            best_mapping, best_score = mapping, score
+        if progress is not None:
+            progress({
+                'restarts': completed,
+                'best_score': best_score / (len(codes) - 3),
+                'best_key': mapping_to_key(best_mapping),
+                'elapsed': time.time() - started
+            })
+
+    if workers == 1:
+        for i in range(restarts):
+            # 至少完成一次重启，保证总有结果
+            if i and time.time() > deadline:
+                break
+            collect(*_run_restart(codes, int(seeds[i]), deadline))
+    else:
+        quadgram_table()  # 在 fork 之前加载，子进程直接共享
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            submitted = 0
+            while submitted < restarts or pending:
+                while (submitted < restarts and len(pending) < 2 * workers
+                       and (not submitted or time.time() < deadline)):
+                    pending.add(executor.submit(_run_restart, codes, int(seeds[submitted]), deadline))
+                    submitted += 1
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(*future.result())
+
+    key = mapping_to_key(best_mapping)
+    return {
+        'key': key,
+        'plaintext': decrypt(ciphertext, key),
+        'score': round(best_score / (len(codes) - 3), 4),
+        'restarts': completed,
+        'elapsed': round(time.time() - started, 3)
+    }
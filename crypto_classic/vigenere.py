@@ -0,0 +1,165 @@
+"""
+维吉尼亚密码 (Vigenère Cipher)
+按密钥字母依次对明文字母做凯撒位移的多表代换密码
+
+加解密先取出全部ASCII字母，按密钥周期做跨步切片，每一列用凯撒模块缓存的
+bytes.translate 转换表整体位移后写回（非字母字符保持不变且不消耗密钥）。
+破解时用各候选周期下分列的重合指数确定密钥长度，再对每一列用卡方统计确定位移量
+"""
+import numpy as np
+
+from crypto_classic.caesar import _shift_bytes_table
+from crypto_classic.frequency import shift_scores
+from crypto_classic.ngrams import text_to_codes, ENGLISH_IOC, RANDOM_IOC
+
+# 破解时尝试的最大密钥长度
+MAX_PERIOD = 40
+
+# 选择密钥长度时，重合指数达到最高值的该比例、或已接近英文水平（0.06）即可
+# （取满足条件的最小周期，避免选中真实周期的倍数；短文本各列很短，最高值偏大）
+PERIOD_IOC_RATIO = 0.9
+PERIOD_IOC_THRESHOLD = 0.06
+
+# 每列至少需要的字母数（列太短时重合指数没有统计意义）
+MIN_COLUMN_LETTERS = 8
+
+# 估计密钥长度时最多使用的字母数（足够长的样本即可稳定估计重合指数）
+PERIOD_SAMPLE_LETTERS = 200000
+
+
+def _key_shifts(key: str) -> list:
+    """密钥字母 -> 位移量列表（忽略非字母，不区分大小写）"""
+    shifts = [ord(char) - 65 for char in key.upper() if 'A' <= char <= 'Z']
+    if not shifts:
+        raise ValueError("密钥必须包含英文字母")
+    return shifts
+
+
+def _apply(text: str, shifts: list) -> str:
+    """对文本中的ASCII字母按周期位移（位移量取自 shifts）"""
+    if text.isascii():
+        raw, encoding = np.frombuffer(text.encode('ascii'), dtype=np.uint8).copy(), 'ascii'
+    else:
+        # UTF-32 下每个字符定长，字母位置可直接定位
+        raw, encoding = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).copy(), 'utf-32-le'
+
+    upper = raw & 0xDF
+    positions = np.flatnonzero((upper >= 65) & (upper <= 90) & (raw < 128))
+    letters = raw[positions].astype(np.uint8)
+
+    period = len(shifts)
+    for column, shift in enumerate(shifts):
+        view = letters[column::period]
+        view[:] = np.frombuffer(view.tobytes().translate(_shift_bytes_table(shift % 26)),
+                                dtype=np.uint8)
+    raw[positions] = letters
+    return raw.tobytes().decode(encoding)
+
+
+def encrypt(plaintext: str, key: str) -> str:
+    """
+    维吉尼亚加密
+
+    Args:
+        plaintext: 明文
+        key: 密钥（英文字母）
+
+    Returns:
+        密文（非字母字符保持不变）
+    """
+    return _apply(plaintext, _key_shifts(key))
+
+
+def decrypt(ciphertext: str, key: str) -> str:
+    """
+    维吉尼亚解密
+
+    Args:
+        ciphertext: 密文
+        key: 密钥（英文字母）
+
+    Returns:
+        明文
+    """
+    return _apply(ciphertext, [-shift for shift in _key_shifts(key)])
+
+
+def period_ioc(codes: np.ndarray, max_period: int = MAX_PERIOD) -> np.ndarray:
+    """
+    计算各候选周期下分列重合指数的平均值
+
+    每个周期只做一次 bincount：列号*26+字母编码 得到 (周期, 26) 的列直方图
+
+    Args:
+        codes: 密文字母编码（0-25）
+        max_period: 最大候选周期
+
+    Returns:
+        长度为 max_period 的数组，下标 p-1 对应周期 p
+    """
+    codes = codes.astype(np.int64)
+    result = np.zeros(max_period)
+    for period in range(1, max_period + 1):
+        columns = np.arange(len(codes)) % period
+        counts = np.bincount(columns * 26 + codes, minlength=period * 26).reshape(period, 26)
+        totals = counts.sum(axis=1)
+        valid = totals > 1
+        if not valid.any():
+            break
+        coincidences = (counts * (counts - 1)).sum(axis=1)
+        result[period - 1] = (coincidences[valid] / (totals[valid] * (totals[valid] - 1))).mean()
+    return result
+
+
+def find_period(codes: np.ndarray, max_period: int = MAX_PERIOD) -> tuple:
+    """
+    估计密钥长度
+
+    Returns:
+        (周期, 各周期的平均重合指数)
+    """
+    iocs = period_ioc(codes[:PERIOD_SAMPLE_LETTERS], max_period)
+    threshold = max(min(PERIOD_IOC_RATIO * iocs.max(), PERIOD_IOC_THRESHOLD), RANDOM_IOC)
+    period = int(np.argmax(iocs >= threshold)) + 1
+    return period, iocs
+
+
+def crack(ciphertext: str, max_period: int = MAX_PERIOD) -> dict:
+    """
+    破解维吉尼亚密码
+
+    Args:
+        ciphertext: 密文
+        max_period: 最大候选密钥长度
+
+    Returns:
+        {'key': 密钥, 'period': 密钥长度, 'plaintext': 明文,
+         'ioc': 各候选周期的平均重合指数, 'column_scores': 各列最优位移的卡方值}
+    """
+    codes = text_to_codes(ciphertext)
+    if len(codes) < MIN_COLUMN_LETTERS:
+        raise ValueError("密文字母太少，无法进行频率分析")
+    max_period = max(1, min(max_period, len(codes) // MIN_COLUMN_LETTERS))
+
+    period, iocs = find_period(codes, max_period)
+
+    # 每一列都是一个凯撒密码：列直方图一次得到，26 个位移量向量化评分
+    columns = np.arange(len(codes)) % period
+    counts = np.bincount(columns * 26 + codes.astype(np.int64),
+                         minlength=period * 26).reshape(period, 26)
+    key, column_scores = [], []
+    for histogram in counts:
+        scores = shift_scores(histogram)
+        shift = int(np.argmin(scores))
+        key.append(chr(65 + shift))
+        column_scores.append(round(float(scores[shift]), 4))
+    key = ''.join(key)
+
+    return {
+        'key': key,
+        'period': period,
+        'plaintext': decrypt(ciphertext, key),
+        'ioc': {p + 1: round(float(value), 6) for p, value in enumerate(iocs)},
+        'english_ioc': ENGLISH_IOC,
+        'column_scores': column_scores
+    }
@@ -1,12 +1,19 @@
 """
 AES对称加密算法 (Advanced Encryption Standard)
 使用PyCryptodome库实现，支持256位密钥
+
+默认用 PBKDF2 从口令派生密钥，密文格式为 派生参数头部 + IV + 密文（见 kdf.py）；
+kdf=None 时沿用旧格式（口令直接填充/截断为密钥，密文为 IV + 密文），
+解密时根据头部自动识别两种格式
 """
 from Crypto.Cipher import AES
 from Crypto.Random import get_random_bytes
 from Crypto.Util.Padding import pad, unpad
 import base64
 
+from crypto_modern import kdf as kdf_module
+from crypto_modern.cbc_batch import encrypt_many, decrypt_texts
+
 
 def _ensure_key_length(key: str, key_size: int = 32) -> bytes:
     """确保密钥为指定长度（32字节=256位）"""
@@ -18,19 +25,26 @@ def _ensure_key_length(key: str, key_size: int = 32) -> bytes:
     return key_bytes
 
 
-def encrypt(plaintext: str, key: str, key_size: int = 32) -> str:
+def encrypt(plaintext: str, key: str, key_size: int = 32, kdf: str = 'pbkdf2',
+            cost: int = None) -> str:
     """
     AES加密
     
     Args:
         plaintext: 明文
-        key: 密钥（会自动填充或截断到指定长度）
+        key: 口令
         key_size: 密钥大小（16、24或32字节，默认32）
+        kdf: 密钥派生算法（'pbkdf2'、'scrypt'，None表示旧格式：口令自动填充或截断）
+        cost: 派生强度（PBKDF2 迭代次数或 scrypt 的 N，默认使用 kdf 模块的设置）
     
     Returns:
-        Base64编码的密文（包含IV）
+        Base64编码的密文（包含派生参数头部和IV）
     """
-    key_bytes = _ensure_key_length(key, key_size)
+    if kdf:
+        header, key_bytes = kdf_module.derive_for_encryption(
+            key, key_size, kdf_module.default_params(kdf, cost))
+    else:
+        header, key_bytes = b'', _ensure_key_length(key, key_size)
     plaintext_bytes = plaintext.encode()
     
     # 使用CBC模式
@@ -40,32 +54,96 @@ def encrypt(plaintext: str, key: str, key_size: int = 32) -> str:
     padded_plaintext = pad(plaintext_bytes, AES.block_size)
     ciphertext = cipher.encrypt(padded_plaintext)
     
-    # 将IV和密文组合，然后Base64编码
-    encrypted_data = iv + ciphertext
+    # 将头部、IV和密文组合，然后Base64编码
+    encrypted_data = header + iv + ciphertext
     return base64.b64encode(encrypted_data).decode()
 
 
+def _decrypt_raw(encrypted_data: bytes, key_bytes: bytes) -> str:
+    iv = encrypted_data[:16]
+    ciphertext = encrypted_data[16:]
+    
+    cipher = AES.new(key_bytes, AES.MODE_CBC, iv)
+    padded_plaintext = cipher.decrypt(ciphertext)
+    plaintext = unpad(padded_plaintext, AES.block_size)
+    
+    return plaintext.decode()
+
+
 def decrypt(ciphertext_b64: str, key: str, key_size: int = 32) -> str:
     """
     AES解密
     
     Args:
-        ciphertext_b64: Base64编码的密文
-        key: 密钥
+        ciphertext_b64: Base64编码的密文（新格式或旧格式）
+        key: 口令
         key_size: 密钥大小（默认32）
     
     Returns:
         明文
     """
-    key_bytes = _ensure_key_length(key, key_size)
     encrypted_data = base64.b64decode(ciphertext_b64)
+    legacy_key = _ensure_key_length(key, key_size)
+    if not kdf_module.has_header(encrypted_data):
+        return _decrypt_raw(encrypted_data, legacy_key)
     
-    # 提取IV和密文
-    iv = encrypted_data[:16]
-    ciphertext = encrypted_data[16:]
-    
-    cipher = AES.new(key_bytes, AES.MODE_CBC, iv)
-    padded_plaintext = cipher.decrypt(ciphertext)
-    plaintext = unpad(padded_plaintext, AES.block_size)
-    
-    return plaintext.decode()
+    try:
+        salt, params = kdf_module.parse_header(encrypted_data)
+        key_bytes = kdf_module.derive_key(key, salt, params, key_size)
+        return _decrypt_raw(encrypted_data[kdf_module.HEADER_SIZE:], key_bytes)
+    except ValueError:
+        # 旧格式密文的IV恰好以头部标识开头（概率约 2^-32）
+        try:
+            return _decrypt_raw(encrypted_data, legacy_key)
+        except ValueError:
+            pass
+        raise
+
+
+def encrypt_batch(plaintexts: list, key: str, key_size: int = 32, kdf: str = 'pbkdf2',
+                  cost: int = None) -> list:
+    """
+    用同一口令批量加密多条消息（输出格式与 encrypt 相同，可逐条用 decrypt 解密）
+
+    密钥只派生和扩展一次，所有IV由一次 get_random_bytes 生成，
+    各消息的 CBC 加密按分组位置横向合并为少量 ECB 调用（见 cbc_batch.py）
+
+    Args:
+        plaintexts: 明文列表
+        key: 口令
+        key_size: 密钥大小（16、24或32字节，默认32）
+        kdf: 密钥派生算法（None表示旧格式）
+        cost: 派生强度
+
+    Returns:
+        Base64编码的密文列表
+    """
+    if kdf:
+        header, key_bytes = kdf_module.derive_for_encryption(
+            key, key_size, kdf_module.default_params(kdf, cost))
+    else:
+        header, key_bytes = b'', _ensure_key_length(key, key_size)
+    ivs = get_random_bytes(AES.block_size * len(plaintexts))
+    encrypted = encrypt_many(AES, key_bytes, [text.encode() for text in plaintexts], ivs)
+    return [base64.b64encode(header + data).decode() for data in encrypted]
+
+
+def decrypt_batch(ciphertexts: list, key: str, key_size: int = 32,
+                  return_exceptions: bool = False) -> list:
+    """
+    用同一口令批量解密（新旧格式可以混合，相同派生头部的密文共用一次密钥派生，见 cbc_batch.decrypt_texts）
+
+    Args:
+        ciphertexts: Base64编码的密文列表
+        key: 口令
+        key_size: 密钥大小（默认32）
+        return_exceptions: 为True时失败的条目以 ValueError 实例返回，不抛出异常
+
+    Returns:
+        明文列表
+
+    Raises:
+        ValueError: return_exceptions 为False且任一条解密失败（错误信息包含序号）
+    """
+    return decrypt_texts(AES, ciphertexts, key, key_size, _ensure_key_length(key, key_size),
+                         return_exceptions)
@@ -0,0 +1,559 @@
+"""
+AES-GCM 分块流式加密
+把输入按固定大小分块，每块独立用 AES-GCM 加密并认证，内存占用与文件大小无关，
+解密时逐块验证后立即输出，无需读完整个文件。
+
+容器格式（整数均为大端序）：
+    文件头  magic(4) = b'ISGC' | version(1) | key_size(1) | chunk_size(4) | nonce_prefix(8)
+            [| 密钥派生头部(kdf.HEADER_SIZE)]
+    数据帧  final(1) | length(4) | ciphertext(length) | tag(16)
+
+口令加密（encrypt_stream 等）用 kdf 派生密钥，盐和派生参数紧跟在基本文件头之后；
+直接使用随机数据密钥的调用方（如数字信封）使用 *_with_key 接口，文件头没有派生头部。
+版本1的文件（口令直接填充或截断为密钥）仍可用口令解密。
+
+每块的 nonce = nonce_prefix(8) + 块序号(4)，附加认证数据为 完整文件头 + final 标志，
+因此块被重排、替换、删除或文件被截断（缺少 final=1 的最后一帧）都会导致验证失败。
+除最后一帧外每帧明文长度都等于 chunk_size（空文件只有一个空的最后一帧）
+
+各块互不依赖，PyCryptodome 的 C 实现在加解密时释放 GIL，
+因此大缓冲区可以用线程池按块并行处理（encrypt_parallel / decrypt_parallel），
+每个线程直接写入预分配输出缓冲区的对应位置（memoryview 切片，无额外拷贝）；
+流式接口指定 workers 时每次读入多块并行处理，输出格式完全相同
+"""
+import io
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
+
+from crypto_modern import kdf as kdf_module
+from crypto_modern.aes_cipher import _ensure_key_length
+
+MAGIC = b'ISGC'
+VERSION = 2
+
+# 口令直接填充或截断为密钥的旧版本，只用于解密
+LEGACY_VERSION = 1
+
+# 默认每块明文大小
+CHUNK_SIZE = 64 * 1024
+
+# 允许的块大小范围（解密时据此限制单帧内存）
+MIN_CHUNK_SIZE = 1024
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+
+# 流式接口一次并行处理的一组块最多包含的明文字节数（块数 = min(线程数, GROUP_BYTES // 块大小)），
+# 限制单个请求占用的内存，与CPU核数和客户端指定的块大小无关
+GROUP_BYTES = 32 * 1024 * 1024
+
+TAG_SIZE = 16
+NONCE_PREFIX_SIZE = 8
+
+_HEADER = struct.Struct('>4sBBI8s')
+_FRAME = struct.Struct('>BI')
+
+# 基本文件头（*_with_key 接口和版本1的文件）与口令加密的完整文件头
+BASE_HEADER_SIZE = _HEADER.size
+HEADER_SIZE = BASE_HEADER_SIZE + kdf_module.HEADER_SIZE
+FRAME_OVERHEAD = _FRAME.size + TAG_SIZE
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers: int) -> ThreadPoolExecutor:
+    """
+    进程内共享的加解密线程池（至少CPU核数个线程，需要更多线程时换一个更大的池，
+    旧池不主动关闭，正在使用它的调用结束后随垃圾回收退出）
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers < workers:
+            _executor_workers = max(workers, os.cpu_count() or 1)
+            _executor = ThreadPoolExecutor(max_workers=_executor_workers, thread_name_prefix='aes')
+        return _executor
+
+
+def _resolve_workers(workers) -> int:
+    return max(1, workers if workers else (os.cpu_count() or 1))
+
+
+def _group_size(workers, chunk_size: int) -> int:
+    """流式接口每组的块数"""
+    return max(1, min(_resolve_workers(workers), GROUP_BYTES // chunk_size))
+
+
+def _make_header(key_size: int, chunk_size: int, nonce_prefix: bytes, version: int = VERSION) -> bytes:
+    """基本文件头（不含密钥派生头部）"""
+    if key_size not in (16, 24, 32):
+        raise ValueError("key_size 必须是 16、24 或 32")
+    if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+        raise ValueError(f"块大小必须在 {MIN_CHUNK_SIZE}-{MAX_CHUNK_SIZE} 字节之间")
+    return _HEADER.pack(MAGIC, version, key_size, chunk_size, nonce_prefix)
+
+
+def parse_header(header: bytes) -> dict:
+    """
+    解析基本文件头
+
+    Returns:
+        {'version', 'key_size', 'chunk_size', 'nonce_prefix'}
+
+    Raises:
+        ValueError: 不是本格式的文件或参数非法
+    """
+    if len(header) < BASE_HEADER_SIZE:
+        raise ValueError("密文太短，缺少文件头")
+    magic, version, key_size, chunk_size, nonce_prefix = _HEADER.unpack(header[:BASE_HEADER_SIZE])
+    if magic != MAGIC:
+        raise ValueError("不是AES流式加密格式的文件")
+    if version not in (VERSION, LEGACY_VERSION):
+        raise ValueError(f"不支持的格式版本: {version}")
+    _make_header(key_size, chunk_size, nonce_prefix, version)
+    return {'version': version, 'key_size': key_size, 'chunk_size': chunk_size,
+            'nonce_prefix': nonce_prefix}
+
+
+def _password_header(key: str, key_size: int, chunk_size: int, kdf: str, cost: int) -> tuple:
+    """口令加密：派生密钥（同一口令复用缓存），返回 (完整文件头, 密钥)"""
+    kdf_header, key_bytes = kdf_module.derive_for_encryption(
+        key, key_size, kdf_module.default_params(kdf, cost))
+    header = _make_header(key_size, chunk_size, get_random_bytes(NONCE_PREFIX_SIZE)) + kdf_header
+    return header, key_bytes
+
+
+def _key_header(key_bytes: bytes, chunk_size: int) -> bytes:
+    """数据密钥加密：基本文件头"""
+    return _make_header(len(key_bytes), chunk_size, get_random_bytes(NONCE_PREFIX_SIZE))
+
+
+def _read_password_header(read, key: str, key_size: int = None) -> tuple:
+    """
+    读取口令加密的文件头并派生密钥（经 kdf 的缓存）
+
+    Args:
+        read: read(n) 读取函数
+        key: 口令
+        key_size: 期望的密钥大小（None表示使用文件头中的值）
+
+    Returns:
+        (完整文件头, 基本文件头信息, 密钥)
+    """
+    header = read(BASE_HEADER_SIZE)
+    info = parse_header(header)
+    if key_size is not None and key_size != info['key_size']:
+        raise ValueError(f"密钥大小与文件头不一致（文件为 {info['key_size']} 字节）")
+    if info['version'] == LEGACY_VERSION:
+        return header, info, _ensure_key_length(key, info['key_size'])
+    kdf_header = read(kdf_module.HEADER_SIZE)
+    salt, params = kdf_module.parse_header(kdf_header)
+    return header + kdf_header, info, kdf_module.derive_key(key, salt, params, info['key_size'])
+
+
+def _read_key_header(read, key_bytes: bytes) -> tuple:
+    """读取数据密钥加密的基本文件头，返回 (文件头, 基本文件头信息)"""
+    header = read(BASE_HEADER_SIZE)
+    info = parse_header(header)
+    if info['key_size'] != len(key_bytes):
+        raise ValueError(f"密钥长度与文件头不一致（文件为 {info['key_size']} 字节）")
+    return header, info
+
+
+def _chunk_cipher(key_bytes: bytes, header: bytes, index: int, final: bool):
+    """第 index 块的 GCM 对象（nonce 和附加认证数据已设置）"""
+    nonce = header[BASE_HEADER_SIZE - NONCE_PREFIX_SIZE:BASE_HEADER_SIZE] + struct.pack('>I', index)
+    cipher = AES.new(key_bytes, AES.MODE_GCM, nonce=nonce, mac_len=TAG_SIZE)
+    cipher.update(header + (b'\x01' if final else b'\x00'))
+    return cipher
+
+
+def _seal(key_bytes: bytes, header: bytes, index: int, chunk: bytes, final: bool) -> bytes:
+    """加密一块并返回完整数据帧"""
+    if index >= 2 ** 32:
+        raise ValueError("文件太大，块序号溢出")
+    ciphertext, tag = _chunk_cipher(key_bytes, header, index, final).encrypt_and_digest(chunk)
+    return _FRAME.pack(1 if final else 0, len(ciphertext)) + ciphertext + tag
+
+
+def _seal_into(key_bytes: bytes, header: bytes, index: int, chunk, final: bool, out: memoryview):
+    """加密一块，把完整数据帧直接写入 out（长度为 len(chunk) + FRAME_OVERHEAD）"""
+    length = len(chunk)
+    cipher = _chunk_cipher(key_bytes, header, index, final)
+    _FRAME.pack_into(out, 0, 1 if final else 0, length)
+    cipher.encrypt(chunk, output=out[_FRAME.size:_FRAME.size + length])
+    out[_FRAME.size + length:] = cipher.digest()
+
+
+def _open_into(key_bytes: bytes, header: bytes, index: int, final: bool, frame: memoryview,
+               out: memoryview):
+    """验证并解密一帧的密文部分（frame 不含帧头），明文直接写入 out"""
+    length = len(out)
+    cipher = _chunk_cipher(key_bytes, header, index, final)
+    cipher.decrypt(frame[:length], output=out)
+    try:
+        cipher.verify(frame[length:])
+    except ValueError:
+        raise ValueError(f"第 {index} 块验证失败：密钥错误或数据已被篡改")
+
+
+def _read_exact(fileobj, size: int) -> bytes:
+    """读取恰好 size 字节（到达文件末尾时可能更少）"""
+    data = fileobj.read(size)
+    if len(data) == size or not data:
+        return data
+    parts = [data]
+    remaining = size - len(data)
+    while remaining:
+        data = fileobj.read(remaining)
+        if not data:
+            break
+        parts.append(data)
+        remaining -= len(data)
+    return b''.join(parts)
+
+
+def encrypt_stream(fileobj, key: str, key_size: int = 32, chunk_size: int = CHUNK_SIZE,
+                   workers: int = 1, kdf: str = 'pbkdf2', cost: int = None):
+    """
+    流式加密（口令经 kdf 派生为密钥，盐和派生参数写在文件头中）
+
+    Args:
+        fileobj: 明文文件对象（支持 read(n)）
+        key: 口令
+        key_size: 密钥大小（16、24或32字节，默认32）
+        chunk_size: 每块明文字节数
+        workers: 并行加密的线程数（大于1时每次读入 workers 块并行处理，None表示CPU核数；
+                 每组总大小不超过 GROUP_BYTES）
+
+    Yields:
+        密文字节块（第一块为文件头；并行时为 bytearray，不再复制为 bytes）
+    """
+    header, key_bytes = _password_header(key, key_size, chunk_size, kdf, cost)
+    yield header
+    yield from _encrypt_frames(fileobj, key_bytes, header, chunk_size, workers)
+
+
+def encrypt_stream_with_key(fileobj, key_bytes: bytes, chunk_size: int = CHUNK_SIZE, workers: int = 1):
+    """
+    用随机数据密钥流式加密（不经过密钥派生，供数字信封等自行管理密钥的调用方使用）
+
+    Args:
+        fileobj: 明文文件对象
+        key_bytes: 16、24或32字节的密钥
+        chunk_size: 每块明文字节数
+        workers: 并行加密的线程数
+
+    Yields:
+        密文字节块（第一块为文件头）
+    """
+    header = _key_header(key_bytes, chunk_size)
+    yield header
+    yield from _encrypt_frames(fileobj, key_bytes, header, chunk_size, workers)
+
+
+def _encrypt_frames(fileobj, key_bytes: bytes, header: bytes, chunk_size: int, workers):
+    """依次输出全部数据帧"""
+    workers = _group_size(workers, chunk_size)
+    if workers > 1:
+        yield from _encrypt_groups(fileobj, key_bytes, header, chunk_size, workers)
+        return
+
+    # 多读一块才能知道当前块是否为最后一块
+    index = 0
+    current = _read_exact(fileobj, chunk_size)
+    while True:
+        following = _read_exact(fileobj, chunk_size) if len(current) == chunk_size else b''
+        final = not following
+        yield _seal(key_bytes, header, index, current, final)
+        if final:
+            break
+        index += 1
+        current = following
+
+
+def _encrypt_groups(fileobj, key_bytes: bytes, header: bytes, chunk_size: int, workers: int):
+    """每次读入 workers 块，在线程池中并行加密后按顺序输出"""
+    index = 0
+    pending = _read_exact(fileobj, chunk_size)
+    while True:
+        group = [pending]
+        while len(group) < workers and len(group[-1]) == chunk_size:
+            group.append(_read_exact(fileobj, chunk_size))
+        if len(group) > 1 and not group[-1]:
+            group.pop()
+        # 预读一块才能知道本组最后一块是否为文件结尾
+        pending = _read_exact(fileobj, chunk_size) if len(group[-1]) == chunk_size else b''
+        final = not pending
+
+        sizes = [len(chunk) + FRAME_OVERHEAD for chunk in group]
+        out = bytearray(sum(sizes))
+        view = memoryview(out)
+        tasks, offset = [], 0
+        for position, chunk in enumerate(group):
+            if index + position >= 2 ** 32:
+                raise ValueError("文件太大，块序号溢出")
+            last = final and position == len(group) - 1
+            tasks.append((key_bytes, header, index + position, chunk, last,
+                          view[offset:offset + sizes[position]]))
+            offset += sizes[position]
+        _run_tasks(_seal_into, tasks, workers)
+        yield out
+
+        if final:
+            break
+        index += len(group)
+
+
+def _read_frame(fileobj, index: int, chunk_size: int) -> tuple:
+    """读取一帧，返回 (是否最后一块, 密文+标签)"""
+    frame = _read_exact(fileobj, _FRAME.size)
+    if len(frame) < _FRAME.size:
+        raise ValueError("密文被截断")
+    final, length = _FRAME.unpack(frame)
+    if final not in (0, 1) or length > chunk_size or (not final and length != chunk_size):
+        raise ValueError(f"第 {index} 块的帧头无效")
+    body = _read_exact(fileobj, length + TAG_SIZE)
+    if len(body) < length + TAG_SIZE:
+        raise ValueError("密文被截断")
+    return bool(final), body
+
+
+def decrypt_stream(fileobj, key: str, key_size: int = None, workers: int = 1):
+    """
+    流式解密，每块验证通过后才输出
+
+    Args:
+        fileobj: 密文文件对象（支持 read(n)）
+        key: 口令
+        key_size: 密钥大小（默认使用文件头中记录的值）
+        workers: 并行验证解密的线程数（None表示CPU核数；每组总大小不超过 GROUP_BYTES）
+
+    Yields:
+        明文字节块（bytearray）
+
+    Raises:
+        ValueError: 格式错误、密钥错误、数据被篡改或文件被截断
+    """
+    header, info, key_bytes = _read_password_header(
+        lambda size: _read_exact(fileobj, size), key, key_size)
+    yield from _decrypt_frames(fileobj, key_bytes, header, info['chunk_size'], workers)
+
+
+def decrypt_stream_with_key(fileobj, key_bytes: bytes, workers: int = 1):
+    """
+    用数据密钥流式解密 encrypt_stream_with_key 的输出
+
+    Args:
+        fileobj: 密文文件对象
+        key_bytes: 加密时使用的密钥
+        workers: 并行验证解密的线程数
+
+    Yields:
+        明文字节块
+    """
+    header, info = _read_key_header(lambda size: _read_exact(fileobj, size), key_bytes)
+    yield from _decrypt_frames(fileobj, key_bytes, header, info['chunk_size'], workers)
+
+
+def _decrypt_frames(fileobj, key_bytes: bytes, header: bytes, chunk_size: int, workers):
+    """逐组读取、验证并解密数据帧，最后一帧之后不允许有多余数据"""
+    workers = _group_size(workers, chunk_size)
+
+    index, final = 0, False
+    while not final:
+        frames = []
+        while not final and len(frames) < workers:
+            final, body = _read_frame(fileobj, index + len(frames), chunk_size)
+            frames.append((final, body))
+
+        sizes = [len(body) - TAG_SIZE for _, body in frames]
+        out = bytearray(sum(sizes))
+        view = memoryview(out)
+        tasks, offset = [], 0
+        for position, (last, body) in enumerate(frames):
+            tasks.append((key_bytes, header, index + position, last, memoryview(body),
+                          view[offset:offset + sizes[position]]))
+            offset += sizes[position]
+        _run_tasks(_open_into, tasks, workers)
+        yield out
+        index += len(frames)
+
+    if fileobj.read(1):
+        raise ValueError("最后一块之后存在多余数据")
+
+
+def encrypt_parallel(data, key: str, key_size: int = 32, chunk_size: int = CHUNK_SIZE,
+                     workers: int = None, output=None, kdf: str = 'pbkdf2', cost: int = None) -> memoryview:
+    """
+    多线程按块并行加密整个缓冲区（格式与 encrypt_stream 相同）
+
+    Args:
+        data: 明文（bytes、bytearray、memoryview 或 mmap）
+        key: 口令
+        key_size: 密钥大小（16、24或32字节，默认32）
+        chunk_size: 每块明文字节数
+        workers: 线程数（None表示CPU核数）
+        output: 可选的预分配可写缓冲区，长度至少为 encrypted_size(len(data), chunk_size)
+        kdf: 密钥派生算法（'pbkdf2' 或 'scrypt'）
+        cost: 派生强度
+
+    Returns:
+        密文所在的 memoryview（指向 output 或新分配的 bytearray）
+    """
+    source = memoryview(data).cast('B')
+    total = encrypted_size(len(source), chunk_size)
+    if output is None:
+        output = bytearray(total)
+    view = memoryview(output).cast('B')
+    if len(view) < total:
+        raise ValueError(f"输出缓冲区太小，至少需要 {total} 字节")
+    view = view[:total]
+
+    header, key_bytes = _password_header(key, key_size, chunk_size, kdf, cost)
+    view[:HEADER_SIZE] = header
+
+    frames = max(1, -(-len(source) // chunk_size))
+    if frames > 2 ** 32:
+        raise ValueError("文件太大，块序号溢出")
+    frame_size = chunk_size + FRAME_OVERHEAD
+    tasks = []
+    for index in range(frames):
+        chunk = source[index * chunk_size:(index + 1) * chunk_size]
+        start = HEADER_SIZE + index * frame_size
+        tasks.append((key_bytes, header, index, chunk, index == frames - 1,
+                      view[start:start + len(chunk) + FRAME_OVERHEAD]))
+    _run_tasks(_seal_into, tasks, workers)
+    return view
+
+
+def decrypt_parallel(data, key: str, key_size: int = None, workers: int = None,
+                     output=None) -> memoryview:
+    """
+    多线程按块并行验证并解密整个缓冲区
+
+    Args:
+        data: encrypt_stream / encrypt_parallel 输出的密文
+        key: 口令
+        key_size: 密钥大小（默认使用文件头中记录的值）
+        workers: 线程数（None表示CPU核数）
+        output: 可选的预分配可写缓冲区
+
+    Returns:
+        明文所在的 memoryview
+
+    Raises:
+        ValueError: 格式错误、密钥错误、数据被篡改或被截断（任一块验证失败即报错）
+    """
+    source = memoryview(data).cast('B')
+    header, info, key_bytes = _read_password_header(io.BytesIO(bytes(source[:HEADER_SIZE])).read,
+                                                    key, key_size)
+    chunk_size = info['chunk_size']
+
+    # 帧头很小，先顺序扫描一遍确定每帧位置，再并行验证解密
+    frames, position, final = [], len(header), False
+    while not final:
+        if len(source) - position < _FRAME.size:
+            raise ValueError("密文被截断")
+        flag, length = _FRAME.unpack_from(source, position)
+        index = len(frames)
+        if flag not in (0, 1) or length > chunk_size or (not flag and length != chunk_size):
+            raise ValueError(f"第 {index} 块的帧头无效")
+        start = position + _FRAME.size
+        if len(source) - start < length + TAG_SIZE:
+            raise ValueError("密文被截断")
+        final = bool(flag)
+        frames.append((index, final, start, length))
+        position = start + length + TAG_SIZE
+    if position != len(source):
+        raise ValueError("最后一块之后存在多余数据")
+
+    total = sum(length for *_, length in frames)
+    if output is None:
+        output = bytearray(total)
+    view = memoryview(output).cast('B')
+    if len(view) < total:
+        raise ValueError(f"输出缓冲区太小，至少需要 {total} 字节")
+    view = view[:total]
+
+    tasks = []
+    for index, final, start, length in frames:
+        offset = index * chunk_size
+        tasks.append((key_bytes, header, index, final, source[start:start + length + TAG_SIZE],
+                      view[offset:offset + length]))
+    _run_tasks(_open_into, tasks, workers)
+    return view
+
+
+def _run_tasks(func, tasks: list, workers) -> None:
+    """在共享线程池中执行全部任务（单线程或只有一块时直接执行），任一任务失败即抛出"""
+    workers = min(_resolve_workers(workers), len(tasks))
+    if workers <= 1:
+        for task in tasks:
+            func(*task)
+        return
+    executor = _get_executor(workers)
+    for future in [executor.submit(func, *task) for task in tasks]:
+        future.result()
+
+
+def encrypt_bytes(data: bytes, key: str, key_size: int = 32, chunk_size: int = CHUNK_SIZE,
+                  kdf: str = 'pbkdf2', cost: int = None) -> bytes:
+    """一次性加密字节串（格式与 encrypt_stream 相同）"""
+    return b''.join(encrypt_stream(io.BytesIO(data), key, key_size, chunk_size, kdf=kdf, cost=cost))
+
+
+def decrypt_bytes(data: bytes, key: str, key_size: int = None) -> bytes:
+    """一次性解密 encrypt_stream / encrypt_bytes 的输出"""
+    return b''.join(decrypt_stream(io.BytesIO(data), key, key_size))
+
+
+def encrypted_size(plaintext_size: int, chunk_size: int = CHUNK_SIZE) -> int:
+    """口令加密时明文长度对应的密文总长度（完整文件头 + 每帧固定开销）"""
+    frames = max(1, -(-plaintext_size // chunk_size))
+    return HEADER_SIZE + plaintext_size + frames * FRAME_OVERHEAD
+
+
+def benchmark(size_mb: int = 256, chunk_size: int = 1024 * 1024, workers_list=None) -> list:
+    """
+    比较不同线程数下并行加解密的吞吐量
+
+    Returns:
+        [{'workers', 'encrypt_mb_s', 'decrypt_mb_s'}, ...]
+    """
+    import time
+    data = get_random_bytes(size_mb * 1024 * 1024)
+    output = bytearray(encrypted_size(len(data), chunk_size))
+    plaintext = bytearray(len(data))
+    cpus = os.cpu_count() or 1
+    results = []
+    for workers in workers_list or sorted({1, 2, 4, cpus}):
+        started = time.perf_counter()
+        encrypted = encrypt_parallel(data, 'benchmark', chunk_size=chunk_size, workers=workers,
+                                     output=output)
+        middle = time.perf_counter()
+        decrypt_parallel(encrypted, 'benchmark', workers=workers, output=plaintext)
+        finished = time.perf_counter()
+        results.append({
+            'workers': workers,
+            'encrypt_mb_s': round(size_mb / (middle - started), 1),
+            'decrypt_mb_s': round(size_mb / (finished - middle), 1)
+        })
+    return results
+
+
+if __name__ == '__main__':
+    import sys
+    if '--benchmark' in sys.argv:
+        args = [arg for arg in sys.argv[1:] if arg != '--benchmark']
+        size_mb = int(args[0]) if args else 256
+        print(f"AES-GCM 并行加解密吞吐量（{size_mb}MB，CPU核数 {os.cpu_count()}）")
+        for row in benchmark(size_mb):
+            print(f"  线程 {row['workers']:<3} 加密 {row['encrypt_mb_s']:8.1f} MB/s  "
+                  f"解密 {row['decrypt_mb_s']:8.1f} MB/s")
+    else:
+        print("用法: python -m crypto_modern.aes_stream --benchmark [MB]")
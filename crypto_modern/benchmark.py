@@ -0,0 +1,115 @@
+"""
+现代密码算法性能测试
+用法: python -m crypto_modern.benchmark batch [消息数]
+      python -m crypto_modern.benchmark ecc [次数]
+    batch  比较 AES/DES 逐条调用与批量接口的吞吐量
+    ecc    比较 RSA 与 Ed25519 / P-256 的密钥生成、签名、验签延迟
+"""
+import sys
+import time
+
+from crypto_modern import aes_cipher, des_cipher, ecc_cipher, rsa_cipher
+
+
+def _rate(func, count: int) -> float:
+    """执行 func 并返回每秒处理的消息数"""
+    started = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - started)
+
+
+def benchmark_batch(count: int = 20000, size: int = 64) -> list:
+    """
+    比较逐条调用与批量接口的加解密吞吐量（同一口令，派生密钥已缓存）
+
+    Args:
+        count: 消息数
+        size: 每条消息的字节数
+
+    Returns:
+        [{'algorithm', 'operation', 'per_call', 'batch', 'speedup'}, ...]（单位：条/秒）
+    """
+    messages = [f'{index:08d}'.ljust(size, 'x') for index in range(count)]
+    cases = [
+        ('AES', lambda texts: [aes_cipher.encrypt(text, 'benchmark') for text in texts],
+         lambda texts: aes_cipher.encrypt_batch(texts, 'benchmark'),
+         lambda texts: [aes_cipher.decrypt(text, 'benchmark') for text in texts],
+         lambda texts: aes_cipher.decrypt_batch(texts, 'benchmark')),
+        ('DES', lambda texts: [des_cipher.encrypt(text, 'benchmark') for text in texts],
+         lambda texts: des_cipher.encrypt_batch(texts, 'benchmark'),
+         lambda texts: [des_cipher.decrypt(text, 'benchmark') for text in texts],
+         lambda texts: des_cipher.decrypt_batch(texts, 'benchmark')),
+    ]
+    results = []
+    for name, encrypt_each, encrypt_all, decrypt_each, decrypt_all in cases:
+        encrypt_each(messages[:1])  # 预先派生密钥，只比较加解密本身
+        encrypted = encrypt_all(messages)
+        for operation, each, batch, data in (('encrypt', encrypt_each, encrypt_all, messages),
+                                            ('decrypt', decrypt_each, decrypt_all, encrypted)):
+            per_call = _rate(lambda: each(data), count)
+            batched = _rate(lambda: batch(data), count)
+            results.append({
+                'algorithm': name,
+                'operation': operation,
+                'per_call': round(per_call),
+                'batch': round(batched),
+                'speedup': round(batched / per_call, 2)
+            })
+    return results
+
+
+def _latency(func, repeat: int) -> float:
+    """平均每次调用的耗时（毫秒）"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def benchmark_ecc(repeat: int = 50, rsa_sizes=(2048, 3072)) -> list:
+    """
+    比较 RSA 与椭圆曲线算法的延迟（签名/验签使用已缓存的解析密钥，与接口的实际路径一致）
+
+    Args:
+        repeat: 签名/验签的重复次数（RSA 密钥生成只重复少量次数）
+        rsa_sizes: 参与比较的RSA密钥长度
+
+    Returns:
+        [{'algorithm', 'keygen_ms', 'sign_ms', 'verify_ms'}, ...]
+    """
+    message = 'benchmark message'
+    cases = [(f'RSA-{size}', lambda size=size: rsa_cipher.RSAKeyPair(size), rsa_cipher,
+              max(1, repeat // 25)) for size in rsa_sizes]
+    cases += [(name, lambda curve=curve: ecc_cipher.ECCKeyPair(curve), ecc_cipher, repeat)
+              for name, curve in (('Ed25519', 'ed25519'), ('P-256', 'p256'))]
+    results = []
+    for name, generate, module, keygen_repeat in cases:
+        keygen_ms = _latency(generate, keygen_repeat)
+        keypair = generate()
+        private_pem, public_pem = keypair.get_private_key_pem(), keypair.get_public_key_pem()
+        signature = module.sign(message, private_pem)
+        results.append({
+            'algorithm': name,
+            'keygen_ms': round(keygen_ms, 3),
+            'sign_ms': round(_latency(lambda: module.sign(message, private_pem), repeat), 3),
+            'verify_ms': round(_latency(lambda: module.verify(message, signature, public_pem), repeat), 3)
+        })
+    return results
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if args and args[0] == 'batch':
+        count = int(args[1]) if len(args) > 1 else 20000
+        print(f"AES/DES 批量接口吞吐量（{count} 条 64 字节消息）")
+        for row in benchmark_batch(count):
+            print(f"  {row['algorithm']} {row['operation']:<8} 逐条 {row['per_call']:>9} 条/秒  "
+                  f"批量 {row['batch']:>9} 条/秒  提升 {row['speedup']}x")
+    elif args and args[0] == 'ecc':
+        repeat = int(args[1]) if len(args) > 1 else 50
+        print(f"RSA 与椭圆曲线延迟对比（毫秒，签名/验签重复 {repeat} 次）")
+        for row in benchmark_ecc(repeat):
+            print(f"  {row['algorithm']:<9} 密钥生成 {row['keygen_ms']:>9.3f}  "
+                  f"签名 {row['sign_ms']:>7.3f}  验签 {row['verify_ms']:>7.3f}")
+    else:
+        print(__doc__.strip())
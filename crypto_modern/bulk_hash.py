@@ -0,0 +1,221 @@
+"""
+批量文件摘要与增量清单
+对一个目录树（如 outputs/ 下的大量分片 .bin 文件）做完整性巡检时，逐个文件、每次读4KB
+计算摘要非常慢。这里：
+- 用线程池并发计算多个文件的摘要（hashlib 处理大块数据时释放GIL，读文件同样不占GIL），
+  每个线程复用自己的大读缓冲区（readinto，不为每块分配新对象）；
+- 结果写入清单文件（JSON Lines，每行 path、size、mtime_ns、digest），按路径排序，
+  先写临时文件再原子替换；
+- 再次扫描时，大小和修改时间都与上次清单一致的文件直接沿用旧摘要，只对新增或变化的文件重新计算。
+
+清单第一行为 {"version", "algorithm"}，算法变化时全部重新计算。
+用法: python -m crypto_modern.bulk_hash 目录 [--manifest 路径] [--workers N] [--algorithm sha256]
+                                       [--pattern *.bin] [--rehash]
+"""
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from crypto_modern.multi_hash import ALGORITHMS
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = 'hash_manifest.jsonl'
+
+# 每个线程的读缓冲区大小
+BUFFER_SIZE = 1024 * 1024
+
+# 每个线程最多排队的任务数（文件很多时不一次性创建全部 Future）
+_QUEUE_PER_WORKER = 4
+
+
+def scan(root: str, pattern: str = '*.bin', exclude: tuple = ()):
+    """
+    递归列出目录下匹配的普通文件（不跟随符号链接）
+
+    Args:
+        root: 根目录
+        pattern: 文件名通配符（None表示全部文件）
+        exclude: 要跳过的绝对路径
+
+    Yields:
+        (相对路径（以 / 分隔）, os.stat_result)
+    """
+    root = os.path.abspath(root)
+    excluded = {os.path.abspath(path) for path in exclude}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif (entry.is_file(follow_symlinks=False) and entry.path not in excluded
+                  and (pattern is None or fnmatch.fnmatch(entry.name, pattern))):
+                try:
+                    info = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                yield os.path.relpath(entry.path, root).replace(os.sep, '/'), info
+
+
+def load_manifest(path: str) -> tuple:
+    """
+    读取清单
+
+    Returns:
+        (算法名, {相对路径: {'path', 'size', 'mtime_ns', 'digest'}})，文件不存在时为 (None, {})
+    """
+    if not os.path.exists(path):
+        return None, {}
+    entries = {}
+    with open(path, encoding='utf-8') as f:
+        header = json.loads(f.readline() or '{}')
+        if header.get('version') != MANIFEST_VERSION:
+            return None, {}
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entries[entry['path']] = entry
+    return header.get('algorithm'), entries
+
+
+def write_manifest(path: str, algorithm: str, entries: dict):
+    """按路径排序写入清单（临时文件 + 原子替换）"""
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'version': MANIFEST_VERSION, 'algorithm': algorithm}) + '\n')
+        for name in sorted(entries):
+            entry = entries[name]
+            f.write(json.dumps({'path': name, 'size': entry['size'], 'mtime_ns': entry['mtime_ns'],
+                                'digest': entry['digest']}, ensure_ascii=False) + '\n')
+    os.replace(tmp, path)
+
+
+def _make_hasher(algorithm: str, buffer_size: int):
+    """返回在线程池中使用的单文件摘要函数（每个线程一个可复用缓冲区）"""
+    local = threading.local()
+
+    def hash_one(path: str) -> str:
+        view = getattr(local, 'view', None)
+        if view is None:
+            view = local.view = memoryview(bytearray(buffer_size))
+        h = hashlib.new(algorithm)
+        with open(path, 'rb', buffering=0) as f:
+            count = f.readinto(view)
+            while count:
+                h.update(view[:count])
+                count = f.readinto(view)
+        return h.hexdigest()
+
+    return hash_one
+
+
+def hash_tree(root: str, manifest_path: str = None, algorithm: str = 'sha256', workers: int = None,
+              pattern: str = '*.bin', buffer_size: int = BUFFER_SIZE, rehash: bool = False) -> dict:
+    """
+    并发计算目录下文件的摘要并更新清单（增量）
+
+    Args:
+        root: 根目录
+        manifest_path: 清单路径（None表示 根目录/hash_manifest.jsonl）
+        algorithm: 摘要算法（md5、sha256、sha3_256、blake2b）
+        workers: 线程数（None表示 min(32, CPU核数 + 4)，读文件为I/O密集任务）
+        pattern: 文件名通配符
+        buffer_size: 每个线程的读缓冲区大小
+        rehash: 为True时忽略旧清单，全部重新计算
+
+    Returns:
+        {'manifest', 'files', 'hashed', 'skipped', 'removed', 'errors': [{'path', 'error'}],
+         'bytes_hashed', 'elapsed', 'mb_per_second'}
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"不支持的摘要算法: {algorithm}（可选 {', '.join(ALGORITHMS)}）")
+    if not os.path.isdir(root):
+        raise ValueError(f"目录不存在: {root}")
+    manifest_path = manifest_path or os.path.join(root, MANIFEST_NAME)
+    started = time.perf_counter()
+
+    previous_algorithm, previous = load_manifest(manifest_path)
+    if rehash or previous_algorithm != algorithm:
+        previous = {}
+
+    entries, todo, seen = {}, [], set()
+    for name, info in scan(root, pattern, exclude=(manifest_path,)):
+        seen.add(name)
+        old = previous.get(name)
+        if old is not None and old['size'] == info.st_size and old['mtime_ns'] == info.st_mtime_ns:
+            entries[name] = old
+        else:
+            todo.append((name, info))
+    skipped = len(entries)
+    removed = sum(1 for name in previous if name not in seen)
+
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    hash_one = _make_hasher(algorithm, buffer_size)
+    errors, bytes_hashed = [], 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-hash') as executor:
+        window = deque()
+        limit = workers * _QUEUE_PER_WORKER
+
+        def drain(count: int):
+            nonlocal bytes_hashed
+            while len(window) > count:
+                name, info, future = window.popleft()
+                try:
+                    digest = future.result()
+                except OSError as e:
+                    errors.append({'path': name, 'error': str(e)})
+                    continue
+                entries[name] = {'path': name, 'size': info.st_size, 'mtime_ns': info.st_mtime_ns,
+                                 'digest': digest}
+                bytes_hashed += info.st_size
+
+        for name, info in todo:
+            window.append((name, info, executor.submit(hash_one, os.path.join(root, name))))
+            drain(limit)
+        drain(0)
+
+    write_manifest(manifest_path, algorithm, entries)
+    elapsed = time.perf_counter() - started
+    return {
+        'manifest': manifest_path,
+        'files': len(entries),
+        'hashed': len(entries) - skipped,
+        'skipped': skipped,
+        'removed': removed,
+        'errors': errors,
+        'bytes_hashed': bytes_hashed,
+        'elapsed': round(elapsed, 3),
+        'mb_per_second': round(bytes_hashed / (1024 * 1024) / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='批量计算文件摘要并增量更新清单')
+    parser.add_argument('root', help='要扫描的目录（如 outputs）')
+    parser.add_argument('--manifest', help=f'清单路径（默认 目录/{MANIFEST_NAME}）')
+    parser.add_argument('--workers', type=int, help='线程数')
+    parser.add_argument('--algorithm', default='sha256', choices=ALGORITHMS)
+    parser.add_argument('--pattern', default='*.bin', help='文件名通配符（默认 *.bin）')
+    parser.add_argument('--buffer-size', type=int, default=BUFFER_SIZE, help='每个线程的读缓冲区字节数')
+    parser.add_argument('--rehash', action='store_true', help='忽略旧清单，全部重新计算')
+    args = parser.parse_args()
+
+    result = hash_tree(args.root, args.manifest, args.algorithm, args.workers, args.pattern,
+                       args.buffer_size, args.rehash)
+    print(f"清单: {result['manifest']}")
+    print(f"文件 {result['files']}，重新计算 {result['hashed']}，沿用 {result['skipped']}，"
+          f"已删除 {result['removed']}，失败 {len(result['errors'])}")
+    print(f"读取 {result['bytes_hashed'] / (1024 * 1024):.1f}MB，耗时 {result['elapsed']} 秒，"
+          f"{result['mb_per_second']} MB/s")
+    for error in result['errors'][:20]:
+        print(f"  失败 {error['path']}: {error['error']}")
@@ -0,0 +1,196 @@
+"""
+CBC 批量加解密
+同一密钥加解密大量短消息时，逐条调用需要为每条消息新建 cipher 对象（重新扩展密钥）
+并逐条生成IV。这里只创建一个 ECB 对象，把所有消息按分组位置“横向”拼接：
+
+- 加密：CBC 每条消息内部是串行的，但不同消息互不依赖。消息按长度降序排列后，
+  第 j 个分组位置上仍有数据的消息恰好是前若干条，把它们的 (P_j xor C_{j-1})
+  拼成一段交给 ECB 一次加密，循环次数只等于最长消息的分组数；
+- 解密：P_j = D(C_j) xor C_{j-1} 没有依赖，全部分组一次 ECB 解密后向量化异或。
+
+超过 LONG_MESSAGE_BLOCKS 个分组的长消息直接用 CBC 对象处理（C 实现内部串行已足够快），
+避免单条长消息拉长横向循环。
+
+decrypt_texts 是 AES/DES 的 decrypt_batch 共用的实现：按派生参数头部分组，
+每组只派生一次密钥
+"""
+import base64
+
+import numpy as np
+
+from Crypto.Util.Padding import pad, unpad
+
+from crypto_modern import kdf as kdf_module
+
+# 超过该分组数的消息单独处理
+LONG_MESSAGE_BLOCKS = 64
+
+# 一个批次内最多派生的密钥数（不同的派生头部数），防止每条密文各带一个头部放大派生开销
+MAX_KEY_DERIVATIONS = 16
+
+
+def encrypt_many(algorithm, key: bytes, messages: list, ivs: bytes) -> list:
+    """
+    用同一密钥对多条消息做 CBC 加密（PKCS#7 填充）
+
+    Args:
+        algorithm: 分组密码模块（Crypto.Cipher.AES 或 Crypto.Cipher.DES）
+        key: 密钥
+        messages: 明文字节串列表
+        ivs: 所有消息的IV拼接（长度为 block_size * len(messages)）
+
+    Returns:
+        每条消息的 IV + 密文
+    """
+    block_size = algorithm.block_size
+    padded = [pad(message, block_size) for message in messages]
+    results = [None] * len(messages)
+
+    short = []
+    for index, data in enumerate(padded):
+        iv = ivs[index * block_size:(index + 1) * block_size]
+        if len(data) // block_size > LONG_MESSAGE_BLOCKS:
+            results[index] = iv + algorithm.new(key, algorithm.MODE_CBC, iv).encrypt(data)
+        else:
+            short.append(index)
+    if not short:
+        return results
+
+    # 按分组数降序排列，第 j 个位置上有数据的消息是前 active[j] 条
+    short.sort(key=lambda index: -len(padded[index]))
+    counts = np.array([len(padded[index]) // block_size for index in short])
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    plain = np.frombuffer(b''.join(padded[index] for index in short),
+                          dtype=np.uint8).reshape(-1, block_size)
+    cipher_blocks = np.empty_like(plain)
+    previous = np.frombuffer(b''.join(ivs[index * block_size:(index + 1) * block_size]
+                                      for index in short), dtype=np.uint8).reshape(-1, block_size).copy()
+
+    ecb = algorithm.new(key, algorithm.MODE_ECB)
+    for position in range(int(counts[0])):
+        active = int(np.count_nonzero(counts > position))
+        rows = starts[:active] + position
+        block = np.frombuffer(ecb.encrypt((plain[rows] ^ previous[:active]).tobytes()),
+                              dtype=np.uint8).reshape(-1, block_size)
+        cipher_blocks[rows] = block
+        previous[:active] = block
+
+    for order, index in enumerate(short):
+        start = int(starts[order])
+        iv = ivs[index * block_size:(index + 1) * block_size]
+        results[index] = iv + cipher_blocks[start:start + int(counts[order])].tobytes()
+    return results
+
+
+def decrypt_many(algorithm, key: bytes, encrypted: list) -> list:
+    """
+    用同一密钥对多条 IV + 密文 做 CBC 解密并去除填充
+
+    Args:
+        algorithm: 分组密码模块（Crypto.Cipher.AES 或 Crypto.Cipher.DES）
+        key: 密钥
+        encrypted: 每条消息的 IV + 密文
+
+    Returns:
+        明文字节串列表，格式或填充错误的条目为 ValueError 实例
+    """
+    block_size = algorithm.block_size
+    results = [None] * len(encrypted)
+    valid = []
+    for index, data in enumerate(encrypted):
+        if len(data) < 2 * block_size or len(data) % block_size:
+            results[index] = ValueError("密文长度不正确")
+        else:
+            valid.append(index)
+    if not valid:
+        return results
+
+    blocks = np.frombuffer(b''.join(encrypted[index] for index in valid),
+                           dtype=np.uint8).reshape(-1, block_size)
+    counts = np.array([len(encrypted[index]) // block_size for index in valid])
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    # 每条消息第一个分组是IV，其余分组都需要解密
+    is_iv = np.zeros(len(blocks), dtype=bool)
+    is_iv[starts] = True
+    rows = np.flatnonzero(~is_iv)
+
+    ecb = algorithm.new(key, algorithm.MODE_ECB)
+    decrypted = np.frombuffer(ecb.decrypt(blocks[rows].tobytes()),
+                              dtype=np.uint8).reshape(-1, block_size)
+    plain = np.empty_like(blocks)
+    plain[rows] = decrypted ^ blocks[rows - 1]
+
+    for order, index in enumerate(valid):
+        start = int(starts[order])
+        try:
+            results[index] = unpad(plain[start + 1:start + int(counts[order])].tobytes(), block_size)
+        except ValueError as e:
+            results[index] = e
+    return results
+
+
+def decrypt_texts(algorithm, ciphertexts: list, key: str, key_size: int, legacy_key: bytes,
+                  return_exceptions: bool = False) -> list:
+    """
+    用同一口令批量解密 Base64 密文（新旧格式可以混合，相同派生头部的密文共用一次密钥派生）
+
+    Args:
+        algorithm: 分组密码模块（Crypto.Cipher.AES 或 Crypto.Cipher.DES）
+        ciphertexts: Base64编码的密文列表
+        key: 口令
+        key_size: 派生的密钥字节数
+        legacy_key: 旧格式（无派生头部）使用的密钥
+        return_exceptions: 为True时失败的条目以 ValueError 实例返回，否则抛出第一个错误
+
+    Returns:
+        明文列表
+
+    Raises:
+        ValueError: return_exceptions 为False且任一条解密失败（错误信息包含序号）
+    """
+    results = [None] * len(ciphertexts)
+    encrypted = [b''] * len(ciphertexts)
+    groups = {}
+    for index, text in enumerate(ciphertexts):
+        try:
+            encrypted[index] = data = base64.b64decode(text)
+        except (ValueError, TypeError) as e:
+            results[index] = ValueError(str(e))
+            continue
+        header = data[:kdf_module.HEADER_SIZE] if kdf_module.has_header(data) else b''
+        groups.setdefault(header, []).append(index)
+
+    derivations = 0
+    for header, indices in groups.items():
+        try:
+            if header:
+                derivations += 1
+                if derivations > MAX_KEY_DERIVATIONS:
+                    raise ValueError(f"同一批次中不同的密钥派生头部不能超过 {MAX_KEY_DERIVATIONS} 个")
+                salt, params = kdf_module.parse_header(header)
+                key_bytes = kdf_module.derive_key(key, salt, params, key_size)
+            else:
+                key_bytes = legacy_key
+            plaintexts = decrypt_many(algorithm, key_bytes,
+                                      [encrypted[index][len(header):] for index in indices])
+        except ValueError as e:
+            plaintexts = [e] * len(indices)
+
+        for index, plaintext in zip(indices, plaintexts):
+            if isinstance(plaintext, Exception) and header:
+                # 旧格式密文的IV恰好以头部标识开头（概率约 2^-32）：按旧格式再试一次
+                legacy = decrypt_many(algorithm, legacy_key, [encrypted[index]])[0]
+                if not isinstance(legacy, Exception):
+                    plaintext = legacy
+            if not isinstance(plaintext, Exception):
+                try:
+                    plaintext = plaintext.decode()
+                except ValueError as e:
+                    plaintext = e
+            results[index] = plaintext
+
+    if not return_exceptions:
+        for index, result in enumerate(results):
+            if isinstance(result, Exception):
+                raise ValueError(f"第 {index} 条解密失败: {result}")
+    return results
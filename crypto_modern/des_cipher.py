@@ -1,12 +1,17 @@
 """
 DES对称加密算法 (Data Encryption Standard)
 使用PyCryptodome库实现
+
+密钥派生和密文格式与 aes_cipher 相同（默认 PBKDF2，kdf=None 为旧格式，解密自动识别）
 """
 from Crypto.Cipher import DES
 from Crypto.Random import get_random_bytes
 from Crypto.Util.Padding import pad, unpad
 import base64
 
+from crypto_modern import kdf as kdf_module
+from crypto_modern.cbc_batch import encrypt_many, decrypt_texts
+
 
 def _ensure_8_bytes(key: str) -> bytes:
     """确保密钥为8字节"""
@@ -18,18 +23,24 @@ def _ensure_8_bytes(key: str) -> bytes:
     return key_bytes
 
 
-def encrypt(plaintext: str, key: str) -> str:
+def encrypt(plaintext: str, key: str, kdf: str = 'pbkdf2', cost: int = None) -> str:
     """
     DES加密
     
     Args:
         plaintext: 明文
-        key: 密钥（会自动填充或截断到8字节）
+        key: 口令
+        kdf: 密钥派生算法（'pbkdf2'、'scrypt'，None表示旧格式：口令自动填充或截断到8字节）
+        cost: 派生强度（PBKDF2 迭代次数或 scrypt 的 N）
     
     Returns:
-        Base64编码的密文（包含IV）
+        Base64编码的密文（包含派生参数头部和IV）
     """
-    key_bytes = _ensure_8_bytes(key)
+    if kdf:
+        header, key_bytes = kdf_module.derive_for_encryption(
+            key, 8, kdf_module.default_params(kdf, cost))
+    else:
+        header, key_bytes = b'', _ensure_8_bytes(key)
     cipher = DES.new(key_bytes, DES.MODE_CBC)
     iv = cipher.iv
     
@@ -37,31 +48,91 @@ def encrypt(plaintext: str, key: str) -> str:
     padded_plaintext = pad(plaintext_bytes, DES.block_size)
     ciphertext = cipher.encrypt(padded_plaintext)
     
-    # 将IV和密文组合，然后Base64编码
-    encrypted_data = iv + ciphertext
+    # 将头部、IV和密文组合，然后Base64编码
+    encrypted_data = header + iv + ciphertext
     return base64.b64encode(encrypted_data).decode()
 
 
+def _decrypt_raw(encrypted_data: bytes, key_bytes: bytes) -> str:
+    iv = encrypted_data[:8]
+    ciphertext = encrypted_data[8:]
+    
+    cipher = DES.new(key_bytes, DES.MODE_CBC, iv)
+    padded_plaintext = cipher.decrypt(ciphertext)
+    plaintext = unpad(padded_plaintext, DES.block_size)
+    
+    return plaintext.decode()
+
+
 def decrypt(ciphertext_b64: str, key: str) -> str:
     """
     DES解密
     
     Args:
-        ciphertext_b64: Base64编码的密文
-        key: 密钥
+        ciphertext_b64: Base64编码的密文（新格式或旧格式）
+        key: 口令
     
     Returns:
         明文
     """
-    key_bytes = _ensure_8_bytes(key)
     encrypted_data = base64.b64decode(ciphertext_b64)
+    legacy_key = _ensure_8_bytes(key)
+    if not kdf_module.has_header(encrypted_data):
+        return _decrypt_raw(encrypted_data, legacy_key)
     
-    # 提取IV和密文
-    iv = encrypted_data[:8]
-    ciphertext = encrypted_data[8:]
-    
-    cipher = DES.new(key_bytes, DES.MODE_CBC, iv)
-    padded_plaintext = cipher.decrypt(ciphertext)
-    plaintext = unpad(padded_plaintext, DES.block_size)
-    
-    return plaintext.decode()
+    try:
+        salt, params = kdf_module.parse_header(encrypted_data)
+        key_bytes = kdf_module.derive_key(key, salt, params, 8)
+        return _decrypt_raw(encrypted_data[kdf_module.HEADER_SIZE:], key_bytes)
+    except ValueError:
+        # 旧格式密文的IV恰好以头部标识开头（概率约 2^-32）
+        try:
+            return _decrypt_raw(encrypted_data, legacy_key)
+        except ValueError:
+            pass
+        raise
+
+
+def encrypt_batch(plaintexts: list, key: str, kdf: str = 'pbkdf2',
+                  cost: int = None) -> list:
+    """
+    用同一口令批量加密多条消息（输出格式与 encrypt 相同，可逐条用 decrypt 解密）
+
+    密钥只派生和扩展一次，所有IV由一次 get_random_bytes 生成，
+    各消息的 CBC 加密按分组位置横向合并为少量 ECB 调用（见 cbc_batch.py）
+
+    Args:
+        plaintexts: 明文列表
+        key: 口令
+        kdf: 密钥派生算法（None表示旧格式）
+        cost: 派生强度
+
+    Returns:
+        Base64编码的密文列表
+    """
+    if kdf:
+        header, key_bytes = kdf_module.derive_for_encryption(
+            key, 8, kdf_module.default_params(kdf, cost))
+    else:
+        header, key_bytes = b'', _ensure_8_bytes(key)
+    ivs = get_random_bytes(DES.block_size * len(plaintexts))
+    encrypted = encrypt_many(DES, key_bytes, [text.encode() for text in plaintexts], ivs)
+    return [base64.b64encode(header + data).decode() for data in encrypted]
+
+
+def decrypt_batch(ciphertexts: list, key: str, return_exceptions: bool = False) -> list:
+    """
+    用同一口令批量解密（新旧格式可以混合，相同派生头部的密文共用一次密钥派生，见 cbc_batch.decrypt_texts）
+
+    Args:
+        ciphertexts: Base64编码的密文列表
+        key: 口令
+        return_exceptions: 为True时失败的条目以 ValueError 实例返回，不抛出异常
+
+    Returns:
+        明文列表
+
+    Raises:
+        ValueError: return_exceptions 为False且任一条解密失败（错误信息包含序号）
+    """
+    return decrypt_texts(DES, ciphertexts, key, 8, _ensure_8_bytes(key), return_exceptions)
@@ -0,0 +1,214 @@
+"""
+椭圆曲线密码 (Elliptic Curve Cryptography)
+使用PyCryptodome的ECC模块实现 Ed25519 与 NIST P-256：
+- 密钥生成：比同等安全强度的RSA快几个数量级；
+- 签名/验签：Ed25519 使用 RFC 8032 EdDSA，P-256 使用 ECDSA (FIPS 186-3) + SHA-256；
+- ECIES 混合加密（仅 P-256）：临时密钥与接收者公钥做 ECDH，共享点的 x 坐标经
+  HKDF-SHA256 派生 AES-256 密钥，再用 AES-GCM 加密正文。
+
+ECIES 密文格式：
+    magic(4) = b'ISEC' | version(1) | 临时公钥(65，SEC1非压缩格式) | nonce(12) | tag(16) | 密文
+文件头和临时公钥同时作为 GCM 的附加认证数据
+"""
+import base64
+
+from Crypto.Cipher import AES
+from Crypto.Hash import SHA256
+from Crypto.Protocol.KDF import HKDF
+from Crypto.PublicKey import ECC
+from Crypto.Random import get_random_bytes
+from Crypto.Signature import DSS, eddsa
+
+from crypto_modern.rsa_cipher import KeyCache
+
+# 接口中的曲线名 -> PyCryptodome 曲线名
+CURVES = {'ed25519': 'Ed25519', 'p256': 'P-256'}
+
+MAGIC = b'ISEC'
+VERSION = 1
+HKDF_INFO = b'info-security-system ecies p256'
+
+_P256_BYTES = 32
+_POINT_SIZE = 1 + 2 * _P256_BYTES
+_NONCE_SIZE = 12
+_TAG_SIZE = 16
+_PREFIX_SIZE = len(MAGIC) + 1 + _POINT_SIZE
+
+
+class ECCKeyPair:
+    """椭圆曲线密钥对管理"""
+
+    def __init__(self, curve: str = 'ed25519'):
+        """
+        生成密钥对
+
+        Args:
+            curve: 'ed25519' 或 'p256'
+        """
+        if curve not in CURVES:
+            raise ValueError(f"不支持的曲线: {curve}")
+        self.curve = curve
+        self.key = ECC.generate(curve=CURVES[curve])
+        self.public_key = self.key.public_key()
+
+    def get_public_key_pem(self) -> str:
+        """获取公钥（PEM格式）"""
+        return self.public_key.export_key(format='PEM')
+
+    def get_private_key_pem(self) -> str:
+        """获取私钥（PKCS#8 PEM格式）"""
+        return self.key.export_key(format='PEM')
+
+
+# 解析后的密钥按 PEM 的 SHA-256 摘要缓存，被淘汰的私钥在不再被使用后清零（与RSA共用实现）
+key_cache = KeyCache(importer=ECC.import_key)
+
+
+def _is_ed25519(key) -> bool:
+    return key.curve == 'Ed25519'
+
+
+def _is_p256(key) -> bool:
+    # PyCryptodome 对 P-256 密钥报告的曲线名
+    return key.curve == 'NIST P-256'
+
+
+def sign(message: str, private_key_pem: str) -> str:
+    """
+    ECC签名
+
+    Args:
+        message: 要签名的消息
+        private_key_pem: Ed25519 或 P-256 私钥（PEM格式）
+
+    Returns:
+        Base64编码的签名
+    """
+    data = message.encode()
+    with key_cache.borrow(private_key_pem) as entry:
+        key = entry.key
+        if not key.has_private():
+            raise ValueError("签名需要私钥")
+        if _is_ed25519(key):
+            signature = eddsa.new(key, 'rfc8032').sign(data)
+        elif _is_p256(key):
+            signature = DSS.new(key, 'fips-186-3').sign(SHA256.new(data))
+        else:
+            raise ValueError(f"不支持的曲线: {key.curve}")
+    return base64.b64encode(signature).decode()
+
+
+def verify(message: str, signature_b64: str, public_key_pem: str) -> bool:
+    """
+    验证ECC签名
+
+    Args:
+        message: 原始消息
+        signature_b64: Base64编码的签名
+        public_key_pem: Ed25519 或 P-256 公钥（PEM格式）
+
+    Returns:
+        签名是否有效
+    """
+    data = message.encode()
+    signature = base64.b64decode(signature_b64)
+    with key_cache.borrow(public_key_pem) as entry:
+        key = entry.key
+        if _is_ed25519(key):
+            verifier, digest = eddsa.new(key, 'rfc8032'), data
+        elif _is_p256(key):
+            verifier, digest = DSS.new(key, 'fips-186-3'), SHA256.new(data)
+        else:
+            raise ValueError(f"不支持的曲线: {key.curve}")
+        try:
+            verifier.verify(digest, signature)
+            return True
+        except ValueError:
+            return False
+
+
+def _encode_point(point) -> bytes:
+    """椭圆曲线点 -> SEC1 非压缩编码"""
+    return (b'\x04' + int(point.x).to_bytes(_P256_BYTES, 'big')
+            + int(point.y).to_bytes(_P256_BYTES, 'big'))
+
+
+def _decode_point(data: bytes):
+    """SEC1 非压缩编码 -> P-256 公钥（ECC.construct 会检查点是否在曲线上）"""
+    if len(data) != _POINT_SIZE or data[0] != 4:
+        raise ValueError("临时公钥格式无效")
+    x = int.from_bytes(data[1:1 + _P256_BYTES], 'big')
+    y = int.from_bytes(data[1 + _P256_BYTES:], 'big')
+    return ECC.construct(curve='P-256', point_x=x, point_y=y)
+
+
+def _derive_key(shared_point, ephemeral: bytes) -> bytes:
+    """ECDH 共享点的 x 坐标经 HKDF-SHA256 派生 AES-256 密钥（以临时公钥为盐）"""
+    shared = int(shared_point.x).to_bytes(_P256_BYTES, 'big')
+    return HKDF(shared, 32, ephemeral, SHA256, context=HKDF_INFO)
+
+
+def encrypt(plaintext: str, public_key_pem: str) -> str:
+    """
+    ECIES 加密（P-256）
+
+    Args:
+        plaintext: 明文
+        public_key_pem: 接收者 P-256 公钥（PEM格式）
+
+    Returns:
+        Base64编码的密文
+    """
+    ephemeral = ECC.generate(curve='P-256')
+    ephemeral_bytes = _encode_point(ephemeral.pointQ)
+    with key_cache.borrow(public_key_pem) as entry:
+        if not _is_p256(entry.key):
+            raise ValueError("ECIES 加密需要 P-256 公钥（Ed25519 仅用于签名）")
+        key = _derive_key(entry.key.pointQ * ephemeral.d, ephemeral_bytes)
+
+    prefix = MAGIC + bytes([VERSION]) + ephemeral_bytes
+    nonce = get_random_bytes(_NONCE_SIZE)
+    cipher = AES.new(key, AES.MODE_GCM, nonce=nonce, mac_len=_TAG_SIZE)
+    cipher.update(prefix)
+    ciphertext, tag = cipher.encrypt_and_digest(plaintext.encode())
+    return base64.b64encode(prefix + nonce + tag + ciphertext).decode()
+
+
+def decrypt(ciphertext_b64: str, private_key_pem: str) -> str:
+    """
+    ECIES 解密（P-256）
+
+    Args:
+        ciphertext_b64: Base64编码的密文
+        private_key_pem: 接收者 P-256 私钥（PEM格式）
+
+    Returns:
+        明文
+
+    Raises:
+        ValueError: 格式错误、密钥不匹配或数据被篡改
+    """
+    data = base64.b64decode(ciphertext_b64)
+    if len(data) < _PREFIX_SIZE + _NONCE_SIZE + _TAG_SIZE or data[:len(MAGIC)] != MAGIC:
+        raise ValueError("不是ECIES格式的密文")
+    if data[len(MAGIC)] != VERSION:
+        raise ValueError(f"不支持的格式版本: {data[len(MAGIC)]}")
+
+    prefix = data[:_PREFIX_SIZE]
+    ephemeral_bytes = prefix[len(MAGIC) + 1:]
+    ephemeral = _decode_point(ephemeral_bytes)
+    with key_cache.borrow(private_key_pem) as entry:
+        private_key = entry.key
+        if not _is_p256(private_key) or not private_key.has_private():
+            raise ValueError("ECIES 解密需要 P-256 私钥")
+        key = _derive_key(ephemeral.pointQ * private_key.d, ephemeral_bytes)
+
+    nonce = data[_PREFIX_SIZE:_PREFIX_SIZE + _NONCE_SIZE]
+    tag = data[_PREFIX_SIZE + _NONCE_SIZE:_PREFIX_SIZE + _NONCE_SIZE + _TAG_SIZE]
+    cipher = AES.new(key, AES.MODE_GCM, nonce=nonce, mac_len=_TAG_SIZE)
+    cipher.update(prefix)
+    try:
+        plaintext = cipher.decrypt_and_verify(data[_PREFIX_SIZE + _NONCE_SIZE + _TAG_SIZE:], tag)
+    except ValueError:
+        raise ValueError("解密失败：密钥不匹配或数据已被篡改")
+    return plaintext.decode()
@@ -0,0 +1,165 @@
+"""
+RSA 数字信封 (Hybrid RSA-OAEP + AES-256-GCM)
+直接用 PKCS1_OAEP 加密正文时，2048位密钥每块最多约190字节，长消息要拆成大量RSA运算。
+数字信封为每条消息随机生成一个 AES-256 密钥，用每个接收者的公钥各做一次 OAEP 包装，
+正文用 aes_stream 的分块 AES-GCM 格式加密，因此总开销为“接收者数 × 一次RSA运算 + 对称加密”，
+并且支持流式处理任意大小的文件。
+
+格式（整数均为大端序）：
+    magic(4) = b'ISEV' | version(1) | 接收者数(2)
+    每个接收者  key_id(8) | 包装密钥长度(2) | OAEP包装的AES密钥
+    之后为 aes_stream 数据密钥容器（基本文件头 + 数据帧，无密钥派生头部）
+
+key_id 为接收者公钥 DER 编码的 SHA-256 前8字节，解密时据此找到自己的包装密钥
+"""
+import base64
+import hashlib
+import io
+import struct
+
+from Crypto.Random import get_random_bytes
+
+from crypto_modern import aes_stream
+from crypto_modern.aes_stream import CHUNK_SIZE
+from crypto_modern.rsa_cipher import key_cache
+
+MAGIC = b'ISEV'
+VERSION = 1
+
+# 单个信封的接收者上限
+MAX_RECIPIENTS = 64
+
+KEY_ID_SIZE = 8
+
+_PREFIX = struct.Struct('>4sBH')
+_RECIPIENT = struct.Struct('>8sH')
+
+
+def key_id(entry) -> bytes:
+    """公钥标识：公钥 DER 编码的 SHA-256 前8字节"""
+    return hashlib.sha256(entry.key.publickey().export_key(format='DER')).digest()[:KEY_ID_SIZE]
+
+
+def _envelope_header(public_key_pems: list, data_key: bytes) -> bytes:
+    """为每个接收者包装数据密钥，生成信封头部"""
+    if isinstance(public_key_pems, str):
+        public_key_pems = [public_key_pems]
+    if not public_key_pems:
+        raise ValueError("至少需要一个接收者公钥")
+    if len(public_key_pems) > MAX_RECIPIENTS:
+        raise ValueError(f"接收者最多 {MAX_RECIPIENTS} 个")
+
+    parts = [_PREFIX.pack(MAGIC, VERSION, len(public_key_pems))]
+    for pem in public_key_pems:
+        with key_cache.borrow(pem) as entry:
+            wrapped = entry.oaep.encrypt(data_key)
+            parts.append(_RECIPIENT.pack(key_id(entry), len(wrapped)) + wrapped)
+    return b''.join(parts)
+
+
+def _read_exact(fileobj, size: int) -> bytes:
+    data = aes_stream._read_exact(fileobj, size)
+    if len(data) < size:
+        raise ValueError("信封数据被截断")
+    return data
+
+
+def _unwrap(fileobj, private_key_pem: str) -> bytes:
+    """读取信封头部，用私钥解开属于自己的数据密钥"""
+    magic, version, count = _PREFIX.unpack(_read_exact(fileobj, _PREFIX.size))
+    if magic != MAGIC:
+        raise ValueError("不是数字信封格式的数据")
+    if version != VERSION:
+        raise ValueError(f"不支持的信封版本: {version}")
+    if not 1 <= count <= MAX_RECIPIENTS:
+        raise ValueError("信封接收者数量无效")
+
+    with key_cache.borrow(private_key_pem) as entry:
+        if not entry.key.has_private():
+            raise ValueError("解密需要私钥")
+        own_id = key_id(entry)
+        data_key = None
+        # 读完全部接收者项，使文件位置停在对称密文的开头
+        for _ in range(count):
+            recipient_id, length = _RECIPIENT.unpack(_read_exact(fileobj, _RECIPIENT.size))
+            wrapped = _read_exact(fileobj, length)
+            if recipient_id == own_id and data_key is None:
+                data_key = entry.oaep.decrypt(wrapped)
+    if data_key is None:
+        raise ValueError("该私钥不是此信封的接收者")
+    return data_key
+
+
+def seal_stream(fileobj, public_key_pems: list, chunk_size: int = CHUNK_SIZE, workers: int = 1):
+    """
+    流式生成数字信封
+
+    Args:
+        fileobj: 明文文件对象（支持 read(n)）
+        public_key_pems: 接收者公钥（PEM格式）列表
+        chunk_size: 对称加密的块大小
+        workers: 对称加密的并行线程数
+
+    Yields:
+        信封字节块（第一块为信封头部）
+    """
+    data_key = get_random_bytes(32)
+    yield _envelope_header(public_key_pems, data_key)
+    yield from aes_stream.encrypt_stream_with_key(fileobj, data_key, chunk_size, workers=workers)
+
+
+def open_stream(fileobj, private_key_pem: str, workers: int = 1):
+    """
+    流式打开数字信封（每块验证通过后才输出）
+
+    Args:
+        fileobj: 信封文件对象
+        private_key_pem: 接收者私钥（PEM格式）
+        workers: 对称解密的并行线程数
+
+    Yields:
+        明文字节块
+
+    Raises:
+        ValueError: 格式错误、不是接收者或数据被篡改
+    """
+    data_key = _unwrap(fileobj, private_key_pem)
+    yield from aes_stream.decrypt_stream_with_key(fileobj, data_key, workers=workers)
+
+
+def seal_bytes(data: bytes, public_key_pems: list, chunk_size: int = CHUNK_SIZE) -> bytes:
+    """一次性生成数字信封"""
+    return b''.join(seal_stream(io.BytesIO(data), public_key_pems, chunk_size))
+
+
+def open_bytes(data: bytes, private_key_pem: str) -> bytes:
+    """一次性打开数字信封"""
+    return b''.join(open_stream(io.BytesIO(data), private_key_pem))
+
+
+def encrypt(plaintext: str, public_key_pems: list) -> str:
+    """
+    数字信封加密文本
+
+    Args:
+        plaintext: 明文（长度不受RSA分组大小限制）
+        public_key_pems: 接收者公钥（PEM格式）列表或单个公钥
+
+    Returns:
+        Base64编码的信封
+    """
+    return base64.b64encode(seal_bytes(plaintext.encode(), public_key_pems)).decode()
+
+
+def decrypt(envelope_b64: str, private_key_pem: str) -> str:
+    """
+    数字信封解密文本
+
+    Args:
+        envelope_b64: Base64编码的信封
+        private_key_pem: 任一接收者的私钥（PEM格式）
+
+    Returns:
+        明文
+    """
+    return open_bytes(base64.b64decode(envelope_b64), private_key_pem).decode()
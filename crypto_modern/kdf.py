@@ -0,0 +1,221 @@
+"""
+口令密钥派生 (Key Derivation Function)
+用 PBKDF2-HMAC-SHA256 或 scrypt 把口令派生为对称密钥，盐和派生参数写在密文头部，
+解密时从头部读取参数重新派生。
+
+派生一次需要约 100ms，因此进程内维护一个有容量上限、按时间过期的派生密钥缓存，
+缓存键为 (sha256(口令), 盐, 参数, 密钥长度)，不保存口令明文：
+- 解密同一口令和盐的密文时直接命中缓存；
+- 加密时同一口令在有效期内复用同一个盐（每条消息的IV仍然随机），因此也只派生一次。
+
+密文头部格式（整数均为大端序）：
+    magic(4) = b'ISKD' | algorithm(1) | cost(4) | r(1) | p(1) | salt(16)
+PBKDF2 的 cost 为迭代次数；scrypt 的 cost 为 N，r、p 为块大小和并行度
+"""
+import hashlib
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from Crypto.Random import get_random_bytes
+
+MAGIC = b'ISKD'
+
+ALGORITHMS = {'pbkdf2': 1, 'scrypt': 2}
+_ALGORITHM_NAMES = {value: name for name, value in ALGORITHMS.items()}
+
+# 默认派生参数（两者在普通服务器上都约为 100ms）
+DEFAULT_ALGORITHM = 'pbkdf2'
+PBKDF2_ITERATIONS = 200000
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+# 解密时接受的参数上限（均为默认参数的4倍），防止伪造的头部消耗过多CPU或内存：
+# PBKDF2 限制迭代次数；scrypt 的计算量与 N*r*p 成正比、内存与 128*r*N 成正比，
+# 因此限制 p 并限制 N*r*p 的总量（同时也限制了内存）
+MAX_PBKDF2_ITERATIONS = 4 * PBKDF2_ITERATIONS
+MAX_SCRYPT_P = 4
+MAX_SCRYPT_WORK = 4 * SCRYPT_N * SCRYPT_R * SCRYPT_P
+
+SALT_SIZE = 16
+
+_HEADER = struct.Struct('>4sBIBB16s')
+HEADER_SIZE = _HEADER.size
+
+# 派生密钥缓存配置
+CACHE_SIZE = 256
+CACHE_TTL = 600
+
+
+class DerivedKeyCache:
+    """线程安全的派生密钥缓存（LRU淘汰 + 按写入时间过期）"""
+
+    def __init__(self, max_entries: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        """
+        Args:
+            max_entries: 最多缓存的派生密钥数
+            ttl: 每项的有效期（秒）
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cache_key):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[cache_key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, cache_key, value):
+        with self._lock:
+            self._entries[cache_key] = (time.monotonic(), value)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+_cache = DerivedKeyCache()
+
+
+def get_cache() -> DerivedKeyCache:
+    """进程内共享的派生密钥缓存"""
+    return _cache
+
+
+def default_params(algorithm: str = DEFAULT_ALGORITHM, cost: int = None) -> tuple:
+    """
+    生成派生参数
+
+    Args:
+        algorithm: 'pbkdf2' 或 'scrypt'
+        cost: PBKDF2 迭代次数或 scrypt 的 N（默认使用模块常量）
+
+    Returns:
+        (algorithm, cost, r, p)
+    """
+    if algorithm == 'pbkdf2':
+        params = ('pbkdf2', int(cost or PBKDF2_ITERATIONS), 0, 0)
+    elif algorithm == 'scrypt':
+        params = ('scrypt', int(cost or SCRYPT_N), SCRYPT_R, SCRYPT_P)
+    else:
+        raise ValueError(f"不支持的密钥派生算法: {algorithm}")
+    _check_params(params)
+    return params
+
+
+def _check_params(params: tuple):
+    algorithm, cost, r, p = params
+    if algorithm == 'pbkdf2':
+        if not 1000 <= cost <= MAX_PBKDF2_ITERATIONS:
+            raise ValueError(f"PBKDF2 迭代次数必须在 1000-{MAX_PBKDF2_ITERATIONS} 之间")
+    else:
+        if cost < 2 ** 10 or cost & (cost - 1) or r < 1 or not 1 <= p <= MAX_SCRYPT_P:
+            raise ValueError(f"scrypt 参数无效（N 必须是不小于1024的2的幂，p 在 1-{MAX_SCRYPT_P} 之间）")
+        if cost * r * p > MAX_SCRYPT_WORK:
+            raise ValueError("scrypt 参数的计算量超出上限")
+
+
+def _derive(password: bytes, salt: bytes, params: tuple, key_size: int) -> bytes:
+    algorithm, cost, r, p = params
+    if algorithm == 'pbkdf2':
+        return hashlib.pbkdf2_hmac('sha256', password, salt, cost, key_size)
+    return hashlib.scrypt(password, salt=salt, n=cost, r=r, p=p, dklen=key_size,
+                          maxmem=2 * 128 * r * cost)
+
+
+def _password_bytes(password) -> bytes:
+    return password.encode() if isinstance(password, str) else password
+
+
+def derive_key(password, salt: bytes, params: tuple, key_size: int) -> bytes:
+    """
+    派生密钥（命中缓存时不重新计算）
+
+    Args:
+        password: 口令
+        salt: 盐
+        params: default_params() 或 parse_header() 返回的参数
+        key_size: 密钥字节数
+
+    Returns:
+        key_size 字节的密钥
+    """
+    password = _password_bytes(password)
+    cache_key = (hashlib.sha256(password).digest(), salt, params, key_size)
+    key = _cache.get(cache_key)
+    if key is None:
+        key = _derive(password, salt, params, key_size)
+        _cache.put(cache_key, key)
+    return key
+
+
+def derive_for_encryption(password, key_size: int, params: tuple = None) -> tuple:
+    """
+    为加密派生密钥：有效期内同一口令和参数复用上次的盐和密钥
+
+    Args:
+        password: 口令
+        key_size: 密钥字节数
+        params: 派生参数（默认 default_params()）
+
+    Returns:
+        (密文头部, 密钥)
+    """
+    params = params or default_params()
+    password = _password_bytes(password)
+    salt_key = ('salt', hashlib.sha256(password).digest(), params)
+    salt = _cache.get(salt_key)
+    if salt is None:
+        salt = get_random_bytes(SALT_SIZE)
+        _cache.put(salt_key, salt)
+    return make_header(salt, params), derive_key(password, salt, params, key_size)
+
+
+def make_header(salt: bytes, params: tuple) -> bytes:
+    algorithm, cost, r, p = params
+    return _HEADER.pack(MAGIC, ALGORITHMS[algorithm], cost, r, p, salt)
+
+
+def has_header(data: bytes) -> bool:
+    """数据是否以派生参数头部开头"""
+    return len(data) >= HEADER_SIZE and data[:len(MAGIC)] == MAGIC
+
+
+def parse_header(data: bytes) -> tuple:
+    """
+    解析密文头部
+
+    Returns:
+        (salt, params)
+
+    Raises:
+        ValueError: 头部无效或参数超出上限
+    """
+    if not has_header(data):
+        raise ValueError("缺少密钥派生头部")
+    _, algorithm, cost, r, p, salt = _HEADER.unpack(data[:HEADER_SIZE])
+    if algorithm not in _ALGORITHM_NAMES:
+        raise ValueError(f"未知的密钥派生算法: {algorithm}")
+    params = (_ALGORITHM_NAMES[algorithm], cost, r, p)
+    _check_params(params)
+    return salt, params
@@ -0,0 +1,172 @@
+"""
+单次读取的多摘要计算
+同一份数据需要多种摘要时（MD5、SHA-256、SHA3-256、BLAKE2b），逐个算法各读一遍的开销
+主要在I/O上。这里每读入一块就依次送入所有哈希对象，计算多个摘要只需读一遍数据：
+- 普通文件通过 mmap 映射后按块切片（memoryview，无拷贝）送入哈希；
+- 其他流（如请求体）用可复用的缓冲区 readinto 读取，不为每块分配新对象；
+- 块大小可调，较大的块能减少调用次数，hashlib 处理大块时会释放GIL
+"""
+import hashlib
+import io
+import mmap
+import os
+import stat
+import sys
+import time
+
+# 支持的摘要算法（hashlib 名称）
+ALGORITHMS = ('md5', 'sha256', 'sha3_256', 'blake2b')
+
+# 默认每次读取的字节数
+CHUNK_SIZE = 1024 * 1024
+
+# 允许的块大小范围
+MIN_CHUNK_SIZE = 4 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+class MultiHasher:
+    """同时维护多个哈希对象，update 一次送入全部算法"""
+
+    def __init__(self, algorithms=None):
+        """
+        Args:
+            algorithms: 算法名列表（None表示全部 ALGORITHMS）
+        """
+        algorithms = list(algorithms or ALGORITHMS)
+        unknown = [name for name in algorithms if name not in ALGORITHMS]
+        if unknown:
+            raise ValueError(f"不支持的摘要算法: {', '.join(unknown)}（可选 {', '.join(ALGORITHMS)}）")
+        self._hashes = {name: hashlib.new(name) for name in dict.fromkeys(algorithms)}
+        self.size = 0
+
+    def update(self, data):
+        for h in self._hashes.values():
+            h.update(data)
+        self.size += len(data)
+
+    def hexdigests(self) -> dict:
+        return {name: h.hexdigest() for name, h in self._hashes.items()}
+
+
+def _check_chunk_size(chunk_size: int):
+    if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+        raise ValueError(f"块大小必须在 {MIN_CHUNK_SIZE}-{MAX_CHUNK_SIZE} 字节之间")
+
+
+def _regular_fileno(fileobj):
+    """可以 mmap 的普通文件返回文件描述符，否则返回None"""
+    try:
+        fd = fileobj.fileno()
+        return fd if stat.S_ISREG(os.fstat(fd).st_mode) else None
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _feed_mapped(hasher: MultiHasher, fd: int, offset: int, chunk_size: int) -> bool:
+    """把文件从 offset 到末尾映射后按块送入哈希；文件为空或无法映射时返回False"""
+    length = os.fstat(fd).st_size - offset
+    if length <= 0 or offset % mmap.ALLOCATIONGRANULARITY:
+        return False
+    try:
+        mapped = mmap.mmap(fd, length, access=mmap.ACCESS_READ, offset=offset)
+    except (OSError, ValueError):
+        return False
+    try:
+        if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        with memoryview(mapped) as view:
+            for start in range(0, length, chunk_size):
+                with view[start:start + chunk_size] as chunk:
+                    hasher.update(chunk)
+    finally:
+        mapped.close()
+    return True
+
+
+def _feed_stream(hasher: MultiHasher, fileobj, chunk_size: int):
+    """用同一个缓冲区反复 readinto（不支持时退回 read）"""
+    buffer = bytearray(chunk_size)
+    with memoryview(buffer) as view:
+        try:
+            count = fileobj.readinto(view)
+        except (AttributeError, io.UnsupportedOperation):
+            for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+                hasher.update(chunk)
+            return
+        while count:
+            with view[:count] as chunk:
+                hasher.update(chunk)
+            count = fileobj.readinto(view)
+
+
+def _result(hasher: MultiHasher, chunk_size: int, mapped: bool, started: float) -> dict:
+    elapsed = time.perf_counter() - started
+    return {
+        'digests': hasher.hexdigests(),
+        'size': hasher.size,
+        'chunk_size': chunk_size,
+        'mmap': mapped,
+        'elapsed': round(elapsed, 4),
+        'mb_per_second': round(hasher.size / (1024 * 1024) / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+def hash_stream(fileobj, algorithms=None, chunk_size: int = CHUNK_SIZE, use_mmap: bool = True) -> dict:
+    """
+    读一遍文件对象，同时计算多个摘要
+
+    Args:
+        fileobj: 文件对象（普通文件从当前位置开始映射，其他流支持 readinto 或 read 即可）
+        algorithms: 算法名列表（None表示全部）
+        chunk_size: 每块字节数
+        use_mmap: 普通文件是否使用 mmap
+
+    Returns:
+        {'digests': {算法: 十六进制摘要}, 'size', 'chunk_size', 'mmap', 'elapsed', 'mb_per_second'}
+    """
+    _check_chunk_size(chunk_size)
+    hasher = MultiHasher(algorithms)
+    started = time.perf_counter()
+
+    fd = _regular_fileno(fileobj) if use_mmap else None
+    mapped = fd is not None and _feed_mapped(hasher, fd, fileobj.tell(), chunk_size)
+    if not mapped:
+        _feed_stream(hasher, fileobj, chunk_size)
+    return _result(hasher, chunk_size, mapped, started)
+
+
+def hash_file(filepath: str, algorithms=None, chunk_size: int = CHUNK_SIZE, use_mmap: bool = True) -> dict:
+    """
+    读一遍本地文件，同时计算多个摘要（默认使用 mmap）
+
+    Args:
+        filepath: 文件路径
+        algorithms: 算法名列表（None表示全部）
+        chunk_size: 每块字节数
+        use_mmap: 是否使用 mmap
+
+    Returns:
+        同 hash_stream
+    """
+    with open(filepath, 'rb') as f:
+        return hash_stream(f, algorithms, chunk_size, use_mmap)
+
+
+def hash_bytes(data: bytes, algorithms=None) -> dict:
+    """计算内存中数据的多个摘要，返回 {算法: 十六进制摘要}"""
+    hasher = MultiHasher(algorithms)
+    hasher.update(data)
+    return hasher.hexdigests()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("用法: python -m crypto_modern.multi_hash 文件 [块大小]")
+        sys.exit(1)
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else CHUNK_SIZE
+    result = hash_file(sys.argv[1], chunk_size=size)
+    for name, digest in result['digests'].items():
+        print(f"{name:<9} {digest}")
+    print(f"{result['size']} 字节，{result['elapsed']} 秒，{result['mb_per_second']} MB/s"
+          f"{'（mmap）' if result['mmap'] else ''}")
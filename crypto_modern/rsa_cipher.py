@@ -1,23 +1,44 @@
 """
 RSA非对称加密算法
 使用PyCryptodome库实现
+
+解析PEM（base64、ASN.1、私钥CRT参数）的开销远大于一次公钥运算，而客户端通常
+反复使用同一把密钥，因此解析后的密钥对象和 OAEP/签名上下文按 PEM 的 SHA-256 摘要
+缓存在进程内的LRU中；被淘汰的私钥在不再被使用后尽力清零其私有参数
+（Ed25519 种子等不可变的 bytes 无法清零，只丢弃引用）
 """
 from Crypto.PublicKey import RSA
 from Crypto.Cipher import PKCS1_OAEP
+from Crypto.Hash import SHA256
+from Crypto.Signature import pkcs1_15
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, ExitStack
 import base64
+import hashlib
+import os
+import threading
+import time
+
+# 解析后密钥的缓存数量
+KEY_CACHE_SIZE = 128
+
+# 计算消息摘要时每次编码并送入哈希的字符数（长消息不必整体编码一次）
+HASH_SLICE = 64 * 1024
 
 
 class RSAKeyPair:
     """RSA密钥对管理"""
     
-    def __init__(self, key_size: int = 2048):
+    def __init__(self, key_size: int = 2048, key=None):
         """
         生成RSA密钥对
         
         Args:
             key_size: 密钥大小（比特数，默认2048）
+            key: 已生成的私钥对象（如来自 rsa_pool），为None时同步生成
         """
-        self.key = RSA.generate(key_size)
+        self.key = key if key is not None else RSA.generate(key_size)
         self.public_key = self.key.publickey()
     
     def get_public_key_pem(self) -> str:
@@ -29,6 +50,129 @@ class RSAKeyPair:
         return self.key.export_key().decode()
 
 
+class _CachedKey:
+    """缓存项：解析后的密钥及按需创建的 OAEP / 签名上下文（后两者仅用于RSA密钥）"""
+
+    def __init__(self, key):
+        self.key = key
+        self._oaep = None
+        self._signature = None
+        self.users = 0
+        self.evicted = False
+
+    @property
+    def oaep(self):
+        # PKCS1_OAEP 对象不保存单次运算的状态，可以在线程间复用
+        if self._oaep is None:
+            self._oaep = PKCS1_OAEP.new(self.key)
+        return self._oaep
+
+    @property
+    def signature(self):
+        if self._signature is None:
+            self._signature = pkcs1_15.new(self.key)
+        return self._signature
+
+
+def _wipe_private(key):
+    """
+    尽力清零私钥参数（RSA 的 d、p、q 及CRT系数等，保留公开的 n、e；ECC 的 d）
+
+    Ed25519 的 _seed、_prefix 是不可变的 bytes，无法原地清零，只能丢弃引用
+    """
+    for name, value in list(vars(key).items()):
+        if name in ('_n', '_e'):
+            continue
+        if isinstance(value, bytes):
+            setattr(key, name, None)
+            continue
+        try:
+            value.set(0)
+        except (AttributeError, TypeError, ValueError):
+            pass
+
+
+class KeyCache:
+    """按 PEM 摘要缓存解析后的密钥（LRU淘汰，线程安全）"""
+
+    def __init__(self, max_entries: int = KEY_CACHE_SIZE, importer=RSA.import_key):
+        """
+        Args:
+            max_entries: 最多缓存的密钥数
+            importer: PEM 解析函数（默认RSA，ECC 使用 ECC.import_key）
+        """
+        self.max_entries = max_entries
+        self.importer = importer
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @contextmanager
+    def borrow(self, pem: str):
+        """
+        取出缓存项，在 with 块内使用
+
+        淘汰时仍在使用中的私钥要等最后一个使用者归还后才清零
+
+        Args:
+            pem: PEM格式的公钥或私钥
+        """
+        digest = hashlib.sha256(pem.encode() if isinstance(pem, str) else pem).digest()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                entry.users += 1
+        if entry is None:
+            entry = _CachedKey(self.importer(pem))
+            entry.users = 1
+            with self._lock:
+                self.misses += 1
+                existing = self._entries.get(digest)
+                if existing is None:
+                    self._entries[digest] = entry
+                    self._evict()
+                else:
+                    # 其他线程已经缓存了同一密钥，本次解析结果用完即丢弃
+                    entry.evicted = True
+        try:
+            yield entry
+        finally:
+            with self._lock:
+                entry.users -= 1
+                wipe = entry.evicted and entry.users == 0
+            if wipe and entry.key.has_private():
+                _wipe_private(entry.key)
+
+    def _evict(self):
+        """淘汰超出容量的最久未用项（调用方持有锁）"""
+        while len(self._entries) > self.max_entries:
+            _, entry = self._entries.popitem(last=False)
+            entry.evicted = True
+            if entry.users == 0 and entry.key.has_private():
+                _wipe_private(entry.key)
+
+    def clear(self):
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self.hits = self.misses = 0
+            for entry in entries:
+                entry.evicted = True
+                if entry.users == 0 and entry.key.has_private():
+                    _wipe_private(entry.key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+key_cache = KeyCache()
+
+
 def encrypt(plaintext: str, public_key_pem: str) -> str:
     """
     RSA公钥加密
@@ -40,9 +184,8 @@ def encrypt(plaintext: str, public_key_pem: str) -> str:
     Returns:
         Base64编码的密文
     """
-    public_key = RSA.import_key(public_key_pem)
-    cipher = PKCS1_OAEP.new(public_key)
-    ciphertext = cipher.encrypt(plaintext.encode())
+    with key_cache.borrow(public_key_pem) as entry:
+        ciphertext = entry.oaep.encrypt(plaintext.encode())
     return base64.b64encode(ciphertext).decode()
 
 
@@ -57,13 +200,23 @@ def decrypt(ciphertext_b64: str, private_key_pem: str) -> str:
     Returns:
         明文
     """
-    private_key = RSA.import_key(private_key_pem)
-    cipher = PKCS1_OAEP.new(private_key)
     ciphertext = base64.b64decode(ciphertext_b64)
-    plaintext = cipher.decrypt(ciphertext)
+    with key_cache.borrow(private_key_pem) as entry:
+        plaintext = entry.oaep.decrypt(ciphertext)
     return plaintext.decode()
 
 
+def _message_hash(message):
+    """分段计算消息的 SHA-256（字符串按 HASH_SLICE 个字符分段编码后送入哈希）"""
+    h = SHA256.new()
+    if isinstance(message, str):
+        for start in range(0, len(message), HASH_SLICE):
+            h.update(message[start:start + HASH_SLICE].encode())
+    else:
+        h.update(message)
+    return h
+
+
 def sign(message: str, private_key_pem: str) -> str:
     """
     RSA签名
@@ -75,12 +228,9 @@ def sign(message: str, private_key_pem: str) -> str:
     Returns:
         Base64编码的签名
     """
-    from Crypto.Signature import pkcs1_v1_5
-    from Crypto.Hash import SHA256
-    
-    private_key = RSA.import_key(private_key_pem)
-    h = SHA256.new(message.encode())
-    signature = pkcs1_v1_5.new(private_key).sign(h)
+    h = _message_hash(message)
+    with key_cache.borrow(private_key_pem) as entry:
+        signature = entry.signature.sign(h)
     return base64.b64encode(signature).decode()
 
 
@@ -96,10 +246,88 @@ def verify(message: str, signature_b64: str, public_key_pem: str) -> bool:
     Returns:
         签名是否有效
     """
-    from Crypto.Signature import pkcs1_v1_5
-    from Crypto.Hash import SHA256
-    
-    public_key = RSA.import_key(public_key_pem)
-    h = SHA256.new(message.encode())
+    h = _message_hash(message)
     signature = base64.b64decode(signature_b64)
-    return pkcs1_v1_5.new(public_key).verify(h, signature)
+    with key_cache.borrow(public_key_pem) as entry:
+        try:
+            entry.signature.verify(h, signature)
+            return True
+        except (ValueError, TypeError):
+            return False
+
+
+def _verify_slice(items: list, indices: range, entries: dict, results: list):
+    """在一个工作线程中依次验证 indices 对应的条目"""
+    for index in indices:
+        item = items[index]
+        pem = item.get('public_key')
+        entry = entries.get(pem) if isinstance(pem, str) and pem else ValueError("缺少公钥")
+        if isinstance(entry, Exception):
+            results[index] = {'index': index, 'valid': False, 'error': f'公钥无效: {entry}'}
+            continue
+        try:
+            signature = base64.b64decode(item.get('signature') or '', validate=True)
+            h = _message_hash(item.get('message', ''))
+        except (ValueError, TypeError) as e:
+            results[index] = {'index': index, 'valid': False, 'error': f'格式错误: {e}'}
+            continue
+        try:
+            entry.signature.verify(h, signature)
+            results[index] = {'index': index, 'valid': True}
+        except ValueError:
+            # pkcs1_15 验证失败时抛出 ValueError
+            results[index] = {'index': index, 'valid': False, 'error': '签名无效'}
+
+
+def verify_batch(items: list, workers: int = None) -> dict:
+    """
+    批量验证RSA签名
+
+    同一公钥只解析一次（整个批次期间从密钥缓存借出，不会被淘汰清零），
+    条目按连续区间分给线程池，每个线程逐条分段计算摘要并验证
+
+    Args:
+        items: [{'message', 'signature', 'public_key'}, ...]，签名为Base64
+        workers: 线程数（None表示CPU核数）
+
+    Returns:
+        {'results': [{'index', 'valid', 'error'?}, ...], 'valid': 有效数, 'invalid': 无效数,
+         'distinct_keys': 不同公钥数, 'elapsed': 耗时, 'verifications_per_second': 吞吐量}
+    """
+    started = time.perf_counter()
+    results = [None] * len(items)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(items) or 1))
+
+    with ExitStack() as stack:
+        entries = {}
+        for item in items:
+            pem = item.get('public_key')
+            try:
+                # 非字符串的公钥（如列表、对象）不能作为字典键，由 _verify_slice 逐条报错
+                if not isinstance(pem, str) or not pem or pem in entries:
+                    continue
+                entries[pem] = stack.enter_context(key_cache.borrow(pem))
+            except (ValueError, IndexError, TypeError) as e:
+                entries[pem] = e
+
+        step = -(-len(items) // workers) if items else 0
+        slices = [range(start, min(start + step, len(items))) for start in range(0, len(items), step or 1)]
+        if len(slices) <= 1:
+            for indices in slices:
+                _verify_slice(items, indices, entries, results)
+        else:
+            with ThreadPoolExecutor(max_workers=len(slices), thread_name_prefix='rsa-verify') as executor:
+                for future in [executor.submit(_verify_slice, items, indices, entries, results)
+                               for indices in slices]:
+                    future.result()
+
+    elapsed = time.perf_counter() - started
+    valid = sum(1 for result in results if result['valid'])
+    return {
+        'results': results,
+        'valid': valid,
+        'invalid': len(results) - valid,
+        'distinct_keys': len(entries),
+        'elapsed': round(elapsed, 4),
+        'verifications_per_second': round(len(results) / elapsed, 1) if elapsed > 0 else None
+    }
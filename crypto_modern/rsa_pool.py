@@ -0,0 +1,158 @@
+"""
+RSA密钥对预生成池
+RSA.generate 在请求线程中同步执行，2048位需要数百毫秒到数秒，4096位更久。
+后台线程把各个密钥长度的库存维持在目标水位，实际生成在工作进程中进行（降低优先级，
+不与请求线程争抢GIL）；请求到来时直接取出一个现成的密钥对。
+
+- 每个密钥对只会被取出一次（取出即从库存删除）；
+- 库存为空或请求的长度不在池中时，退回到同步生成；
+- 每次取出都会唤醒后台补充；库存跌破低水位时记录一次低水位事件
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from Crypto.PublicKey import RSA
+
+
+def _generate_der(key_size: int) -> bytes:
+    """在工作进程中生成密钥对，以DER格式返回（进程间传输比对象小）"""
+    return RSA.generate(key_size).export_key(format='DER')
+
+
+def _lower_priority():
+    """工作进程初始化：降低调度优先级，后台生成不影响请求处理"""
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+class RSAKeyPool(threading.Thread):
+    """RSA密钥对预生成池（后台补充线程）"""
+
+    def __init__(self, watermarks: dict, low_watermark: float = 0.25, workers: int = 1,
+                 interval: float = 5):
+        """
+        Args:
+            watermarks: 各密钥长度的目标库存，如 {2048: 8, 4096: 2}
+            low_watermark: 低水位（目标库存的比例），库存低于该值时计入低水位事件
+            workers: 生成密钥使用的进程数
+            interval: 库存已满时检查的间隔（秒）
+        """
+        super().__init__(name='rsa-key-pool', daemon=True)
+        self.watermarks = dict(watermarks)
+        self.low_watermark = low_watermark
+        self.workers = max(1, workers)
+        self.interval = interval
+        self._keys = {size: deque() for size in self.watermarks}
+        self._pending = {size: 0 for size in self.watermarks}
+        # 可重入：任务在 add_done_callback 之前已完成时，回调会在持有锁的 _refill 中同步执行
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._executor = None
+        self.metrics = {
+            size: {
+                'generated': 0,
+                'handed_out': 0,
+                'fallbacks': 0,
+                'low_watermark_events': 0,
+                'last_generation_seconds': None,
+                'errors': 0
+            } for size in self.watermarks
+        }
+
+    def acquire(self, key_size: int):
+        """
+        取出一个密钥对（单次使用）
+
+        Args:
+            key_size: 密钥长度（比特）
+
+        Returns:
+            (RSA私钥对象, 是否来自库存)
+        """
+        der = None
+        with self._lock:
+            keys = self._keys.get(key_size)
+            if keys is not None:
+                stats = self.metrics[key_size]
+                low = self.low_watermark * self.watermarks[key_size]
+                if keys:
+                    der = keys.popleft()
+                    stats['handed_out'] += 1
+                    if len(keys) < low <= len(keys) + 1:
+                        stats['low_watermark_events'] += 1
+                else:
+                    stats['fallbacks'] += 1
+        if keys is not None:
+            self._wake.set()
+        if der is None:
+            return RSA.generate(key_size), False
+        return RSA.import_key(der), True
+
+    def levels(self) -> dict:
+        """各密钥长度的当前库存"""
+        with self._lock:
+            return {size: len(keys) for size, keys in self._keys.items()}
+
+    def _refill(self):
+        """为低于目标水位的密钥长度提交生成任务（同时进行的任务数不超过进程数）"""
+        with self._lock:
+            in_flight = sum(self._pending.values())
+            for size, target in sorted(self.watermarks.items()):
+                while (in_flight < self.workers
+                       and len(self._keys[size]) + self._pending[size] < target):
+                    started = time.perf_counter()
+                    # 进程池已损坏时 submit 直接抛出异常，此时还没有计入待完成数
+                    future = self._executor.submit(_generate_der, size)
+                    self._pending[size] += 1
+                    in_flight += 1
+                    future.add_done_callback(
+                        lambda f, size=size, started=started: self._collect(size, started, f))
+
+    def _collect(self, size: int, started: float, future):
+        with self._lock:
+            self._pending[size] -= 1
+            stats = self.metrics[size]
+            try:
+                self._keys[size].append(future.result())
+                stats['generated'] += 1
+                stats['last_generation_seconds'] = round(time.perf_counter() - started, 3)
+            except Exception:
+                stats['errors'] += 1
+        self._wake.set()
+
+    def run(self):
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_lower_priority)
+        try:
+            while not self._stop_event.is_set():
+                self._wake.clear()
+                try:
+                    self._refill()
+                except Exception:
+                    # 工作进程异常退出等情况，重建进程池后继续
+                    # （已提交的任务失败或被取消时同样会回调 _collect，待完成计数随之扣回）
+                    self._executor.shutdown(wait=False, cancel_futures=True)
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                         initializer=_lower_priority)
+                self._wake.wait(self.interval)
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+
+    def get_metrics(self) -> dict:
+        """各密钥长度的库存、目标水位、取出次数、同步回退次数等"""
+        with self._lock:
+            return {
+                size: dict(stats, level=len(self._keys[size]), target=self.watermarks[size],
+                           pending=self._pending[size],
+                           low_watermark=self.low_watermark * self.watermarks[size])
+                for size, stats in self.metrics.items()
+            }
@@ -1,15 +1,15 @@
 """
 数据库初始化脚本
-创建用户认证表
+创建用户认证表、图像分片目录表和存储用量账本
 """
 import sqlite3
 import os
 
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), 'users.db')
 
-def init_database():
-    """初始化数据库，创建用户表"""
-    conn = sqlite3.connect(DATABASE_PATH)
+def init_database(db_path: str = DATABASE_PATH):
+    """初始化数据库，创建用户表、分片目录表和存储用量账本（可重复执行）"""
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     # 创建用户表
@@ -23,9 +23,107 @@ def init_database():
         )
     ''')
     
+    # 创建分片任务表：每次图像分割对应一条记录
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS share_jobs (
+            job_id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            threshold INTEGER NOT NULL,
+            shares INTEGER NOT NULL,
+            image_mode TEXT,
+            width INTEGER,
+            height INTEGER,
+            original_filename TEXT,
+            original_size INTEGER,
+            total_share_bytes INTEGER,
+            share_dir TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_share_jobs_user_created
+        ON share_jobs (user_id, created_at)
+    ''')
+    
+    # 创建分片文件表：记录每个分片的位置、大小和摘要
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS share_files (
+            job_id TEXT NOT NULL,
+            share_index INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            location TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            PRIMARY KEY (job_id, share_index),
+            FOREIGN KEY (job_id) REFERENCES share_jobs (job_id) ON DELETE CASCADE
+        )
+    ''')
+    
+    # 创建存储用量账本：每个存储对象一行，按最后访问时间支持LRU淘汰
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS storage_objects (
+            key TEXT PRIMARY KEY,
+            job_id TEXT NOT NULL,
+            area TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_storage_objects_access
+        ON storage_objects (last_access)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_storage_objects_user_access
+        ON storage_objects (user_id, last_access)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_storage_objects_area_access
+        ON storage_objects (area, last_access)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_storage_objects_job
+        ON storage_objects (job_id)
+    ''')
+    
+    # 按用户汇总的用量，由触发器增量维护，查询时无需遍历目录或全表求和
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS storage_usage (
+            user_id INTEGER PRIMARY KEY,
+            bytes INTEGER NOT NULL DEFAULT 0,
+            objects INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS storage_objects_after_insert
+        AFTER INSERT ON storage_objects
+        BEGIN
+            INSERT INTO storage_usage (user_id, bytes, objects) VALUES (NEW.user_id, NEW.size, 1)
+            ON CONFLICT (user_id) DO UPDATE SET bytes = bytes + NEW.size, objects = objects + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS storage_objects_after_delete
+        AFTER DELETE ON storage_objects
+        BEGIN
+            UPDATE storage_usage SET bytes = bytes - OLD.size, objects = objects - 1
+            WHERE user_id = OLD.user_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS storage_objects_after_update_size
+        AFTER UPDATE OF size ON storage_objects
+        BEGIN
+            UPDATE storage_usage SET bytes = bytes - OLD.size + NEW.size
+            WHERE user_id = NEW.user_id;
+        END
+    ''')
+    
     conn.commit()
     conn.close()
-    print(f"数据库初始化完成！数据库位置：{DATABASE_PATH}")
+    print(f"数据库初始化完成！数据库位置：{db_path}")
 
 if __name__ == '__main__':
     init_database()
@@ -0,0 +1,146 @@
+"""
+图像分片目录
+在 users.db 中记录每次分割任务的归属、参数、分片位置和摘要，
+查询任务时直接走索引，无需扫描 outputs 目录
+"""
+import os
+import sqlite3
+from database.init_db import DATABASE_PATH
+
+
+def get_db_connection(db_path: str = DATABASE_PATH):
+    """获取数据库连接"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA foreign_keys = ON')
+    return conn
+
+
+def register_job(job_id: str, user_id: int, metadata: dict, share_dir: str,
+                 original_filename: str = None, original_size: int = None,
+                 locations: dict = None, db_path: str = DATABASE_PATH):
+    """
+    登记一次分割任务及其全部分片
+
+    Args:
+        job_id: 任务ID
+        user_id: 所属用户ID
+        metadata: split_image 返回的元数据（需包含 share_files）
+        share_dir: 分片所在位置（目录或存储键前缀）
+        original_filename: 原始上传文件名
+        original_size: 原始文件大小（字节）
+        locations: 可选的 {分片序号: 位置} 映射，默认为 share_dir/文件名
+        db_path: 数据库路径
+    """
+    share_files = metadata.get('share_files', [])
+    if locations is None:
+        locations = {sf['index']: os.path.join(share_dir, sf['filename']) for sf in share_files}
+    width, height = metadata.get('size', (None, None))
+    total_bytes = sum(sf['size'] for sf in share_files)
+
+    conn = get_db_connection(db_path)
+    try:
+        with conn:
+            conn.execute(
+                '''INSERT INTO share_jobs
+                   (job_id, user_id, threshold, shares, image_mode, width, height,
+                    original_filename, original_size, total_share_bytes, share_dir)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                (job_id, user_id, metadata['threshold'], metadata['shares'],
+                 metadata.get('mode'), width, height,
+                 original_filename, original_size, total_bytes, share_dir)
+            )
+            conn.executemany(
+                '''INSERT INTO share_files
+                   (job_id, share_index, filename, location, size, sha256)
+                   VALUES (?, ?, ?, ?, ?, ?)''',
+                [(job_id, sf['index'], sf['filename'], locations[sf['index']],
+                  sf['size'], sf['sha256']) for sf in share_files]
+            )
+    finally:
+        conn.close()
+
+
+def _job_to_dict(row) -> dict:
+    """将任务行转换为字典"""
+    return {
+        'job_id': row['job_id'],
+        'threshold': row['threshold'],
+        'shares': row['shares'],
+        'image_mode': row['image_mode'],
+        'image_size': [row['width'], row['height']],
+        'original_filename': row['original_filename'],
+        'original_size': row['original_size'],
+        'total_share_bytes': row['total_share_bytes'],
+        'share_dir': row['share_dir'],
+        'created_at': row['created_at']
+    }
+
+
+def list_jobs(user_id: int, limit: int = 50, offset: int = 0,
+              db_path: str = DATABASE_PATH) -> list:
+    """
+    按创建时间倒序列出用户的分割任务
+
+    Args:
+        user_id: 用户ID
+        limit: 返回条数上限
+        offset: 偏移量（分页）
+        db_path: 数据库路径
+
+    Returns:
+        任务字典列表
+    """
+    conn = get_db_connection(db_path)
+    try:
+        rows = conn.execute(
+            '''SELECT * FROM share_jobs WHERE user_id = ?
+               ORDER BY created_at DESC, rowid DESC LIMIT ? OFFSET ?''',
+            (user_id, limit, offset)
+        ).fetchall()
+        return [_job_to_dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+def get_job(job_id: str, user_id: int, db_path: str = DATABASE_PATH) -> dict:
+    """
+    获取单个任务及其分片信息
+
+    Args:
+        job_id: 任务ID
+        user_id: 用户ID（只能查询自己的任务）
+        db_path: 数据库路径
+
+    Returns:
+        任务字典（含 share_files），不存在时返回None
+    """
+    conn = get_db_connection(db_path)
+    try:
+        row = conn.execute(
+            'SELECT * FROM share_jobs WHERE job_id = ? AND user_id = ?',
+            (job_id, user_id)
+        ).fetchone()
+        if row is None:
+            return None
+
+        job = _job_to_dict(row)
+        files = conn.execute(
+            '''SELECT share_index, filename, location, size, sha256
+               FROM share_files WHERE job_id = ? ORDER BY share_index''',
+            (job_id,)
+        ).fetchall()
+        job['share_files'] = [dict(f) for f in files]
+        return job
+    finally:
+        conn.close()
+
+
+def delete_job(job_id: str, db_path: str = DATABASE_PATH):
+    """删除任务记录（分片文件记录级联删除）"""
+    conn = get_db_connection(db_path)
+    try:
+        with conn:
+            conn.execute('DELETE FROM share_jobs WHERE job_id = ?', (job_id,))
+    finally:
+        conn.close()
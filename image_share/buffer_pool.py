@@ -0,0 +1,87 @@
+"""
+缓冲区池
+按2的幂划分尺寸等级，复用各请求的大块缓冲区，
+避免并发分割/恢复时频繁申请和释放内存导致的碎片与RSS增长
+"""
+import threading
+from contextlib import contextmanager
+
+
+class BufferPool:
+    """线程安全的分级缓冲区池"""
+
+    def __init__(self, min_size: int = 4096, max_cached_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            min_size: 最小尺寸等级（字节）
+            max_cached_bytes: 池中最多缓存的空闲字节数，超出部分直接释放
+        """
+        self.min_size = min_size
+        self.max_cached_bytes = max_cached_bytes
+        self._free = {}
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'released': 0, 'dropped': 0}
+
+    def size_class(self, nbytes: int) -> int:
+        """计算容纳 nbytes 所需的尺寸等级"""
+        size = self.min_size
+        while size < nbytes:
+            size <<= 1
+        return size
+
+    def acquire(self, nbytes: int) -> bytearray:
+        """
+        取出一个至少 nbytes 大小的缓冲区（内容未清零）
+
+        Args:
+            nbytes: 需要的字节数
+
+        Returns:
+            长度为尺寸等级的 bytearray
+        """
+        size = self.size_class(nbytes)
+        with self._lock:
+            free = self._free.get(size)
+            if free:
+                self._cached_bytes -= size
+                self.stats['hits'] += 1
+                return free.pop()
+            self.stats['misses'] += 1
+        return bytearray(size)
+
+    def release(self, buf: bytearray):
+        """归还缓冲区，池已满时直接丢弃"""
+        size = len(buf)
+        with self._lock:
+            if size < self.min_size or self._cached_bytes + size > self.max_cached_bytes:
+                self.stats['dropped'] += 1
+                return
+            self._free.setdefault(size, []).append(buf)
+            self._cached_bytes += size
+            self.stats['released'] += 1
+
+    @contextmanager
+    def lease(self, nbytes: int):
+        """
+        以上下文管理器的方式借用缓冲区
+
+        Yields:
+            长度恰为 nbytes 的 memoryview
+        """
+        buf = self.acquire(nbytes)
+        view = memoryview(buf)
+        try:
+            yield view[:nbytes]
+        finally:
+            view.release()
+            self.release(buf)
+
+    def cached_bytes(self) -> int:
+        """当前池中缓存的空闲字节数"""
+        with self._lock:
+            return self._cached_bytes
+
+
+# 进程内所有请求共享的缓冲区池
+shared_pool = BufferPool()
@@ -0,0 +1,307 @@
+"""
+容量规划
+根据图像头部信息（不解码像素）和 k、n 参数，预测分割/恢复任务的
+输出字节数、峰值内存和耗时，并据此做准入判断。
+耗时和峰值内存系数由基准测试标定（python -m image_share.capacity --calibrate），
+结果保存在 cost_model.json 中。峰值内存在新启动的子进程中按峰值RSS测量
+（不受本进程已分配、已缓存的缓冲区影响）
+"""
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from PIL import Image
+
+from image_share.shamir_share import BLOCK_SIZE
+
+COST_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'cost_model.json')
+
+# 未标定时使用的保守默认系数：耗时为 秒/字节，
+# memory 为峰值内存 = fixed + per_byte * 秘密字节数 + per_block * 分块字节数 * 缓冲区个数
+DEFAULT_COEFFICIENTS = {
+    'split': {'fixed': 0.01, 'per_byte': 2e-8, 'per_byte_share': 6e-9, 'per_byte_share_term': 2e-9,
+              'memory': {'fixed': 0, 'per_byte': 2, 'per_block': 1}},
+    'recover': {'fixed': 0.01, 'per_byte': 4e-8, 'per_byte_share': 8e-9,
+                'memory': {'fixed': 0, 'per_byte': 2, 'per_block': 1}}
+}
+
+# metadata.json 的近似大小
+METADATA_BYTES = 1024
+
+
+def bytes_per_pixel(mode: str) -> int:
+    """图像模式对应的每像素字节数（与 Image.tobytes 一致）"""
+    return len(Image.new(mode, (1, 1)).tobytes())
+
+
+def read_image_header(source) -> dict:
+    """
+    只读取图像头部，获取模式和尺寸（不解码像素数据）
+
+    Args:
+        source: 文件路径或文件对象
+
+    Returns:
+        {'mode': 模式, 'width': 宽, 'height': 高, 'format': 格式}
+    """
+    with Image.open(source) as img:
+        return {'mode': img.mode, 'width': img.width, 'height': img.height, 'format': img.format}
+
+
+def _block_bytes(operation: str, secret: int, threshold: int, shares: int) -> int:
+    """
+    池化缓冲区的总字节数（按分块大小计）
+
+    分割：系数、累加器、n 个分片块；恢复：k 个分片块、累加器
+    """
+    block = min(BLOCK_SIZE, max(secret, 1))
+    if operation == 'split':
+        return block * ((threshold - 1) + 4 + 2 * shares)
+    return block * (2 * threshold + 8)
+
+
+class CostModel:
+    """分割/恢复任务的资源开销模型"""
+
+    def __init__(self, coefficients: dict = None):
+        """
+        Args:
+            coefficients: 耗时系数，默认从 cost_model.json 加载
+        """
+        if coefficients is None:
+            coefficients = self.load()
+        self.coefficients = coefficients
+
+    @staticmethod
+    def load(path: str = COST_MODEL_PATH) -> dict:
+        """加载标定结果，文件不存在时使用默认系数"""
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)['coefficients']
+        return DEFAULT_COEFFICIENTS
+
+    def estimate(self, operation: str, width: int, height: int, mode: str,
+                 threshold: int, shares: int) -> dict:
+        """
+        预测一次任务的开销
+
+        Args:
+            operation: 'split' 或 'recover'
+            width: 图像宽度
+            height: 图像高度
+            mode: 图像模式（RGB、RGBA、L等）
+            threshold: 阈值 k
+            shares: 分片数 n（恢复时为上传的分片数）
+
+        Returns:
+            包含 secret_bytes、input_bytes、output_bytes、peak_memory_bytes、wall_seconds 的字典
+        """
+        if operation not in ('split', 'recover'):
+            raise ValueError(f"未知的操作类型: {operation}")
+        secret = width * height * bytes_per_pixel(mode)
+        c = self.coefficients[operation]
+        memory = c.get('memory', DEFAULT_COEFFICIENTS[operation]['memory'])
+        peak_memory = (memory['fixed'] + memory['per_byte'] * secret
+                       + memory['per_block'] * _block_bytes(operation, secret, threshold, shares))
+
+        if operation == 'split':
+            output_bytes = shares * 2 * secret + METADATA_BYTES
+            input_bytes = secret  # 压缩格式的上传文件通常更小，这里按解码后大小估计
+            # Horner 求值的工作量与 n*(k-1) 成正比，写分片与 n 成正比
+            wall = (c['fixed'] + c['per_byte'] * secret
+                    + c['per_byte_share'] * secret * shares
+                    + c['per_byte_share_term'] * secret * shares * (threshold - 1))
+        else:
+            input_bytes = shares * 2 * secret + METADATA_BYTES
+            output_bytes = secret  # PNG 输出，未压缩大小作为上界
+            wall = c['fixed'] + c['per_byte'] * secret + c['per_byte_share'] * secret * threshold
+
+        return {
+            'operation': operation,
+            'secret_bytes': secret,
+            'input_bytes': input_bytes,
+            'output_bytes': output_bytes,
+            'peak_memory_bytes': int(peak_memory),
+            'wall_seconds': round(wall, 4)
+        }
+
+    def admit(self, estimate: dict, max_output_bytes: int = None,
+              max_peak_memory: int = None, max_seconds: float = None) -> tuple:
+        """
+        根据预测结果做准入判断
+
+        Returns:
+            (是否允许, 拒绝原因或None)
+        """
+        if max_output_bytes is not None and estimate['output_bytes'] > max_output_bytes:
+            return False, (f"预计输出 {estimate['output_bytes'] / 1024 ** 2:.1f}MB，"
+                           f"超过上限 {max_output_bytes / 1024 ** 2:.0f}MB")
+        if max_peak_memory is not None and estimate['peak_memory_bytes'] > max_peak_memory:
+            return False, (f"预计峰值内存 {estimate['peak_memory_bytes'] / 1024 ** 2:.1f}MB，"
+                           f"超过上限 {max_peak_memory / 1024 ** 2:.0f}MB")
+        if max_seconds is not None and estimate['wall_seconds'] > max_seconds:
+            return False, f"预计耗时 {estimate['wall_seconds']:.1f}s，超过上限 {max_seconds:.0f}s"
+        return True, None
+
+
+def _peak_rss() -> int:
+    """当前进程的峰值RSS（字节）"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    # macOS 的 ru_maxrss 单位为字节，Linux 为KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+def _peak_rss_worker(operation: str, args: tuple, queue):
+    """在子进程中执行一次任务，报告任务期间峰值RSS的增量（字节）"""
+    from image_share.shamir_share import ShamirShare
+    from image_share.recover import recover_image_from_shares
+
+    # 子进程的峰值RSS可能继承了父进程的值（exec 时累计），
+    # Linux 上先把峰值重置为当前RSS（/proc/self/clear_refs 写入5）
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+    before = _peak_rss()
+    if operation == 'split':
+        image_path, share_dir, threshold, shares = args
+        ShamirShare(threshold=threshold, shares=shares).split_image(image_path, share_dir)
+    else:
+        recover_image_from_shares(*args)
+    queue.put(_peak_rss() - before)
+
+
+def measure_peak_memory(operation: str, args: tuple) -> int:
+    """
+    在新启动的子进程中执行一次分割或恢复，返回峰值RSS增量（字节）
+
+    Args:
+        operation: 'split' 或 'recover'
+        args: 分割为 (图像路径, 分片目录, k, n)，恢复为 (分片目录, 输出路径)
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_peak_rss_worker, args=(operation, args, queue))
+    process.start()
+    try:
+        return queue.get(timeout=600)
+    finally:
+        process.join()
+
+
+def _fit_memory(samples: list, operation: str) -> dict:
+    """
+    拟合峰值内存系数
+
+    最小二乘拟合后整体放大到不低于任何一个样本的实测值（准入判断宁可高估）
+    """
+    import numpy as np
+    x = np.array([[1, s['secret_bytes'], _block_bytes(operation, s['secret_bytes'], s['k'], s['n'])]
+                  for s in samples], dtype=float)
+    y = np.array([s[f'{operation}_peak_bytes'] for s in samples], dtype=float)
+    c = np.clip(np.linalg.lstsq(x, y, rcond=None)[0], 0, None)
+    scale = max(1.0, float(np.max(y / np.maximum(x @ c, 1))))
+    return dict(zip(('fixed', 'per_byte', 'per_block'), map(float, c * scale)))
+
+
+def calibrate(output_path: str = COST_MODEL_PATH, sizes: tuple = (256, 512, 1024),
+              configs: tuple = ((2, 3), (3, 5), (5, 10)), repeat: int = 2) -> dict:
+    """
+    运行基准测试并用最小二乘拟合耗时和峰值内存系数
+
+    耗时在本进程中测量（取最小值），峰值内存在子进程中测量
+
+    Args:
+        output_path: 标定结果输出路径
+        sizes: 测试图像边长列表（RGB）
+        configs: (k, n) 组合列表
+        repeat: 每组重复次数（取最小值）
+
+    Returns:
+        标定结果（含原始样本和系数）
+    """
+    import tempfile
+    import shutil
+    import numpy as np
+    from image_share.shamir_share import ShamirShare
+    from image_share.recover import recover_image_from_shares
+
+    samples = []
+    work_dir = tempfile.mkdtemp()
+    try:
+        for size in sizes:
+            image_path = os.path.join(work_dir, f'bench_{size}.png')
+            pixels = np.random.randint(0, 256, (size, size, 3), dtype=np.uint8)
+            Image.fromarray(pixels, 'RGB').save(image_path)
+            secret = size * size * 3
+
+            for k, n in configs:
+                share_dir = os.path.join(work_dir, f'shares_{size}_{k}_{n}')
+                shamir = ShamirShare(threshold=k, shares=n)
+                split_times, recover_times = [], []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    shamir.split_image(image_path, share_dir)
+                    split_times.append(time.perf_counter() - started)
+
+                    started = time.perf_counter()
+                    recover_image_from_shares(share_dir, os.path.join(work_dir, 'recovered.png'))
+                    recover_times.append(time.perf_counter() - started)
+                samples.append({
+                    'secret_bytes': secret, 'k': k, 'n': n,
+                    'split_seconds': min(split_times),
+                    'recover_seconds': min(recover_times),
+                    'split_peak_bytes': measure_peak_memory(
+                        'split', (image_path, share_dir + '_peak', k, n)),
+                    'recover_peak_bytes': measure_peak_memory(
+                        'recover', (share_dir, os.path.join(work_dir, 'recovered_peak.png')))
+                })
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    split_x = np.array([[1, s['secret_bytes'], s['secret_bytes'] * s['n'],
+                         s['secret_bytes'] * s['n'] * (s['k'] - 1)] for s in samples], dtype=float)
+    split_y = np.array([s['split_seconds'] for s in samples])
+    recover_x = np.array([[1, s['secret_bytes'], s['secret_bytes'] * s['k']] for s in samples],
+                         dtype=float)
+    recover_y = np.array([s['recover_seconds'] for s in samples])
+
+    # 非负最小二乘的简化：负系数截断为0（开销项不可能为负）
+    split_c = np.clip(np.linalg.lstsq(split_x, split_y, rcond=None)[0], 0, None)
+    recover_c = np.clip(np.linalg.lstsq(recover_x, recover_y, rcond=None)[0], 0, None)
+
+    result = {
+        'calibrated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'coefficients': {
+            'split': dict(zip(('fixed', 'per_byte', 'per_byte_share', 'per_byte_share_term'),
+                              map(float, split_c)), memory=_fit_memory(samples, 'split')),
+            'recover': dict(zip(('fixed', 'per_byte', 'per_byte_share'), map(float, recover_c)),
+                            memory=_fit_memory(samples, 'recover'))
+        },
+        'samples': samples
+    }
+    with open(output_path, 'w') as f:
+        json.dump(result, f, indent=2)
+    return result
+
+
+if __name__ == '__main__':
+    if '--calibrate' in sys.argv:
+        result = calibrate()
+        print(f"标定完成，结果已写入 {COST_MODEL_PATH}")
+        for s in result['samples']:
+            print(f"  {s['secret_bytes'] / 1024 ** 2:6.2f}MB k={s['k']:<2} n={s['n']:<3} "
+                  f"分割 {s['split_seconds']:.3f}s {s['split_peak_bytes'] / 1024 ** 2:.1f}MB  "
+                  f"恢复 {s['recover_seconds']:.3f}s {s['recover_peak_bytes'] / 1024 ** 2:.1f}MB")
+    else:
+        print("用法: python -m image_share.capacity --calibrate")
@@ -1,11 +1,19 @@
-from image_share.shamir_share import ShamirShare
+from image_share.shamir_share import ShamirShare, BLOCK_SIZE
+from contextlib import ExitStack
 import os
 import json
 from PIL import Image
-import struct
 
-def recover_image_from_shares(share_dir: str, output_path: str) -> str:
-    """从包含分片和元数据的目录自动恢复图像 (支持双字节解包)"""
+def recover_image_from_shares(share_dir: str, output_path: str, share_paths: dict = None) -> str:
+    """
+    从包含分片和元数据的目录自动恢复图像 (支持双字节解包)
+
+    Args:
+        share_dir: 分片及 metadata.json 所在目录
+        output_path: 恢复图像的输出路径
+        share_paths: 可选的 {x坐标: 分片路径} 映射（来自分片目录表），
+                     提供时不再扫描目录和解析文件名
+    """
     
     # 1. 加载元数据
     metadata_path = os.path.join(share_dir, "metadata.json")
@@ -15,49 +23,58 @@ def recover_image_from_shares(share_dir: str, output_path: str) -> str:
     with open(metadata_path, 'r') as f:
         meta = json.load(f)
 
-    # 2. 自动检索分片文件 (.bin)
-    share_files = [
-        os.path.join(share_dir, f) 
-        for f in os.listdir(share_dir) 
-        if f.startswith("share_") and f.endswith(".bin")
-    ]
+    # 2. 定位分片文件 (.bin)：优先使用目录表给出的位置，否则扫描目录
+    if share_paths is None:
+        share_paths = {}
+        for f in os.listdir(share_dir):
+            if f.startswith("share_") and f.endswith(".bin"):
+                # 从文件名解析 x 坐标 (例如 share_1.bin -> x=1)
+                try:
+                    x = int(f.split('_')[1].split('.')[0])
+                except (IndexError, ValueError):
+                    continue
+                share_paths[x] = os.path.join(share_dir, f)
+    share_files = list(share_paths.values())
 
     if len(share_files) < meta['threshold']:
         raise ValueError(f"分片不足。需要 {meta['threshold']} 个，实际找到 {len(share_files)} 个")
 
-    # 3. 读取并解包分片数据
-    shares_data = []
-    # 按照阈值要求的数量读取（取前 k 个）
-    for sf in share_files[:meta['threshold']]:
-        # 从文件名解析 x 坐标 (例如 share_1.bin -> x=1)
-        try:
-            x = int(os.path.basename(sf).split('_')[1].split('.')[0])
-        except (IndexError, ValueError):
-            continue
-            
-        with open(sf, 'rb') as f:
-            binary_data = f.read()
-            # 关键修复：计算 uint16 的个数 (每个像素占2字节)
-            count = len(binary_data) // 2
-            # '<' 小端序, 'H' 无符号短整型 (uint16)
-            # 解包后得到 0-256 范围的整数列表
-            y_values = struct.unpack(f"<{count}H", binary_data)
-            shares_data.append((x, y_values))
+    # 3. 打开前 k 个分片 (按照阈值要求的数量读取)
+    selected = list(share_paths.items())[:meta['threshold']]
+    xs = [x for x, _ in selected]
+    # 关键修复：计算 uint16 的个数 (每个像素占2字节)
+    sizes = {os.path.getsize(sf) for _, sf in selected}
+    if len(sizes) != 1:
+        raise ValueError("分片大小不一致，请确认分片来自同一次分割")
+    data_len = sizes.pop() // 2
 
-    # 4. 初始化 Shamir 核心类并执行拉格朗日插值
+    # 4. 初始化 Shamir 核心类，分块读入分片并执行拉格朗日插值
     shamir = ShamirShare(threshold=meta['threshold'], shares=len(share_files))
-    
-    try:
-        # 调用之前修正过的 _reconstruct_secret
-        recovered_bytes = shamir._reconstruct_secret(shares_data)
-        
-        # 5. 根据元数据重组图像
-        # recovered_bytes 长度应等于 width * height * channels
-        img = Image.frombytes(meta['mode'], tuple(meta['size']), recovered_bytes)
-        img.save(output_path)
-        return output_path
-    except Exception as e:
-        raise RuntimeError(f"恢复图像时发生错误: {str(e)}")
+    pool = shamir.pool
+    block = min(BLOCK_SIZE, max(data_len, 1))
+
+    with ExitStack() as stack:
+        files = [stack.enter_context(open(sf, 'rb')) for _, sf in selected]
+        # 分片块缓冲区和输出缓冲区都取自共享缓冲区池，按块 readinto，不做逐字节追加
+        share_bufs = [stack.enter_context(pool.lease(2 * block)) for _ in selected]
+        recovered = stack.enter_context(pool.lease(data_len))
+
+        try:
+            for start in range(0, data_len, block):
+                end = min(start + block, data_len)
+                views = [buf[:2 * (end - start)] for buf in share_bufs]
+                for f, view in zip(files, views):
+                    f.readinto(view)
+                # '<' 小端序, 'H' 无符号短整型 (uint16)，取值 0-256
+                shamir.reconstruct_into(xs, views, recovered[start:end])
+
+            # 5. 根据元数据重组图像
+            # recovered 长度应等于 width * height * channels
+            img = Image.frombytes(meta['mode'], tuple(meta['size']), recovered)
+            img.save(output_path)
+            return output_path
+        except Exception as e:
+            raise RuntimeError(f"恢复图像时发生错误: {str(e)}")
 
 def validate_shares(share_dir: str) -> bool:
     """简单的分片完整性验证"""
@@ -2,55 +2,151 @@ import numpy as np
 from PIL import Image
 import os
 import json
-import struct # 引入 struct 处理双字节存储
+import hashlib
+from contextlib import ExitStack
+from image_share.buffer_pool import shared_pool
+
+# 分块处理的秘密字节数：每块的临时缓冲区大小固定，与图像大小无关
+BLOCK_SIZE = 1 << 20
+
+# 分片文件格式：每个取值占 2 字节的小端无符号整数（0-256）
+SHARE_DTYPE = np.dtype('<u2')
+
+
+def _fill_random(view: memoryview):
+    """用操作系统随机数填充缓冲区（直接读入，不产生临时 bytes 对象）"""
+    if hasattr(os, 'readv'):
+        fd = os.open('/dev/urandom', os.O_RDONLY)
+        try:
+            filled = 0
+            while filled < len(view):
+                filled += os.readv(fd, [view[filled:]])
+            return
+        finally:
+            os.close(fd)
+    view[:] = os.urandom(len(view))
+
 
 class ShamirShare:
-    def __init__(self, threshold: int = 3, shares: int = 5):
+    def __init__(self, threshold: int = 3, shares: int = 5, pool=None):
         if threshold > shares:
             raise ValueError("阈值(k)不能大于总分片数(n)")
         self.threshold = threshold
         self.shares = shares
         self.prime = 257  # 使用257作为素数，确保覆盖0-255字节范围
+        self.pool = pool or shared_pool  # 跨请求共享的缓冲区池
+
+    def _lagrange_basis(self, xs: list) -> list:
+        """计算各分片在 x=0 处的拉格朗日基函数值 L_i(0)（只与 x 坐标有关，每次恢复只算一次）"""
+        basis = []
+        for i, xi in enumerate(xs):
+            num, den = 1, 1
+            for j, xj in enumerate(xs):
+                if i != j:
+                    # L_i(0) = ∏ (-xj) / (xi - xj)
+                    num = (num * -xj) % self.prime
+                    den = (den * (xi - xj)) % self.prime
+            # 模逆运算获取分母在 GF(257) 下的倒数
+            den_inv = pow(den, self.prime - 2, self.prime)
+            basis.append((num * den_inv) % self.prime)
+        return basis
+
+    def split_into(self, secret, outputs: list):
+        """
+        将秘密字节分割写入预分配的输出缓冲区（不做逐字节追加）
+
+        Args:
+            secret: 秘密数据（bytes-like，取值 0-255）
+            outputs: n 个可写缓冲区，每个至少 2*len(secret) 字节，
+                     按分片文件格式（小端uint16）写入 P(1)...P(n)
+        """
+        secret = np.frombuffer(secret, dtype=np.uint8)
+        length = len(secret)
+        degree = self.threshold - 1
+        outs = [np.frombuffer(out, dtype=SHARE_DTYPE, count=length) for out in outputs]
+
+        block = min(BLOCK_SIZE, max(length, 1))
+        with self.pool.lease(degree * block) as coeff_buf, \
+                self.pool.lease(4 * block) as acc_buf:
+            for start in range(0, length, block):
+                end = min(start + block, length)
+                size = end - start
+                # 系数 a1..a_{k-1} 为 0-255 的随机字节
+                coeff_view = coeff_buf[:degree * size]
+                _fill_random(coeff_view)
+                coeffs = np.frombuffer(coeff_view, dtype=np.uint8).reshape(degree, size)
+                acc = np.frombuffer(acc_buf, dtype=np.uint32, count=size)
+
+                for x in range(1, self.shares + 1):
+                    # Horner 法求 P(x) = b + a1*x + ... + a_{k-1}*x^{k-1} (mod 257)，全部原地运算
+                    if degree:
+                        acc[:] = coeffs[degree - 1]
+                        for idx in range(degree - 2, -1, -1):
+                            np.multiply(acc, x, out=acc)
+                            np.add(acc, coeffs[idx], out=acc)
+                            np.remainder(acc, self.prime, out=acc)
+                        np.multiply(acc, x, out=acc)
+                        np.add(acc, secret[start:end], out=acc)
+                    else:
+                        acc[:] = secret[start:end]
+                    np.remainder(acc, self.prime, out=acc)
+                    # y 的取值范围是 0-256
+                    np.copyto(outs[x - 1][start:end], acc, casting='unsafe')
+
+    def reconstruct_into(self, xs: list, shares: list, out):
+        """
+        用 k 个分片通过拉格朗日插值恢复秘密，写入预分配的输出缓冲区
+
+        Args:
+            xs: 各分片的 x 坐标
+            shares: 与 xs 对应的分片数据（小端uint16缓冲区或0-256整数数组）
+            out: 可写缓冲区，长度即秘密字节数
+        """
+        secret = np.frombuffer(out, dtype=np.uint8)
+        length = len(secret)
+        ys = [np.asarray(y, dtype=SHARE_DTYPE) if not isinstance(y, (bytes, bytearray, memoryview))
+              else np.frombuffer(y, dtype=SHARE_DTYPE, count=length) for y in shares]
+        basis = self._lagrange_basis(xs)
+
+        block = min(BLOCK_SIZE, max(length, 1))
+        with self.pool.lease(4 * block) as acc_buf, self.pool.lease(4 * block) as tmp_buf:
+            for start in range(0, length, block):
+                end = min(start + block, length)
+                size = end - start
+                acc = np.frombuffer(acc_buf, dtype=np.uint32, count=size)
+                tmp = np.frombuffer(tmp_buf, dtype=np.uint32, count=size)
+
+                # 累加：secret = ∑ yi * L_i(0)
+                acc.fill(0)
+                for y, b in zip(ys, basis):
+                    # 按 uint32 相乘：y 可达 256，L_i(0) 可达 256（≡ -1），uint16 会溢出
+                    np.multiply(y[start:end], b, out=tmp, dtype=np.uint32)
+                    np.add(acc, tmp, out=acc)
+                    np.remainder(acc, self.prime, out=acc)
+
+                # 正确的分片恢复出的值必然在 0-255 之间（因为原始输入就在此范围）
+                if acc.max(initial=0) > 255:
+                    raise ValueError("分片数据不一致，无法恢复（请确认分片来自同一次分割）")
+                np.copyto(secret[start:end], acc, casting='unsafe')
 
     def _reconstruct_secret(self, shares_data: list) -> bytes:
         """
-        修正版：支持从 0-265 范围的分片数据恢复 0-255 的原始字节
+        修正版：支持从 0-256 范围的分片数据恢复 0-255 的原始字节
         """
         # 确保只使用阈值数量的分片
         shares_data = shares_data[:self.threshold]
         # 注意：此时 shares_data[i][1] 是存储了 0-256 整数的列表或数组
         data_len = len(shares_data[0][1])
-        secret = bytearray()
-
-        for byte_index in range(data_len):
-            secret_value = 0
-            for i in range(self.threshold):
-                xi, yi = shares_data[i][0], shares_data[i][1][byte_index]
-                
-                # 计算拉格朗日基函数 L_i(0)
-                num, den = 1, 1
-                for j in range(self.threshold):
-                    if i != j:
-                        xj = shares_data[j][0]
-                        # L_i(0) = ∏ (-xj) / (xi - xj)
-                        num = (num * -xj) % self.prime
-                        den = (den * (xi - xj)) % self.prime
-                
-                # 模逆运算获取分母在 GF(257) 下的倒数
-                den_inv = pow(den, self.prime - 2, self.prime)
-                basis = (num * den_inv) % self.prime
-                
-                # 累加：secret = ∑ yi * L_i(0)
-                secret_value = (secret_value + yi * basis) % self.prime
-            
-            # 此时 secret_value 必然在 0-255 之间（因为原始输入就在此范围）
-            secret.append(secret_value)
-        
+        secret = bytearray(data_len)
+        self.reconstruct_into([x for x, _ in shares_data], [y for _, y in shares_data], secret)
         return bytes(secret)
 
     def split_image(self, image_path: str, output_dir: str):
         """
         修正版：使用双字节存储分片数据，解决 256 溢出导致的字节不匹配问题
+
+        分块计算并直接写入各分片文件，临时缓冲区取自共享缓冲区池，
+        每个请求的额外内存与图像大小无关
         """
         img = Image.open(image_path)
         metadata = {
@@ -59,33 +155,38 @@ class ShamirShare:
             "threshold": self.threshold,
             "shares": self.shares
         }
-        
+
         img_bytes = img.tobytes()
         os.makedirs(output_dir, exist_ok=True)
-        
-        # 存储 0-256 的整数列表
-        shares_values = [[] for _ in range(self.shares)]
-
-        for byte_val in img_bytes:
-            # 秘密 a0 = byte_val (0-255)
-            coeffs = [byte_val] + [int(os.urandom(1)[0]) for _ in range(self.threshold - 1)]
-            
-            for x in range(1, self.shares + 1):
-                y = 0
-                for idx, a in enumerate(coeffs):
-                    y = (y + a * pow(x, idx, self.prime)) % self.prime
-                # y 的取值范围是 0-256
-                shares_values[x-1].append(y)
-
-        # 保存分片：使用 'H' (unsigned short, 2 bytes) 确保 256 不丢失
-        for i, values in enumerate(shares_values):
-            share_path = os.path.join(output_dir, f"share_{i+1}.bin")
-            with open(share_path, 'wb') as f:
-                # 使用 struct 将整数列表打包为二进制
-                # 'H' 代表 16 位无符号整数，'<' 代表小端序
-                f.write(struct.pack(f"<{len(values)}H", *values))
+
+        share_names = [f"share_{i+1}.bin" for i in range(self.shares)]
+        digests = [hashlib.sha256() for _ in range(self.shares)]
+        block = min(BLOCK_SIZE, max(len(img_bytes), 1))
+        with ExitStack() as stack:
+            files = [stack.enter_context(open(os.path.join(output_dir, name), 'wb'))
+                     for name in share_names]
+            outputs = [stack.enter_context(self.pool.lease(2 * block)) for _ in share_names]
+            secret = memoryview(img_bytes)
+            for start in range(0, len(img_bytes), block):
+                end = min(start + block, len(img_bytes))
+                self.split_into(secret[start:end], outputs)
+                # 保存分片：'H' (unsigned short, 2 bytes) 小端序，确保 256 不丢失
+                for f, digest, out in zip(files, digests, outputs):
+                    chunk = out[:2 * (end - start)]
+                    f.write(chunk)
+                    digest.update(chunk)
+
+        metadata["share_files"] = [
+            {
+                "index": i + 1,
+                "filename": name,
+                "size": 2 * len(img_bytes),
+                "sha256": digest.hexdigest()
+            }
+            for i, (name, digest) in enumerate(zip(share_names, digests))
+        ]
 
         with open(os.path.join(output_dir, "metadata.json"), "w") as f:
             json.dump(metadata, f)
-            
-        return metadata
\ No newline at end of file
+
+        return metadata
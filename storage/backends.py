@@ -0,0 +1,283 @@
+"""
+存储后端
+定义统一的存储接口，提供本地文件系统后端和本地对象存储模拟后端。
+所有写操作都先写临时文件再原子替换，多个应用实例共享同一存储层时
+不会读到写了一半的文件
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from storage.layout import validate_key
+
+
+class StorageBackend:
+    """存储后端接口，键为以 / 分隔的相对路径（如 outputs/ab/cd/<job_id>/share_1.bin）"""
+
+    def put_file(self, key: str, local_path: str, move: bool = False) -> int:
+        """
+        存入本地文件
+
+        Args:
+            key: 存储键
+            local_path: 本地文件路径
+            move: 是否允许直接移动源文件（避免复制）
+
+        Returns:
+            写入的字节数
+        """
+        raise NotImplementedError
+
+    def put_bytes(self, key: str, data: bytes) -> int:
+        """存入二进制数据，返回写入的字节数"""
+        raise NotImplementedError
+
+    def open(self, key: str):
+        """以二进制只读方式打开对象，返回文件对象"""
+        raise NotImplementedError
+
+    def as_local_file(self, key: str, scratch_dir: str) -> str:
+        """
+        获取对象的本地文件路径
+
+        本地文件系统后端直接返回真实路径；对象存储后端下载到 scratch_dir 中
+
+        Args:
+            key: 存储键
+            scratch_dir: 可写的临时目录
+
+        Returns:
+            本地文件路径
+        """
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        """对象是否存在"""
+        raise NotImplementedError
+
+    def size(self, key: str) -> int:
+        """对象大小（字节）"""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        """删除对象，返回是否确实删除了"""
+        raise NotImplementedError
+
+    def list(self, prefix: str) -> list:
+        """列出指定前缀下的所有键"""
+        raise NotImplementedError
+
+    def make_staging_dir(self) -> str:
+        """创建一个私有的暂存目录，用于在写入存储前生成文件（调用方负责删除）"""
+        return tempfile.mkdtemp(prefix='staging_')
+
+
+def _atomic_write_from(src_file, dest_path: str) -> int:
+    """将文件对象内容写入目标路径（先写同目录临时文件，再原子替换）"""
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest_path), prefix='.tmp_')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            shutil.copyfileobj(src_file, out, 1024 * 1024)
+            written = out.tell()
+        os.replace(tmp_path, dest_path)
+        return written
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class LocalFSBackend(StorageBackend):
+    """本地文件系统后端：键直接映射为 root 下的相对路径"""
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: 存储根目录（uploads/ 和 outputs/ 位于其下）
+        """
+        self.root = os.path.abspath(root)
+        self.staging_root = os.path.join(self.root, '.staging')
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *validate_key(key).split('/'))
+
+    def put_file(self, key: str, local_path: str, move: bool = False) -> int:
+        dest = self._path(key)
+        if move:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            try:
+                # 暂存目录与存储根在同一文件系统时，移动就是一次原子重命名
+                os.replace(local_path, dest)
+                return os.path.getsize(dest)
+            except OSError:
+                pass
+        with open(local_path, 'rb') as src:
+            written = _atomic_write_from(src, dest)
+        if move:
+            os.remove(local_path)
+        return written
+
+    def put_bytes(self, key: str, data: bytes) -> int:
+        return _atomic_write_from(io.BytesIO(data), self._path(key))
+
+    def open(self, key: str):
+        return open(self._path(key), 'rb')
+
+    def as_local_file(self, key: str, scratch_dir: str) -> str:
+        path = self._path(key)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"对象不存在: {key}")
+        return path
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self._path(key))
+
+    def delete(self, key: str) -> bool:
+        path = self._path(key)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        # 清理变空的任务目录（分片桶目录保留）
+        try:
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
+        return True
+
+    def list(self, prefix: str) -> list:
+        base = self._path(prefix)
+        if os.path.isfile(base):
+            return [prefix]
+        keys = []
+        for dirpath, _, filenames in os.walk(base):
+            rel = os.path.relpath(dirpath, self.root).replace(os.sep, '/')
+            keys.extend(f"{rel}/{name}" for name in filenames if not name.startswith('.tmp_'))
+        return sorted(keys)
+
+    def make_staging_dir(self) -> str:
+        # 暂存在存储根下，使 put_file(move=True) 成为同盘重命名
+        os.makedirs(self.staging_root, exist_ok=True)
+        return tempfile.mkdtemp(prefix='staging_', dir=self.staging_root)
+
+
+class LocalObjectStoreBackend(StorageBackend):
+    """
+    本地对象存储模拟后端
+
+    模拟 S3 一类对象存储的语义：扁平键空间、整对象写入、无目录、无本地路径。
+    对象按键的哈希存放为 objects/<aa>/<hash>，旁边的 .meta 文件记录键、大小和ETag，
+    便于在没有真实对象存储的环境下验证多实例部署
+    """
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: 模拟桶的根目录
+        """
+        self.root = os.path.abspath(root)
+
+    def _object_path(self, key: str) -> str:
+        digest = hashlib.sha256(validate_key(key).encode()).hexdigest()
+        return os.path.join(self.root, 'objects', digest[:2], digest)
+
+    def _write_meta(self, key: str, obj_path: str, etag: str, size: int):
+        meta = {'key': key, 'size': size, 'etag': etag, 'created_at': time.time()}
+        payload = json.dumps(meta).encode()
+        _atomic_write_from(io.BytesIO(payload), obj_path + '.meta')
+
+    def put_file(self, key: str, local_path: str, move: bool = False) -> int:
+        obj_path = self._object_path(key)
+        md5 = hashlib.md5()
+
+        class _HashingReader:
+            """边复制边计算ETag"""
+            def __init__(self, f):
+                self.f = f
+
+            def read(self, n=-1):
+                chunk = self.f.read(n)
+                md5.update(chunk)
+                return chunk
+
+        with open(local_path, 'rb') as src:
+            written = _atomic_write_from(_HashingReader(src), obj_path)
+        self._write_meta(key, obj_path, md5.hexdigest(), written)
+        if move:
+            os.remove(local_path)
+        return written
+
+    def put_bytes(self, key: str, data: bytes) -> int:
+        obj_path = self._object_path(key)
+        written = _atomic_write_from(io.BytesIO(data), obj_path)
+        self._write_meta(key, obj_path, hashlib.md5(data).hexdigest(), written)
+        return written
+
+    def open(self, key: str):
+        obj_path = self._object_path(key)
+        if not os.path.isfile(obj_path + '.meta'):
+            raise FileNotFoundError(f"对象不存在: {key}")
+        return open(obj_path, 'rb')
+
+    def as_local_file(self, key: str, scratch_dir: str) -> str:
+        dest = os.path.join(scratch_dir, key.rsplit('/', 1)[-1])
+        with self.open(key) as src, open(dest, 'wb') as out:
+            shutil.copyfileobj(src, out, 1024 * 1024)
+        return dest
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._object_path(key) + '.meta')
+
+    def size(self, key: str) -> int:
+        with open(self._object_path(key) + '.meta') as f:
+            return json.load(f)['size']
+
+    def delete(self, key: str) -> bool:
+        obj_path = self._object_path(key)
+        existed = False
+        # 先删除元数据，使对象立即对其他实例不可见
+        for path in (obj_path + '.meta', obj_path):
+            try:
+                os.remove(path)
+                existed = True
+            except FileNotFoundError:
+                pass
+        return existed
+
+    def list(self, prefix: str) -> list:
+        # 模拟后端没有键索引，需遍历元数据（真实对象存储由服务端完成前缀查询）
+        keys = []
+        objects_dir = os.path.join(self.root, 'objects')
+        for dirpath, _, filenames in os.walk(objects_dir):
+            for name in filenames:
+                if name.endswith('.meta'):
+                    with open(os.path.join(dirpath, name)) as f:
+                        key = json.load(f)['key']
+                    if key == prefix or key.startswith(prefix.rstrip('/') + '/'):
+                        keys.append(key)
+        return sorted(keys)
+
+
+_storage = None
+
+
+def get_storage() -> StorageBackend:
+    """按配置创建（并缓存）当前进程使用的存储后端"""
+    global _storage
+    if _storage is None:
+        import config
+        if config.STORAGE_BACKEND == 'object':
+            _storage = LocalObjectStoreBackend(config.OBJECT_STORE_ROOT)
+        elif config.STORAGE_BACKEND == 'local':
+            _storage = LocalFSBackend(config.STORAGE_ROOT)
+        else:
+            raise ValueError(f"未知的存储后端: {config.STORAGE_BACKEND}")
+    return _storage
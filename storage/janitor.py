@@ -0,0 +1,140 @@
+"""
+存储清理器
+后台线程定期执行：
+1. 按区域TTL删除长期未访问的任务文件（上传原图和输出分片分别配置）
+2. 对超过单用户配额的用户，按最后访问时间LRU淘汰其任务
+3. 全局用量超过总配额时，按LRU淘汰全局最久未访问的任务
+用量来自 UsageLedger 的增量账本，清理过程不遍历目录树
+"""
+import threading
+import time
+
+from database import share_catalog
+from storage.layout import AREA_UPLOADS, AREA_OUTPUTS
+
+
+class Janitor(threading.Thread):
+    """存储清理后台线程"""
+
+    def __init__(self, storage, ledger, ttls: dict, global_quota: int = None,
+                 user_quota: int = None, interval: float = 300, catalog_db_path: str = None):
+        """
+        Args:
+            storage: 存储后端
+            ledger: 用量账本 UsageLedger
+            ttls: 各区域的TTL（秒），如 {'uploads': 86400, 'outputs': 604800}，None表示不过期
+            global_quota: 全局字节配额，None表示不限制
+            user_quota: 单用户字节配额，None表示不限制
+            interval: 两次清理之间的间隔（秒）
+            catalog_db_path: 分片目录表所在数据库（默认与账本相同）
+        """
+        super().__init__(name='storage-janitor', daemon=True)
+        self.storage = storage
+        self.ledger = ledger
+        self.ttls = ttls
+        self.global_quota = global_quota
+        self.user_quota = user_quota
+        self.interval = interval
+        self.catalog_db_path = catalog_db_path or ledger.db_path
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self.metrics = {
+            'runs': 0,
+            'last_run': None,
+            'last_run_seconds': 0.0,
+            'reclaimed_bytes': 0,
+            'reclaimed_objects': 0,
+            'evicted_jobs': {'ttl': 0, 'user_quota': 0, 'global_quota': 0},
+            'errors': 0
+        }
+
+    def evict_job(self, job_id: str, area: str = None) -> int:
+        """
+        删除任务（可限定区域）下的全部对象
+
+        Returns:
+            回收的字节数
+        """
+        entries = self.ledger.job_keys(job_id, area)
+        reclaimed = 0
+        for key, size in entries:
+            self.storage.delete(key)
+            reclaimed += size
+        self.ledger.forget([key for key, _ in entries])
+        if area in (None, AREA_OUTPUTS):
+            # 分片已不存在，目录表中的任务记录一并删除
+            share_catalog.delete_job(job_id, db_path=self.catalog_db_path)
+
+        with self._lock:
+            self.metrics['reclaimed_bytes'] += reclaimed
+            self.metrics['reclaimed_objects'] += len(entries)
+        return reclaimed
+
+    def run_once(self, now: float = None):
+        """执行一轮清理"""
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+
+        # 1. TTL过期
+        for area in (AREA_UPLOADS, AREA_OUTPUTS):
+            ttl = self.ttls.get(area)
+            if ttl is None:
+                continue
+            while True:
+                expired = self.ledger.expired_jobs(area, now - ttl)
+                if not expired:
+                    break
+                for job_id in expired:
+                    self.evict_job(job_id, area)
+                    self._count('ttl')
+
+        # 2. 单用户配额
+        if self.user_quota is not None:
+            for user_id in self.ledger.users_over_quota(self.user_quota):
+                while self.ledger.usage(user_id)['bytes'] > self.user_quota:
+                    job_id = self.ledger.least_recent_job(user_id)
+                    if job_id is None:
+                        break
+                    self.evict_job(job_id)
+                    self._count('user_quota')
+
+        # 3. 全局配额
+        if self.global_quota is not None:
+            while self.ledger.usage()['bytes'] > self.global_quota:
+                job_id = self.ledger.least_recent_job()
+                if job_id is None:
+                    break
+                self.evict_job(job_id)
+                self._count('global_quota')
+
+        with self._lock:
+            self.metrics['runs'] += 1
+            self.metrics['last_run'] = now
+            self.metrics['last_run_seconds'] = time.perf_counter() - started
+
+    def _count(self, reason: str):
+        with self._lock:
+            self.metrics['evicted_jobs'][reason] += 1
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                # 清理失败不影响服务，下一轮重试
+                with self._lock:
+                    self.metrics['errors'] += 1
+
+    def stop(self):
+        """停止后台线程"""
+        self._stop_event.set()
+
+    def get_metrics(self) -> dict:
+        """返回清理指标和当前全局用量"""
+        with self._lock:
+            metrics = dict(self.metrics)
+            metrics['evicted_jobs'] = dict(self.metrics['evicted_jobs'])
+        metrics['usage'] = self.ledger.usage()
+        metrics['global_quota'] = self.global_quota
+        metrics['user_quota'] = self.user_quota
+        return metrics
@@ -0,0 +1,73 @@
+"""
+存储布局
+生成全局唯一的任务ID，并按ID哈希分散到两级子目录，
+避免同一秒内的并发任务互相覆盖，也避免单个目录下堆积海量条目
+"""
+import hashlib
+import uuid
+
+# 存储区域（键的第一段）
+AREA_UPLOADS = 'uploads'
+AREA_OUTPUTS = 'outputs'
+AREAS = (AREA_UPLOADS, AREA_OUTPUTS)
+
+
+def new_job_id() -> str:
+    """生成全局唯一的任务ID（32位十六进制，多实例间无需协调）"""
+    return uuid.uuid4().hex
+
+
+def shard_prefix(job_id: str) -> str:
+    """
+    计算任务ID的分片前缀
+
+    Args:
+        job_id: 任务ID
+
+    Returns:
+        形如 'ab/cd' 的两级目录前缀（65536个桶）
+    """
+    digest = hashlib.sha256(job_id.encode()).hexdigest()
+    return f"{digest[:2]}/{digest[2:4]}"
+
+
+def job_prefix(area: str, job_id: str) -> str:
+    """
+    计算任务在存储中的键前缀
+
+    Args:
+        area: 存储区域（uploads 或 outputs）
+        job_id: 任务ID
+
+    Returns:
+        形如 'outputs/ab/cd/<job_id>' 的键前缀
+    """
+    if area not in AREAS:
+        raise ValueError(f"未知的存储区域: {area}")
+    return f"{area}/{shard_prefix(job_id)}/{job_id}"
+
+
+def job_key(area: str, job_id: str, name: str) -> str:
+    """计算任务内某个文件的存储键"""
+    return f"{job_prefix(area, job_id)}/{name}"
+
+
+def validate_key(key: str) -> str:
+    """
+    校验存储键，防止目录遍历
+
+    Args:
+        key: 存储键（以 / 分隔的相对路径）
+
+    Returns:
+        原样返回合法的键
+
+    Raises:
+        ValueError: 键非法
+    """
+    if not key or key.startswith('/') or '\\' in key or '\0' in key:
+        raise ValueError(f"非法的存储键: {key!r}")
+    parts = key.split('/')
+    if parts[0] not in AREAS or any(p in ('', '.', '..') for p in parts):
+        raise ValueError(f"非法的存储键: {key!r}")
+    return key
@@ -0,0 +1,154 @@
+"""
+存储用量账本
+在写入、访问和删除存储对象时增量记录大小与访问时间，
+用量汇总由数据库触发器维护，查询用量无需遍历目录树
+"""
+import sqlite3
+import time
+
+from database.init_db import DATABASE_PATH
+
+
+class UsageLedger:
+    """存储对象账本（基于 users.db 中的 storage_objects / storage_usage 表）"""
+
+    def __init__(self, db_path: str = DATABASE_PATH):
+        """
+        Args:
+            db_path: 数据库路径
+        """
+        self.db_path = db_path
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def record(self, key: str, size: int, user_id: int, now: float = None):
+        """
+        记录一次写入（同一键重复写入时更新大小）
+
+        Args:
+            key: 存储键（<区域>/<aa>/<bb>/<job_id>/<文件名>）
+            size: 对象大小（字节）
+            user_id: 所属用户ID
+            now: 当前时间戳（测试用）
+        """
+        now = time.time() if now is None else now
+        area, job_id = key.split('/')[0], key.split('/')[3]
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    '''INSERT INTO storage_objects
+                       (key, job_id, area, user_id, size, created_at, last_access)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (key) DO UPDATE SET size = excluded.size,
+                                                       last_access = excluded.last_access''',
+                    (key, job_id, area, user_id, size, now, now)
+                )
+        finally:
+            conn.close()
+
+    def touch_job(self, job_id: str, now: float = None):
+        """记录一次访问：整个任务的对象一起刷新访问时间，LRU按任务整体淘汰"""
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('UPDATE storage_objects SET last_access = ? WHERE job_id = ?',
+                             (now, job_id))
+        finally:
+            conn.close()
+
+    def job_keys(self, job_id: str, area: str = None) -> list:
+        """列出任务（可限定区域）下的所有对象 [(key, size), ...]"""
+        conn = self._connect()
+        try:
+            if area is None:
+                rows = conn.execute('SELECT key, size FROM storage_objects WHERE job_id = ?',
+                                    (job_id,)).fetchall()
+            else:
+                rows = conn.execute(
+                    'SELECT key, size FROM storage_objects WHERE job_id = ? AND area = ?',
+                    (job_id, area)).fetchall()
+            return [(row['key'], row['size']) for row in rows]
+        finally:
+            conn.close()
+
+    def forget(self, keys: list):
+        """从账本中移除对象"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany('DELETE FROM storage_objects WHERE key = ?',
+                                 [(key,) for key in keys])
+        finally:
+            conn.close()
+
+    def expired_jobs(self, area: str, cutoff: float, limit: int = 500) -> list:
+        """查找指定区域中最后访问早于 cutoff 的任务ID"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                '''SELECT job_id FROM storage_objects WHERE area = ? AND last_access < ?
+                   GROUP BY job_id ORDER BY MIN(last_access) LIMIT ?''',
+                (area, cutoff, limit)
+            ).fetchall()
+            return [row['job_id'] for row in rows]
+        finally:
+            conn.close()
+
+    def least_recent_job(self, user_id: int = None) -> str:
+        """查找（全局或某用户）最久未访问的任务ID，没有对象时返回None"""
+        conn = self._connect()
+        try:
+            if user_id is None:
+                row = conn.execute(
+                    'SELECT job_id FROM storage_objects ORDER BY last_access LIMIT 1'
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    '''SELECT job_id FROM storage_objects WHERE user_id = ?
+                       ORDER BY last_access LIMIT 1''',
+                    (user_id,)
+                ).fetchone()
+            return row['job_id'] if row else None
+        finally:
+            conn.close()
+
+    def usage(self, user_id: int = None) -> dict:
+        """
+        查询当前用量
+
+        Args:
+            user_id: 用户ID，为None时返回全局用量
+
+        Returns:
+            {'bytes': 字节数, 'objects': 对象数}
+        """
+        conn = self._connect()
+        try:
+            if user_id is None:
+                row = conn.execute(
+                    'SELECT COALESCE(SUM(bytes), 0) AS bytes, COALESCE(SUM(objects), 0) AS objects '
+                    'FROM storage_usage'
+                ).fetchone()
+            else:
+                row = conn.execute('SELECT bytes, objects FROM storage_usage WHERE user_id = ?',
+                                   (user_id,)).fetchone()
+            if row is None:
+                return {'bytes': 0, 'objects': 0}
+            return {'bytes': row['bytes'], 'objects': row['objects']}
+        finally:
+            conn.close()
+
+    def users_over_quota(self, quota_bytes: int) -> list:
+        """列出用量超过配额的用户ID"""
+        conn = self._connect()
+        try:
+            rows = conn.execute('SELECT user_id FROM storage_usage WHERE bytes > ?',
+                                (quota_bytes,)).fetchall()
+            return [row['user_id'] for row in rows]
+        finally:
+            conn.close()
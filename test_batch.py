@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+批量处理测试
+验证逐条结果与单独调用一致、单条错误不影响其他条目，以及批次内密钥共享
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from Crypto.PublicKey import RSA
+
+from batch import dispatcher
+from crypto_classic import caesar, vigenere
+from crypto_modern import aes_cipher, md5_hash, rsa_cipher
+
+
+def test_batch_results_match_direct_calls():
+    items = [
+        {'algorithm': 'caesar', 'operation': 'encrypt', 'text': 'Hello', 'params': {'shift': 5}},
+        {'algorithm': 'vigenere', 'operation': 'decrypt', 'text': 'Rijvs', 'params': {'key': 'KEY'}},
+        {'algorithm': 'md5', 'text': 'abc'},
+        {'algorithm': 'aes', 'operation': 'encrypt', 'text': 'secret', 'params': {'key': 'k', 'key_size': 16}},
+        {'algorithm': 'substitution', 'operation': 'encrypt', 'text': 'abc'},
+    ]
+    batch = dispatcher.run_batch(items)
+    results = batch['results']
+    assert batch['succeeded'] == 5 and batch['failed'] == 0
+    assert [result['index'] for result in results] == list(range(5))
+    assert results[0]['result'] == caesar.encrypt('Hello', 5)
+    assert results[1]['result'] == vigenere.decrypt('Rijvs', 'KEY')
+    assert results[2]['hash'] == md5_hash.hash_text('abc')
+    assert aes_cipher.decrypt(results[3]['result'], 'k', 16) == 'secret'
+    assert len(results[4]['key']) == 26
+
+
+def test_batch_item_errors_are_isolated():
+    items = [
+        {'algorithm': 'unknown', 'text': 'x'},
+        {'algorithm': 'playfair', 'operation': 'encrypt', 'text': 'hello'},
+        {'algorithm': 'md5', 'operation': 'encrypt', 'text': 'x'},
+        'not an object',
+        {'algorithm': 'caesar', 'operation': 'decrypt', 'text': 'KHOOR'},
+    ]
+    batch = dispatcher.run_batch(items)
+    assert batch['succeeded'] == 1 and batch['failed'] == 4
+    assert all('message' in result for result in batch['results'][:4])
+    assert batch['results'][4]['result'] == 'HELLO'
+
+
+def test_batch_rsa_uses_shared_key_cache():
+    key = RSA.generate(1024)
+    public_pem = key.publickey().export_key().decode()
+    private_pem = key.export_key().decode()
+    rsa_cipher.key_cache.clear()
+
+    items = [{'algorithm': 'rsa', 'operation': 'encrypt', 'text': f'message {i}',
+              'params': {'public_key': public_pem}} for i in range(6)]
+    encrypted = dispatcher.run_batch(items)
+    assert encrypted['succeeded'] == 6
+    assert rsa_cipher.key_cache.stats()['misses'] == 1
+
+    items = [{'algorithm': 'rsa', 'operation': 'decrypt', 'text': result['result'],
+              'params': {'private_key': private_pem}} for result in encrypted['results']]
+    decrypted = dispatcher.run_batch(items, parallel=True)
+    assert [result['result'] for result in decrypted['results']] == [f'message {i}' for i in range(6)]
+    assert rsa_cipher.decrypt(encrypted['results'][0]['result'], private_pem) == 'message 0'
+
+
+def test_batch_groups_aes_and_des_items_by_key():
+    calls = []
+    original = aes_cipher.encrypt_batch
+
+    def counting_encrypt_batch(texts, *args, **kwargs):
+        calls.append(len(texts))
+        return original(texts, *args, **kwargs)
+
+    items = [{'algorithm': 'aes', 'operation': 'encrypt', 'text': f'aes {i}',
+              'params': {'key': 'pw', 'key_size': 16}} for i in range(5)]
+    items += [{'algorithm': 'des', 'operation': 'encrypt', 'text': f'des {i}',
+               'params': {'key': 'pw'}} for i in range(5)]
+    items.append({'algorithm': 'caesar', 'operation': 'encrypt', 'text': 'abc'})
+    aes_cipher.encrypt_batch = counting_encrypt_batch
+    try:
+        encrypted = dispatcher.run_batch(items)
+    finally:
+        aes_cipher.encrypt_batch = original
+    assert encrypted['succeeded'] == 11
+    # 口令相同的 AES 条目合并为一次 encrypt_batch 调用
+    assert calls == [5]
+    results = encrypted['results']
+    assert [aes_cipher.decrypt(result['result'], 'pw', 16) for result in results[:5]] == \
+        [f'aes {i}' for i in range(5)]
+    assert results[0]['key_size'] == 16 and results[10]['result'] == caesar.encrypt('abc', 3)
+
+    items = [{'algorithm': 'aes' if i < 5 else 'des', 'operation': 'decrypt', 'text': result['result'],
+              'params': {'key': 'pw', 'key_size': 16}} for i, result in enumerate(results[:10])]
+    items.insert(2, {'algorithm': 'des', 'operation': 'decrypt', 'text': 'AAAA', 'params': {'key': 'pw'}})
+    items.append({'algorithm': 'aes', 'operation': 'encrypt', 'text': 'x',
+                  'params': {'key': 'pw', 'key_size': 7}})
+    decrypted = dispatcher.run_batch(items)
+    assert decrypted['succeeded'] == 10 and decrypted['failed'] == 2
+    outputs = [result.get('result') for result in decrypted['results']]
+    assert outputs[:2] + outputs[3:11] == [f'aes {i}' for i in range(5)] + [f'des {i}' for i in range(5)]
+    assert '处理失败' in decrypted['results'][2]['message']
+    assert '处理失败' in decrypted['results'][11]['message']
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name} 通过")
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+经典密码算法测试
+验证转换表实现与逐字符定义一致，以及各种边界情况
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from crypto_classic import caesar, substitution, playfair, substitution_cracker, playfair_cracker
+from crypto_classic import ngrams, vigenere, streaming
+from crypto_classic.crack_jobs import CrackJobManager
+
+SAMPLE = "Hello, World! The quick brown fox jumps over the lazy dog. 123\n中文保持不变"
+
+
+def _caesar_reference(text: str, shift: int) -> str:
+    """逐字符的凯撒加密参考实现（只处理ASCII字母）"""
+    out = []
+    for ch in text:
+        if 'a' <= ch <= 'z':
+            out.append(chr((ord(ch) - 97 + shift) % 26 + 97))
+        elif 'A' <= ch <= 'Z':
+            out.append(chr((ord(ch) - 65 + shift) % 26 + 65))
+        else:
+            out.append(ch)
+    return ''.join(out)
+
+
+def test_caesar_matches_reference():
+    for shift in (-27, -3, 0, 1, 3, 13, 25, 26, 52, 100):
+        assert caesar.encrypt(SAMPLE, shift) == _caesar_reference(SAMPLE, shift)
+        assert caesar.decrypt(caesar.encrypt(SAMPLE, shift), shift) == SAMPLE
+    assert caesar.encrypt("HELLO", 3) == "KHOOR"
+
+
+def test_caesar_bytes_and_brute_force():
+    data = SAMPLE.encode('ascii', 'ignore')
+    assert caesar.encrypt_bytes(data, 7) == caesar.encrypt(data.decode(), 7).encode()
+    assert caesar.decrypt_bytes(caesar.encrypt_bytes(data, 7), 7) == data
+
+    candidates = caesar.brute_force_crack(caesar.encrypt(SAMPLE, 11))
+    assert len(candidates) == 26 and candidates[11] == SAMPLE
+
+
+def test_caesar_crack_ranks_true_shift_first():
+    plaintext = "It was the best of times, it was the worst of times, it was the age of wisdom."
+    for method in ('chi_squared', 'log_likelihood'):
+        candidates = caesar.crack(caesar.encrypt(plaintext, 17), top=2, method=method)
+        assert len(candidates) == 26
+        assert candidates[0]['shift'] == 17 and candidates[0]['plaintext'] == plaintext
+        assert 'plaintext' in candidates[1] and 'plaintext' not in candidates[2]
+
+
+def test_substitution_roundtrip_and_case():
+    key = substitution.generate_key()
+    ciphertext = substitution.encrypt(SAMPLE, key)
+    assert substitution.decrypt(ciphertext, key) == SAMPLE
+    assert substitution.encrypt("abc ABC", "qwertyuiopasdfghjklzxcvbnm") == "qwe QWE"
+    assert substitution.decrypt("qwe QWE") == "abc ABC"
+
+    data = SAMPLE.encode('ascii', 'ignore')
+    assert substitution.encrypt_bytes(data, key) == substitution.encrypt(data.decode(), key).encode()
+    assert substitution.decrypt_bytes(substitution.encrypt_bytes(data, key), key) == data
+
+
+def test_substitution_cracker_recovers_plaintext():
+    plaintext = ("It is a truth universally acknowledged, that a single man in possession of a good "
+                 "fortune, must be in want of a wife. However little known the feelings or views of "
+                 "such a man may be on his first entering a neighbourhood, this truth is so well fixed "
+                 "in the minds of the surrounding families, that he is considered the rightful property "
+                 "of some one or other of their daughters.")
+    # 固定密钥和种子：随机密钥下 6 次重启偶尔找不到全局最优，测试结果不稳定
+    ciphertext = substitution.encrypt(plaintext, "zyxwvutsrqponmlkjihgfedcba")
+    progress = []
+    result = substitution_cracker.crack(ciphertext, time_budget=30, restarts=10, workers=1,
+                                        progress=progress.append, seed=1)
+    assert result['plaintext'] == plaintext
+    assert substitution.decrypt(ciphertext, result['key']) == plaintext
+    assert len(progress) == result['restarts'] == 10
+
+
+def test_substitution_cracker_runs_as_bounded_job():
+    ciphertext = substitution.encrypt(SAMPLE * 3, "zyxwvutsrqponmlkjihgfedcba")
+    jobs = CrackJobManager(max_running=1)
+    job_id = jobs.submit(1, substitution_cracker.crack, ciphertext=ciphertext, time_budget=1,
+                         restarts=3, workers=1, seed=1)
+    try:
+        jobs.submit(1, substitution_cracker.crack, ciphertext=ciphertext, time_budget=1)
+        raise AssertionError("运行中的任务已达上限时应拒绝新任务")
+    except RuntimeError:
+        pass
+    for _ in range(100):
+        job = jobs.get(job_id, user_id=1)
+        if job['status'] != 'running':
+            break
+        time.sleep(0.1)
+    assert job['status'] == 'done', job['error']
+    assert job['progress']['restarts'] == job['result']['restarts'] >= 1
+
+
+def test_substitution_rejects_bad_keys():
+    for bad in ("abc", "a" * 26):
+        try:
+            substitution.encrypt(SAMPLE, bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"应拒绝非法替换表: {bad!r}")
+
+
+def test_playfair_known_vector_and_roundtrip():
+    # 经典示例：密钥 PLAYFAIR EXAMPLE
+    assert playfair.encrypt("Hide the gold in the tree stump", "playfair example")[:10] == "BMODZBXDNA"
+    plaintext = "WEAREDISCOVEREDSAVEYOURSELF"
+    ciphertext = playfair.encrypt(plaintext, "monarchy")
+    assert playfair.decrypt(ciphertext, "monarchy") == plaintext + "X"
+
+
+def test_playfair_vectorized_path_matches_table_path():
+    text = "Attack at dawn, hold the bridge! " * 400
+    key = "keyword"
+    original = playfair.VECTORIZE_THRESHOLD
+    try:
+        playfair.VECTORIZE_THRESHOLD = 10 ** 9
+        expected = playfair.encrypt(text, key)
+        expected_plain = playfair.decrypt(playfair._prepare_text(text), key)
+        playfair.VECTORIZE_THRESHOLD = 2
+        assert playfair.encrypt(text, key) == expected
+        assert playfair.decrypt(playfair._prepare_text(text), key) == expected_plain
+    finally:
+        playfair.VECTORIZE_THRESHOLD = original
+
+
+def test_playfair_tables_cached_and_odd_ciphertext_rejected():
+    playfair.encrypt("warmup", "cache key")
+    hits = playfair._key_tables.cache_info().hits
+    playfair.encrypt("again", "CACHE KEY")
+    assert playfair._key_tables.cache_info().hits == hits + 1
+
+    try:
+        playfair.decrypt("ABC", "cache key")
+    except ValueError:
+        return
+    raise AssertionError("奇数长度密文应抛出 ValueError")
+
+
+def test_playfair_cracker_scorer_matches_decrypt():
+    ciphertext = playfair.encrypt("WEAREDISCOVEREDSAVEYOURSELFQUICKLYNOW", "monarchy")
+    scorer = playfair_cracker._Scorer(
+        np.array([playfair_cracker._ALPHABET_INDEX[c] for c in ciphertext]),
+        playfair_cracker.quadgram_table())
+    for key in ("MONARCHY", "PLAYFAIREXAMPLE", playfair_cracker.ALPHABET[::-1]):
+        square = np.array([playfair_cracker._ALPHABET_INDEX[c]
+                           for c in playfair._tables_for(key)['letters']])
+        decrypted = ''.join(playfair_cracker.ALPHABET[i] for i in scorer.decrypt(square))
+        assert decrypted == playfair.decrypt(ciphertext, key)
+
+
+def test_playfair_cracker_job_reports_progress():
+    ciphertext = playfair.encrypt("THEQUICKBROWNFOXIUMPSOVERTHELAZYDOGANDKEEPSRUNNING", "secret")
+    jobs = CrackJobManager(max_running=1)
+    job_id = jobs.submit(1, playfair_cracker.crack, ciphertext=ciphertext, time_budget=0.5,
+                         chains=2, workers=1, seed=1)
+    assert jobs.get(job_id, user_id=2) is None
+    for _ in range(100):
+        job = jobs.get(job_id, user_id=1)
+        if job['status'] != 'running':
+            break
+        time.sleep(0.1)
+    assert job['status'] == 'done', job['error']
+    assert job['progress']['rounds'] == job['result']['rounds'] >= 1
+    assert sorted(job['result']['key']) == sorted(playfair_cracker.ALPHABET)
+
+
+def test_playfair_cracker_recovers_long_ciphertext():
+    """约 770 个字母的密文足以让模拟退火恢复出明文（固定种子、单进程，结果可复现）"""
+    text = ("It is a truth universally acknowledged, that a single man in possession of a good fortune, "
+            "must be in want of a wife. However little known the feelings or views of such a man may be "
+            "on his first entering a neighbourhood, this truth is so well fixed in the minds of the "
+            "surrounding families, that he is considered the rightful property of some one or other of "
+            "their daughters. My dear Mr. Bennet, said his lady to him one day, have you heard that "
+            "Netherfield Park is let at last? Mr. Bennet replied that he had not. But it is, returned "
+            "she; for Mrs. Long has just been here, and she told me all about it. Mr. Bennet made no "
+            "answer. Do you not want to know who has taken it? cried his wife impatiently. You want to "
+            "tell me, and I have no objection to hearing it. This was invitation enough. Why, my dear, "
+            "you must know, Mrs. Long says that Netherfield is taken by a young man of large fortune "
+            "from the north of England; that he came down on Monday in a chaise and four to see the place")
+    # 预先在双字母组内的重复字母之间插入 X，使密文严格按双字母组对齐
+    letters = []
+    for char in text.upper().replace('J', 'I'):
+        if char.isalpha():
+            if len(letters) % 2 and letters[-1] == char:
+                letters.append('X')
+            letters.append(char)
+    plaintext = ''.join(letters[:len(letters) // 2 * 2])
+    ciphertext = playfair.encrypt(plaintext, "pride and prejudice")
+    assert len(ciphertext) > 750
+
+    result = playfair_cracker.crack(ciphertext, time_budget=240, chains=1, workers=1, seed=3)
+    assert result['plaintext'] == plaintext
+    assert playfair.decrypt(ciphertext, result['key']) == plaintext
+
+
+def test_vigenere_roundtrip_and_known_vector():
+    assert vigenere.encrypt("ATTACKATDAWN", "LEMON") == "LXFOPVEFRNHR"
+    assert vigenere.encrypt("Attack, at dawn!", "lemon") == "Lxfopv, ef rnhr!"
+    assert vigenere.encrypt(SAMPLE, "D") == caesar.encrypt(SAMPLE, 3)
+    assert vigenere.decrypt(vigenere.encrypt(SAMPLE, "Key"), "Key") == SAMPLE
+
+
+def test_vigenere_crack_finds_key():
+    plaintext = ("It is a truth universally acknowledged, that a single man in possession of a good "
+                 "fortune, must be in want of a wife. However little known the feelings or views of "
+                 "such a man may be on his first entering a neighbourhood, this truth is so well fixed "
+                 "in the minds of the surrounding families, that he is considered the rightful property "
+                 "of some one or other of their daughters. ") * 3
+    result = vigenere.crack(vigenere.encrypt(plaintext, "CIPHER"))
+    assert result['period'] == 6 and result['key'] == "CIPHER"
+    assert result['plaintext'] == plaintext
+
+
+def test_streaming_matches_in_memory_across_chunk_boundaries():
+    import io
+    data = (SAMPLE + " café " * 3).encode('utf-8') * 5
+    chunks = list(streaming.iter_chunks(io.BytesIO(data), chunk_size=7))
+    assert b''.join(chunks) == data
+
+    text = data.decode('utf-8')
+    assert b''.join(streaming.caesar_stream(chunks, 4)).decode() == caesar.encrypt(text, 4)
+    key = substitution.generate_key()
+    assert b''.join(streaming.substitution_stream(chunks, key)).decode() == substitution.encrypt(text, key)
+
+    ascii_text = "Hide the gold in the tree stump, ballooning all the way! " * 20
+    ascii_chunks = [ascii_text[i:i + 5].encode() for i in range(0, len(ascii_text), 5)]
+    ciphertext = b''.join(streaming.playfair_stream(ascii_chunks, "monarchy")).decode()
+    assert ciphertext == playfair.encrypt(ascii_text, "monarchy")
+    even = ciphertext[:len(ciphertext) // 2 * 2]
+    plain = b''.join(streaming.cipher_stream("playfair", [even[:3].encode(), even[3:].encode()],
+                                             "monarchy", decrypt=True)).decode()
+    assert plain == playfair.decrypt(even, "monarchy")
+
+
+def test_ngram_tables_persisted_and_memory_mapped():
+    import tempfile
+    with tempfile.TemporaryDirectory() as table_dir:
+        corpus = Path(table_dir) / 'corpus.txt'
+        corpus.write_text("the then there these " * 50)
+        paths = ngrams.build_tables(str(corpus), table_dir)
+        table = np.load(paths[2], mmap_mode='r')
+        assert table.shape == (26 ** 2,) and table.dtype == np.float32
+        assert table[ngrams.ngram_indices(ngrams.text_to_codes("TH"), 2)[0]] == table.max()
+        del table
+
+    quadgrams = ngrams.quadgram_table()
+    assert not quadgrams.flags.writeable and ngrams.quadgram_table() is quadgrams
+
+
+def test_ngram_analyze_profile():
+    result = ngrams.analyze("Hello, hello world! The theory of the thing.", top=3)
+    assert result['letters'] == 34
+    assert result['histogram']['L'] == 5
+    assert result['bigrams'][0] == {'ngram': 'HE', 'count': 5, 'frequency': round(5 / 33, 6)}
+    assert 0.06 < result['index_of_coincidence'] < 0.1
+    assert ngrams.analyze("")['index_of_coincidence'] == 0.0
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name} 通过")
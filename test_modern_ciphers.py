@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+现代密码算法测试
+验证流式/批量等高性能实现与逐条调用的结果一致，以及篡改检测等边界情况
+"""
+
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from crypto_modern import aes_stream, aes_cipher, des_cipher, kdf, envelope
+from crypto_modern import rsa_cipher
+from crypto_modern.rsa_pool import RSAKeyPool
+
+
+def test_aes_stream_round_trip_and_size():
+    for size in (0, 1, 1023, 1024, 1025, 5000):
+        data = os.urandom(size)
+        encrypted = aes_stream.encrypt_bytes(data, 'password', 16, chunk_size=1024)
+        assert len(encrypted) == aes_stream.encrypted_size(size, 1024)
+        assert aes_stream.decrypt_bytes(encrypted, 'password') == data
+
+    # 流式解密逐块输出，不必读完整个文件
+    encrypted = aes_stream.encrypt_bytes(b'a' * 4096, 'password', chunk_size=1024)
+    chunks = aes_stream.decrypt_stream(io.BytesIO(encrypted), 'password')
+    assert next(chunks) == b'a' * 1024
+
+
+def test_aes_stream_detects_tampering():
+    encrypted = aes_stream.encrypt_bytes(os.urandom(5000), 'password', chunk_size=1024)
+    flipped = bytearray(encrypted)
+    flipped[-100] ^= 1
+    frame = aes_stream.FRAME_OVERHEAD + 1024
+    dropped_last = encrypted[:aes_stream.HEADER_SIZE + 4 * frame]
+    for bad in (bytes(flipped), encrypted[:-1], dropped_last, encrypted + b'x'):
+        try:
+            aes_stream.decrypt_bytes(bad, 'password')
+            assert False, "篡改未被发现"
+        except ValueError:
+            pass
+    try:
+        aes_stream.decrypt_bytes(encrypted, 'wrong')
+        assert False, "错误密钥未被发现"
+    except ValueError:
+        pass
+
+
+def test_aes_parallel_matches_stream_format():
+    for size in (0, 1024, 5000, 10240):
+        data = os.urandom(size)
+        for workers in (1, 3):
+            streamed = b''.join(aes_stream.encrypt_stream(io.BytesIO(data), 'pw', 32, 1024,
+                                                          workers=workers))
+            assert aes_stream.decrypt_bytes(streamed, 'pw') == data
+            assert bytes(aes_stream.decrypt_parallel(streamed, 'pw', workers=workers)) == data
+
+            output = bytearray(aes_stream.encrypted_size(size, 1024) + 7)
+            encrypted = aes_stream.encrypt_parallel(data, 'pw', 32, 1024, workers=workers,
+                                                    output=output)
+            assert encrypted.obj is output and len(encrypted) == len(streamed)
+            chunks = aes_stream.decrypt_stream(io.BytesIO(bytes(encrypted)), 'pw', workers=workers)
+            assert b''.join(chunks) == data
+
+    # 每组明文不超过 GROUP_BYTES，与线程数无关
+    assert aes_stream._group_size(64, aes_stream.MAX_CHUNK_SIZE) == aes_stream.GROUP_BYTES // aes_stream.MAX_CHUNK_SIZE
+    assert aes_stream._group_size(64, 1024) == 64 and aes_stream._group_size(1, 1024) == 1
+    original = aes_stream.GROUP_BYTES
+    aes_stream.GROUP_BYTES = 2048
+    try:
+        data = os.urandom(10240)
+        pieces = list(aes_stream.encrypt_stream(io.BytesIO(data), 'pw', 32, 1024, workers=8))
+        assert max(len(piece) for piece in pieces[1:]) <= 2 * (1024 + aes_stream.FRAME_OVERHEAD)
+        plain = list(aes_stream.decrypt_stream(io.BytesIO(b''.join(pieces)), 'pw', workers=8))
+        assert b''.join(plain) == data and max(len(piece) for piece in plain) <= 2048
+    finally:
+        aes_stream.GROUP_BYTES = original
+
+    encrypted = bytearray(aes_stream.encrypt_parallel(os.urandom(5000), 'pw', chunk_size=1024))
+    encrypted[-2000] ^= 1
+    try:
+        aes_stream.decrypt_parallel(encrypted, 'pw', workers=3)
+        assert False, "篡改未被发现"
+    except ValueError:
+        pass
+
+
+def test_aes_stream_derives_key_and_reads_legacy():
+    encrypted = aes_stream.encrypt_bytes(b'stream', 'pw', 16, chunk_size=1024, kdf='scrypt', cost=1024)
+    base = aes_stream.BASE_HEADER_SIZE
+    assert aes_stream.parse_header(encrypted)['version'] == aes_stream.VERSION
+    salt, params = kdf.parse_header(encrypted[base:aes_stream.HEADER_SIZE])
+    key_bytes = kdf.derive_key('pw', salt, params, 16)
+    assert key_bytes != aes_cipher._ensure_key_length('pw', 16)
+    assert aes_stream.decrypt_bytes(encrypted, 'pw') == b'stream'
+
+    # 版本1：口令直接填充为密钥，没有派生头部
+    header = aes_stream._make_header(16, 1024, os.urandom(8), aes_stream.LEGACY_VERSION)
+    legacy = header + aes_stream._seal(aes_cipher._ensure_key_length('pw', 16), header, 0, b'old', True)
+    assert aes_stream.decrypt_bytes(legacy, 'pw') == b'old'
+    assert bytes(aes_stream.decrypt_parallel(legacy, 'pw')) == b'old'
+
+    # 数据密钥接口不派生、不填充
+    data_key = os.urandom(32)
+    sealed = b''.join(aes_stream.encrypt_stream_with_key(io.BytesIO(b'raw'), data_key, 1024))
+    assert len(sealed) == base + 3 + aes_stream.FRAME_OVERHEAD
+    assert b''.join(aes_stream.decrypt_stream_with_key(io.BytesIO(sealed), data_key)) == b'raw'
+    for bad_key in (data_key[:16], b'short'):
+        try:
+            b''.join(aes_stream.decrypt_stream_with_key(io.BytesIO(sealed), bad_key))
+            assert False, "密钥长度不一致未被发现"
+        except ValueError:
+            pass
+
+
+def test_kdf_formats_and_legacy_fallback():
+    for kdf_name, cost in (('pbkdf2', 1000), ('scrypt', 1024)):
+        encrypted = aes_cipher.encrypt('你好 AES', 'password', 16, kdf_name, cost)
+        assert aes_cipher.decrypt(encrypted, 'password', 16) == '你好 AES'
+        encrypted = des_cipher.encrypt('hello DES', 'password', kdf_name, cost)
+        assert des_cipher.decrypt(encrypted, 'password') == 'hello DES'
+
+    # 旧格式密文仍可解密
+    assert aes_cipher.decrypt(aes_cipher.encrypt('legacy', 'k', kdf=None), 'k') == 'legacy'
+    assert des_cipher.decrypt(des_cipher.encrypt('legacy', 'k', kdf=None), 'k') == 'legacy'
+
+    try:
+        aes_cipher.decrypt(aes_cipher.encrypt('secret', 'right', cost=1000), 'wrong')
+        assert False, "错误口令未被发现"
+    except ValueError:
+        pass
+
+
+def test_kdf_rejects_forged_expensive_headers():
+    """伪造头部中的高成本参数在派生之前就被拒绝"""
+    import base64
+    salt = bytes(kdf.SALT_SIZE)
+    for params in (('pbkdf2', 10000000, 0, 0), ('scrypt', 2 ** 14, 8, 16),
+                   ('scrypt', 2 ** 17, 8, 255), ('scrypt', 2 ** 17, 8, 4), ('scrypt', 2 ** 14, 64, 1)):
+        forged = kdf.make_header(salt, params) + bytes(32)
+        started = time.perf_counter()
+        for attempt in (lambda: kdf.parse_header(forged),
+                        lambda: aes_cipher.decrypt(base64.b64encode(forged).decode(), 'pw')):
+            try:
+                attempt()
+                assert False, f"应当拒绝 {params}"
+            except ValueError:
+                pass
+        assert time.perf_counter() - started < 0.5
+    assert kdf.parse_header(kdf.make_header(salt, kdf.default_params('scrypt', 2 ** 16)))[1][1] == 2 ** 16
+
+
+def test_kdf_cache_skips_rederivation():
+    cache = kdf.get_cache()
+    cache.clear()
+    params = kdf.default_params('pbkdf2', 1000)
+    first = aes_cipher.encrypt('one', 'cached password', cost=1000)
+    second = aes_cipher.encrypt('two', 'cached password', cost=1000)
+    assert first != second
+    assert aes_cipher.decrypt(first, 'cached password') == 'one'
+    assert aes_cipher.decrypt(second, 'cached password') == 'two'
+    # 只在第一次加密时派生，之后复用同一个盐和密钥
+    assert cache.stats()['misses'] == 2 and cache.stats()['hits'] >= 3
+
+    small = kdf.DerivedKeyCache(max_entries=2, ttl=60)
+    for i in range(3):
+        small.put(i, bytes([i]))
+    assert small.get(0) is None and small.get(2) == b'\x02'
+    expired = kdf.DerivedKeyCache(ttl=-1)
+    expired.put('k', b'v')
+    assert expired.get('k') is None
+
+    salt, parsed = kdf.parse_header(kdf.make_header(b'\0' * 16, params))
+    assert parsed == params
+    try:
+        kdf.parse_header(kdf.make_header(b'\0' * 16, ('pbkdf2', 10 ** 9, 0, 0)))
+        assert False, "超出上限的参数未被拒绝"
+    except ValueError:
+        pass
+
+
+def test_cipher_batch_matches_single_calls():
+    texts = ['', 'a', '你好' * 40, 'x' * 2000] + [f'record {i}' for i in range(50)]
+    for key_size in (16, 32):
+        encrypted = aes_cipher.encrypt_batch(texts, 'pw', key_size, cost=1000)
+        assert [aes_cipher.decrypt(text, 'pw', key_size) for text in encrypted] == texts
+        legacy = [aes_cipher.encrypt(text, 'pw', key_size, kdf=None) for text in texts[:5]]
+        assert aes_cipher.decrypt_batch(encrypted + legacy, 'pw', key_size) == texts + texts[:5]
+    encrypted = des_cipher.encrypt_batch(texts, 'pw', cost=1000)
+    assert des_cipher.decrypt_batch(encrypted, 'pw') == texts
+    assert des_cipher.decrypt(encrypted[2], 'pw') == texts[2]
+    assert len(set(encrypted[4:])) == len(encrypted[4:])   # IV各不相同
+
+    try:
+        aes_cipher.decrypt_batch([aes_cipher.encrypt('ok', 'pw'), 'AAAA'], 'pw')
+        assert False, "错误密文未被发现"
+    except ValueError as e:
+        assert '第 1 条' in str(e)
+
+    results = des_cipher.decrypt_batch([encrypted[5], 'AAAA', encrypted[6]], 'pw', return_exceptions=True)
+    assert results[0] == texts[5] and results[2] == texts[6] and isinstance(results[1], ValueError)
+
+    # 每条密文各带一个派生头部时，超过 MAX_KEY_DERIVATIONS 的部分不再派生
+    from crypto_modern.cbc_batch import MAX_KEY_DERIVATIONS
+    many = [des_cipher.encrypt(str(i), 'pw', cost=1000 + i) for i in range(MAX_KEY_DERIVATIONS + 2)]
+    results = des_cipher.decrypt_batch(many, 'pw', return_exceptions=True)
+    assert results[:MAX_KEY_DERIVATIONS] == [str(i) for i in range(MAX_KEY_DERIVATIONS)]
+    assert all(isinstance(result, ValueError) for result in results[MAX_KEY_DERIVATIONS:])
+
+
+def test_rsa_pool_hands_out_each_key_once():
+    pool = RSAKeyPool({1024: 2}, low_watermark=0.5, interval=0.1)
+    pool.start()
+    try:
+        deadline = time.time() + 60
+        while pool.levels()[1024] < 2 and time.time() < deadline:
+            time.sleep(0.05)
+        first, pooled_first = pool.acquire(1024)
+        second, pooled_second = pool.acquire(1024)
+        assert pooled_first and pooled_second and first.n != second.n
+        assert first.size_in_bits() == 1024 and first.has_private()
+
+        # 不在池中的长度同步生成
+        key, pooled = pool.acquire(1536)
+        assert not pooled and key.size_in_bits() == 1536
+        metrics = pool.get_metrics()[1024]
+        assert metrics['handed_out'] == 2 and metrics['low_watermark_events'] == 1
+    finally:
+        pool.stop()
+        pool.join(10)
+
+
+def test_rsa_pool_refills_after_worker_killed():
+    """工作进程被杀死后重建进程池，待完成计数不残留，库存能补满"""
+    import signal
+    pool = RSAKeyPool({1024: 3}, interval=0.1)
+    pool.start()
+    try:
+        deadline = time.time() + 60
+        while not pool._executor or not pool._executor._processes:
+            time.sleep(0.01)
+        for pid in list(pool._executor._processes):
+            os.kill(pid, signal.SIGKILL)
+        while pool.levels()[1024] < 3 and time.time() < deadline:
+            time.sleep(0.05)
+        metrics = pool.get_metrics()[1024]
+        assert metrics['level'] == 3 and metrics['pending'] == 0, metrics
+    finally:
+        pool.stop()
+        pool.join(10)
+
+
+def test_rsa_key_cache_reuses_and_wipes():
+    cache = rsa_cipher.KeyCache(max_entries=1)
+    first = rsa_cipher.RSAKeyPair(1024).get_private_key_pem()
+    second = rsa_cipher.RSAKeyPair(1024).get_private_key_pem()
+    with cache.borrow(first) as entry:
+        key = entry.key
+        assert entry.oaep is entry.oaep
+    with cache.borrow(first) as entry:
+        assert entry.key is key
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+    # 使用中的私钥被淘汰后，要等归还时才清零
+    with cache.borrow(first) as entry:
+        with cache.borrow(second):
+            pass
+        assert entry.evicted and int(key._d) != 0
+    assert int(key._d) == 0 and int(key._p) == 0
+    assert int(key.n) != 0 and cache.stats()['entries'] == 1
+
+    keypair = rsa_cipher.RSAKeyPair(1024)
+    public_pem, private_pem = keypair.get_public_key_pem(), keypair.get_private_key_pem()
+    assert rsa_cipher.decrypt(rsa_cipher.encrypt('你好', public_pem), private_pem) == '你好'
+    signature = rsa_cipher.sign('message', private_pem)
+    assert rsa_cipher.verify('message', signature, public_pem)
+    assert not rsa_cipher.verify('tampered', signature, public_pem)
+
+
+def test_rsa_verify_batch_per_item_results():
+    keypair = rsa_cipher.RSAKeyPair(1024)
+    public_pem, private_pem = keypair.get_public_key_pem(), keypair.get_private_key_pem()
+    items = [{'message': f'doc {i}', 'signature': rsa_cipher.sign(f'doc {i}', private_pem),
+              'public_key': public_pem} for i in range(20)]
+    items[3] = dict(items[3], message='changed')
+    items[4] = dict(items[4], signature='not base64!')
+    items[5] = dict(items[5], public_key='bad key')
+    for workers in (1, 4):
+        result = rsa_cipher.verify_batch(items, workers=workers)
+        assert [r['index'] for r in result['results']] == list(range(20))
+        assert result['valid'] == 17 and result['invalid'] == 3
+        assert [r['valid'] for r in result['results'][2:7]] == [True, False, False, False, True]
+        assert result['distinct_keys'] == 2
+        assert result['results'][4]['error'].startswith('格式错误')
+        assert result['results'][3]['error'] == '签名无效'
+
+    # 非字符串的公钥只让对应条目失败，不影响整个批次
+    odd = items[:2] + [dict(items[2], public_key=[public_pem]), dict(items[3], public_key={'pem': 1}),
+                       dict(items[6], message=123), dict(items[7], public_key=None)]
+    result = rsa_cipher.verify_batch(odd)
+    assert [r['valid'] for r in result['results']] == [True, True, False, False, False, False]
+    assert result['results'][2]['error'].startswith('公钥无效')
+    long_message = 'x' * (rsa_cipher.HASH_SLICE * 2 + 5)
+    assert rsa_cipher.verify(long_message, rsa_cipher.sign(long_message, private_pem), public_pem)
+
+
+def test_envelope_multiple_recipients():
+    alice, bob, eve = (rsa_cipher.RSAKeyPair(1024) for _ in range(3))
+    recipients = [alice.get_public_key_pem(), bob.get_public_key_pem()]
+    message = '超过RSA分组长度的长消息 ' * 200
+    sealed = envelope.encrypt(message, recipients)
+    assert envelope.decrypt(sealed, alice.get_private_key_pem()) == message
+    assert envelope.decrypt(sealed, bob.get_private_key_pem()) == message
+    for bad_key in (eve.get_private_key_pem(), bob.get_public_key_pem()):
+        try:
+            envelope.decrypt(sealed, bad_key)
+            assert False, "非接收者不应能解密"
+        except ValueError:
+            pass
+
+    data = os.urandom(5000)
+    sealed = envelope.seal_bytes(data, recipients[:1], chunk_size=1024)
+    chunks = envelope.open_stream(io.BytesIO(sealed), alice.get_private_key_pem())
+    assert next(chunks) == data[:1024] and b''.join(chunks) == data[1024:]
+    tampered = bytearray(sealed)
+    tampered[-10] ^= 1
+    try:
+        envelope.open_bytes(bytes(tampered), alice.get_private_key_pem())
+        assert False, "篡改未被发现"
+    except ValueError:
+        pass
+
+
+def test_ecc_sign_verify_and_ecies():
+    """Ed25519/P-256 签名验签，P-256 ECIES 加解密"""
+    from crypto_modern import ecc_cipher
+
+    for curve in ecc_cipher.CURVES:
+        keypair = ecc_cipher.ECCKeyPair(curve)
+        signature = ecc_cipher.sign('消息', keypair.get_private_key_pem())
+        assert ecc_cipher.verify('消息', signature, keypair.get_public_key_pem())
+        assert not ecc_cipher.verify('被改过的消息', signature, keypair.get_public_key_pem())
+
+    # 解析后的密钥按 PEM 摘要缓存，淘汰后的私钥标量被清零，Ed25519 种子被丢弃
+    hits = ecc_cipher.key_cache.stats()['hits']
+    ecc_cipher.sign('再签一次', keypair.get_private_key_pem())
+    assert ecc_cipher.key_cache.stats()['hits'] == hits + 1
+    cache = rsa_cipher.KeyCache(max_entries=1, importer=ecc_cipher.ECC.import_key)
+    evicted = []
+    for curve in ('p256', 'ed25519', 'p256'):
+        with cache.borrow(ecc_cipher.ECCKeyPair(curve).get_private_key_pem()) as entry:
+            evicted.append(entry.key)
+    p256_key, ed25519_key = evicted[:2]
+    assert int(p256_key.d) == 0
+    assert ed25519_key._seed is None and ed25519_key._prefix is None and int(ed25519_key.d) == 0
+
+    alice, bob = ecc_cipher.ECCKeyPair('p256'), ecc_cipher.ECCKeyPair('p256')
+    ciphertext = ecc_cipher.encrypt('机密内容', alice.get_public_key_pem())
+    assert ecc_cipher.decrypt(ciphertext, alice.get_private_key_pem()) == '机密内容'
+    for bad in (lambda: ecc_cipher.decrypt(ciphertext, bob.get_private_key_pem()),
+                lambda: ecc_cipher.encrypt('x', ecc_cipher.ECCKeyPair().get_public_key_pem())):
+        try:
+            bad()
+            assert False, "应当抛出 ValueError"
+        except ValueError:
+            pass
+
+
+def test_multi_hash_single_pass():
+    """一次读取同时计算多个摘要，mmap、readinto 与不同块大小结果一致"""
+    import hashlib
+    import tempfile
+    from crypto_modern import multi_hash
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        data = os.urandom(300000)
+        expected = {name: hashlib.new(name, data).hexdigest() for name in multi_hash.ALGORITHMS}
+        path = directory / 'data.bin'
+        path.write_bytes(data)
+
+        for chunk_size in (4096, 65536, multi_hash.CHUNK_SIZE):
+            result = multi_hash.hash_file(str(path), chunk_size=chunk_size)
+            assert result['digests'] == expected and result['mmap'] and result['size'] == len(data)
+        assert multi_hash.hash_file(str(path), use_mmap=False)['digests'] == expected
+        assert multi_hash.hash_stream(io.BytesIO(data), ['md5'])['digests'] == {'md5': expected['md5']}
+        (directory / 'empty.bin').write_bytes(b'')
+        assert multi_hash.hash_file(str(directory / 'empty.bin'))['digests'] == multi_hash.hash_bytes(b'')
+
+    for bad in (lambda: multi_hash.MultiHasher(['sha1']),
+                lambda: multi_hash.hash_stream(io.BytesIO(data), chunk_size=1)):
+        try:
+            bad()
+            assert False, "应当抛出 ValueError"
+        except ValueError:
+            pass
+
+
+def test_bulk_hash_incremental_manifest():
+    """批量摘要写入清单，再次扫描只重新计算新增或变化的文件"""
+    import hashlib
+    import tempfile
+    from crypto_modern import bulk_hash
+
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory)
+        for index in range(12):
+            share = root / f'{index % 3:02x}' / f'share_{index}.bin'
+            share.parent.mkdir(parents=True, exist_ok=True)
+            share.write_bytes(os.urandom(1000 + index))
+        (root / 'notes.txt').write_text('不匹配通配符')
+
+        result = bulk_hash.hash_tree(str(root), workers=4, buffer_size=256)
+        assert (result['files'], result['hashed'], result['skipped']) == (12, 12, 0)
+        algorithm, entries = bulk_hash.load_manifest(result['manifest'])
+        assert algorithm == 'sha256' and sorted(entries) == list(entries)
+        for name, entry in entries.items():
+            assert entry['digest'] == hashlib.sha256((root / name).read_bytes()).hexdigest()
+
+        changed, deleted = root / '00' / 'share_0.bin', root / '01' / 'share_1.bin'
+        changed.write_bytes(b'changed')
+        deleted.unlink()
+        result = bulk_hash.hash_tree(str(root), workers=4)
+        assert (result['files'], result['hashed'], result['skipped'], result['removed']) == (11, 1, 10, 1)
+        _, entries = bulk_hash.load_manifest(result['manifest'])
+        assert entries['00/share_0.bin']['digest'] == hashlib.sha256(b'changed').hexdigest()
+        assert bulk_hash.hash_tree(str(root), algorithm='md5')['hashed'] == 11
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name} 通过")
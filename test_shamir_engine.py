@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Shamir 分片引擎测试
+验证预分配缓冲区接口的正确性，以及缓冲区池在稳态下的复用
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from PIL import Image
+
+from image_share.buffer_pool import BufferPool
+from image_share.capacity import CostModel, DEFAULT_COEFFICIENTS, measure_peak_memory, read_image_header
+from image_share.shamir_share import ShamirShare
+
+
+def test_split_and_reconstruct_into_preallocated_buffers():
+    """任意 k 个分片都能从预分配缓冲区中恢复出原始字节"""
+    secret = bytes(range(256)) * 40 + os.urandom(1000)
+    shamir = ShamirShare(threshold=3, shares=5, pool=BufferPool())
+    outputs = [bytearray(2 * len(secret)) for _ in range(5)]
+    shamir.split_into(secret, outputs)
+
+    for xs in ([1, 2, 3], [2, 4, 5], [5, 1, 3]):
+        recovered = bytearray(len(secret))
+        shamir.reconstruct_into(xs, [outputs[x - 1] for x in xs], recovered)
+        assert recovered == secret
+
+    # 兼容旧接口：0-256 整数序列
+    shares_data = [(x, list(memoryview(outputs[x - 1]).cast('H'))) for x in (1, 3, 4)]
+    assert shamir._reconstruct_secret(shares_data) == secret
+
+
+def test_reconstruct_with_share_value_256_and_basis_256():
+    """xs=[1,2] 时 L_2(0) = 256（≡ -1），与取值 256 的分片相乘不能在 uint16 中溢出"""
+    shamir = ShamirShare(threshold=2, shares=6, pool=BufferPool())
+    # P(x) = s + a*x (mod 257)：s=0, a=128 时 P(1)=128, P(2)=256
+    recovered = bytearray(3)
+    shamir.reconstruct_into([1, 2], [[128, 1, 2], [256, 2, 4]], recovered)
+    assert recovered == bytes([0, 0, 0])
+
+    secret = os.urandom(200 * 200 * 3)
+    outputs = [bytearray(2 * len(secret)) for _ in range(6)]
+    shamir.split_into(secret, outputs)
+    assert max(memoryview(outputs[1]).cast('H')) == 256
+    for xs in ([1, 2], [2, 1], [3, 4], [5, 6]):
+        recovered = bytearray(len(secret))
+        shamir.reconstruct_into(xs, [outputs[x - 1] for x in xs], recovered)
+        assert recovered == secret
+
+    wide = ShamirShare(threshold=4, shares=6, pool=BufferPool())
+    outputs = [bytearray(2 * len(secret)) for _ in range(6)]
+    wide.split_into(secret, outputs)
+    for xs in ([1, 2, 3, 4], [1, 3, 5, 6], [2, 3, 4, 6]):
+        recovered = bytearray(len(secret))
+        wide.reconstruct_into(xs, [outputs[x - 1] for x in xs], recovered)
+        assert recovered == secret
+
+
+def test_buffer_pool_reuses_buffers():
+    """稳态下每次请求都从池中取到缓冲区，不再新建"""
+    pool = BufferPool(min_size=1024)
+    shamir = ShamirShare(threshold=2, shares=3, pool=pool)
+    secret = os.urandom(5000)
+    outputs = [bytearray(2 * len(secret)) for _ in range(3)]
+
+    shamir.split_into(secret, outputs)
+    misses = pool.stats['misses']
+    for _ in range(10):
+        shamir.split_into(secret, outputs)
+    assert pool.stats['misses'] == misses
+    assert pool.stats['hits'] >= 20
+    assert pool.size_class(5000) == 8192
+
+
+def test_capacity_estimate_and_admission(tmp_path):
+    """从图像头部预测输出大小，超过上限的任务被拒绝"""
+    image_path = str(tmp_path / 'header.png')
+    Image.new('RGBA', (640, 480)).save(image_path)
+    header = read_image_header(image_path)
+    assert (header['mode'], header['width'], header['height']) == ('RGBA', 640, 480)
+
+    model = CostModel(DEFAULT_COEFFICIENTS)
+    estimate = model.estimate('split', 640, 480, 'RGBA', threshold=3, shares=10)
+    assert estimate['secret_bytes'] == 640 * 480 * 4
+    assert estimate['output_bytes'] >= 10 * 2 * estimate['secret_bytes']
+    assert estimate['wall_seconds'] > 0
+
+    assert model.admit(estimate, max_output_bytes=10 ** 9) == (True, None)
+    admitted, reason = model.admit(estimate, max_output_bytes=10 ** 6)
+    assert not admitted and reason
+
+    recover = model.estimate('recover', 640, 480, 'RGBA', threshold=3, shares=3)
+    assert recover['input_bytes'] >= 3 * 2 * recover['secret_bytes']
+
+    # 峰值内存使用标定的 memory 系数，没有 memory 的旧标定文件退回默认系数
+    fixed = {op: dict(c, memory={'fixed': 100, 'per_byte': 0, 'per_block': 0})
+             for op, c in DEFAULT_COEFFICIENTS.items()}
+    assert CostModel(fixed).estimate('split', 640, 480, 'RGBA', 3, 10)['peak_memory_bytes'] == 100
+    legacy = {op: {name: value for name, value in c.items() if name != 'memory'}
+              for op, c in DEFAULT_COEFFICIENTS.items()}
+    assert CostModel(legacy).estimate('split', 640, 480, 'RGBA', 3, 10) == estimate
+    assert estimate['peak_memory_bytes'] >= 2 * estimate['secret_bytes']
+    assert measure_peak_memory('split', (image_path, str(tmp_path / 'shares'), 2, 3)) > 0
+
+
+if __name__ == '__main__':
+    import tempfile
+    test_split_and_reconstruct_into_preallocated_buffers()
+    test_reconstruct_with_share_value_256_and_basis_256()
+    test_buffer_pool_reuses_buffers()
+    with tempfile.TemporaryDirectory() as d:
+        test_capacity_estimate_and_admission(Path(d))
+    print("✅ Shamir 分片引擎测试全部通过")
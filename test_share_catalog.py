@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+分片目录表测试
+验证分割任务登记、按用户查询以及基于目录表的恢复
+"""
+
+import os
+import sys
+from pathlib import Path
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database.init_db import init_database
+from database import share_catalog
+from image_share.shamir_share import ShamirShare
+from image_share.recover import recover_image_from_shares
+
+
+def _make_image(path: str, width: int = 16, height: int = 12) -> str:
+    """创建一张小的渐变测试图像"""
+    img = Image.new('RGB', (width, height))
+    img.putdata([(x * 16 % 256, y * 20 % 256, 128)
+                 for y in range(height) for x in range(width)])
+    img.save(path)
+    return path
+
+
+def test_register_and_query_jobs(tmp_path):
+    """登记任务后可按用户列出、按ID获取，其他用户不可见"""
+    db_path = str(tmp_path / 'users.db')
+    init_database(db_path)
+
+    image_path = _make_image(str(tmp_path / 'input.png'))
+    share_dir = str(tmp_path / 'shares_job1')
+    metadata = ShamirShare(threshold=2, shares=3).split_image(image_path, share_dir)
+
+    share_catalog.register_job('job1', 7, metadata, share_dir,
+                               original_filename='input.png',
+                               original_size=os.path.getsize(image_path),
+                               db_path=db_path)
+
+    jobs = share_catalog.list_jobs(7, db_path=db_path)
+    assert [j['job_id'] for j in jobs] == ['job1']
+    assert jobs[0]['total_share_bytes'] == 3 * 16 * 12 * 3 * 2
+    assert share_catalog.list_jobs(8, db_path=db_path) == []
+    assert share_catalog.get_job('job1', 8, db_path=db_path) is None
+
+    job = share_catalog.get_job('job1', 7, db_path=db_path)
+    assert [sf['share_index'] for sf in job['share_files']] == [1, 2, 3]
+    for sf in job['share_files']:
+        assert os.path.getsize(sf['location']) == sf['size']
+        assert len(sf['sha256']) == 64
+
+
+def test_recover_from_catalog_locations(tmp_path):
+    """使用目录表提供的分片位置恢复，结果与原图一致"""
+    db_path = str(tmp_path / 'users.db')
+    init_database(db_path)
+
+    image_path = _make_image(str(tmp_path / 'input.png'))
+    share_dir = str(tmp_path / 'shares_job2')
+    metadata = ShamirShare(threshold=3, shares=5).split_image(image_path, share_dir)
+    share_catalog.register_job('job2', 1, metadata, share_dir, db_path=db_path)
+
+    job = share_catalog.get_job('job2', 1, db_path=db_path)
+    share_paths = {sf['share_index']: sf['location'] for sf in job['share_files'][2:]}
+    output_path = str(tmp_path / 'recovered.png')
+    recover_image_from_shares(share_dir, output_path, share_paths)
+
+    assert Image.open(output_path).tobytes() == Image.open(image_path).tobytes()
+
+
+if __name__ == '__main__':
+    import tempfile
+    for test in (test_register_and_query_jobs, test_recover_from_catalog_locations):
+        with tempfile.TemporaryDirectory() as d:
+            test(Path(d))
+            print(f"✅ {test.__name__} 通过")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+存储层测试
+验证唯一任务ID、哈希分片布局以及两种存储后端的读写语义
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database.init_db import init_database
+from storage.backends import LocalFSBackend, LocalObjectStoreBackend
+from storage.janitor import Janitor
+from storage.layout import new_job_id, job_key, job_prefix, validate_key, AREA_OUTPUTS, AREA_UPLOADS
+from storage.usage import UsageLedger
+
+
+def test_layout_is_sharded_and_validated():
+    """任务键分散到两级哈希目录，非法键被拒绝"""
+    job_id = new_job_id()
+    key = job_key(AREA_OUTPUTS, job_id, 'share_1.bin')
+    parts = key.split('/')
+    assert parts[0] == 'outputs' and len(parts[1]) == 2 and len(parts[2]) == 2
+    assert parts[3] == job_id and key.startswith(job_prefix(AREA_OUTPUTS, job_id))
+
+    for bad in ('', '/etc/passwd', 'outputs/../config.py', 'other/a.bin', 'outputs//a'):
+        try:
+            validate_key(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"应拒绝非法键: {bad!r}")
+
+
+def test_concurrent_jobs_do_not_collide(tmp_path):
+    """同一时刻的大量并发任务各自写入独立位置"""
+    backend = LocalFSBackend(str(tmp_path))
+
+    def run_job(i):
+        job_id = new_job_id()
+        key = job_key(AREA_OUTPUTS, job_id, 'share_1.bin')
+        backend.put_bytes(key, str(i).encode())
+        return key, str(i).encode()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(run_job, range(200)))
+
+    assert len({key for key, _ in results}) == 200
+    for key, payload in results:
+        with backend.open(key) as f:
+            assert f.read() == payload
+
+
+def _exercise_backend(backend, scratch_dir):
+    """两种后端共享的读写语义检查"""
+    job_id = new_job_id()
+    prefix = job_prefix(AREA_OUTPUTS, job_id)
+    src = os.path.join(backend.make_staging_dir(), 'share_1.bin')
+    with open(src, 'wb') as f:
+        f.write(b'\x01\x00' * 100)
+
+    assert backend.put_file(f'{prefix}/share_1.bin', src, move=True) == 200
+    assert not os.path.exists(src)
+    backend.put_bytes(f'{prefix}/metadata.json', b'{}')
+
+    assert backend.exists(f'{prefix}/share_1.bin')
+    assert backend.size(f'{prefix}/share_1.bin') == 200
+    assert backend.list(prefix) == [f'{prefix}/metadata.json', f'{prefix}/share_1.bin']
+    with open(backend.as_local_file(f'{prefix}/share_1.bin', scratch_dir), 'rb') as f:
+        assert f.read() == b'\x01\x00' * 100
+
+    assert backend.delete(f'{prefix}/share_1.bin')
+    assert not backend.exists(f'{prefix}/share_1.bin')
+    assert not backend.delete(f'{prefix}/share_1.bin')
+
+
+def test_local_fs_backend(tmp_path):
+    scratch = tmp_path / 'scratch'
+    scratch.mkdir()
+    _exercise_backend(LocalFSBackend(str(tmp_path / 'root')), str(scratch))
+
+
+def test_object_store_backend(tmp_path):
+    scratch = tmp_path / 'scratch'
+    scratch.mkdir()
+    _exercise_backend(LocalObjectStoreBackend(str(tmp_path / 'bucket')), str(scratch))
+
+
+def _janitor_fixture(tmp_path, **kwargs):
+    """创建带账本的存储和清理器"""
+    db_path = str(tmp_path / 'users.db')
+    init_database(db_path)
+    backend = LocalFSBackend(str(tmp_path / 'root'))
+    ledger = UsageLedger(db_path)
+    return backend, ledger, Janitor(backend, ledger, **kwargs)
+
+
+def _put(backend, ledger, area, job_id, size, user_id, now):
+    key = job_key(area, job_id, 'data.bin')
+    backend.put_bytes(key, b'x' * size)
+    ledger.record(key, size, user_id, now=now)
+    return key
+
+
+def test_janitor_ttl_and_incremental_usage(tmp_path):
+    """TTL到期的上传文件被删除，账本用量随之增量更新"""
+    backend, ledger, janitor = _janitor_fixture(
+        tmp_path, ttls={AREA_UPLOADS: 100, AREA_OUTPUTS: None})
+    job = new_job_id()
+    upload_key = _put(backend, ledger, AREA_UPLOADS, job, 300, 1, now=1000)
+    output_key = _put(backend, ledger, AREA_OUTPUTS, job, 500, 1, now=1000)
+    assert ledger.usage(1) == {'bytes': 800, 'objects': 2}
+
+    janitor.run_once(now=1050)
+    assert backend.exists(upload_key)
+
+    janitor.run_once(now=1200)
+    assert not backend.exists(upload_key) and backend.exists(output_key)
+    assert ledger.usage(1) == {'bytes': 500, 'objects': 1}
+    assert ledger.usage() == {'bytes': 500, 'objects': 1}
+    metrics = janitor.get_metrics()
+    assert metrics['reclaimed_bytes'] == 300 and metrics['evicted_jobs']['ttl'] == 1
+
+
+def test_janitor_quota_lru(tmp_path):
+    """超出单用户和全局配额时，按最后访问时间淘汰最久未用的任务"""
+    backend, ledger, janitor = _janitor_fixture(
+        tmp_path, ttls={}, user_quota=250, global_quota=350)
+    old_job, recent_job, touched_job, other_job = (new_job_id() for _ in range(4))
+    old_key = _put(backend, ledger, AREA_OUTPUTS, old_job, 100, 1, now=10)
+    touched_key = _put(backend, ledger, AREA_OUTPUTS, touched_job, 100, 1, now=20)
+    recent_key = _put(backend, ledger, AREA_OUTPUTS, recent_job, 100, 1, now=30)
+    other_key = _put(backend, ledger, AREA_OUTPUTS, other_job, 150, 2, now=5)
+    ledger.touch_job(touched_job, now=40)
+
+    # 用户1超额（300 > 250）：淘汰最久未访问的 old_job
+    # 之后全局 350 未超额，用户2的更早任务保留
+    janitor.run_once(now=50)
+    assert not backend.exists(old_key)
+    assert all(backend.exists(k) for k in (touched_key, recent_key, other_key))
+
+    # 全局配额收紧后，淘汰全局最久未访问的用户2任务
+    janitor.global_quota = 200
+    janitor.run_once(now=60)
+    assert not backend.exists(other_key)
+    assert backend.exists(touched_key) and backend.exists(recent_key)
+    assert ledger.usage() == {'bytes': 200, 'objects': 2}
+
+
+if __name__ == '__main__':
+    import tempfile
+    test_layout_is_sharded_and_validated()
+    for test in (test_concurrent_jobs_do_not_collide, test_local_fs_backend, test_object_store_backend,
+                 test_janitor_ttl_and_incremental_usage, test_janitor_quota_lru):
+        with tempfile.TemporaryDirectory() as d:
+            test(Path(d))
+    print("✅ 存储层测试全部通过")